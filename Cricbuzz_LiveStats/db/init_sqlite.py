@@ -2,6 +2,410 @@ import sqlite3
 
 DB_PATH = "db/cricbuzz.db"
 
+# Tables whose row counts are kept in db_stats by triggers
+COUNTED_TABLES = ("players", "matches", "scorecards")
+
+
+def create_stats_schema(conn):
+    """
+    Create the db_stats table and the triggers that keep its counters exact
+
+    Safe to call repeatedly; counters are only seeded (with one COUNT(*) each)
+    when they do not exist yet.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS db_stats (
+            metric TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """)
+
+        for table in COUNTED_TABLES:
+            cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert AFTER INSERT ON {table}
+            BEGIN
+                UPDATE db_stats SET value = value + 1 WHERE metric = '{table}';
+            END
+            """)
+            cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete AFTER DELETE ON {table}
+            BEGIN
+                UPDATE db_stats SET value = value - 1 WHERE metric = '{table}';
+            END
+            """)
+            cur.execute(f"""
+            INSERT INTO db_stats (metric, value)
+            SELECT '{table}', (SELECT COUNT(*) FROM {table})
+            WHERE NOT EXISTS (SELECT 1 FROM db_stats WHERE metric = '{table}')
+            """)
+
+        cur.execute("INSERT OR IGNORE INTO db_stats (metric, value) VALUES ('live_matches', 0)")
+        cur.execute("INSERT OR IGNORE INTO db_stats (metric, value) VALUES ('last_sync_at', 0)")
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+
+
+# Tables captured in change_log, with the key recorded for each row change
+CHANGE_LOG_KEYS = {
+    "players": "player_id",
+    "matches": "match_id",
+    "scorecards": "match_id",
+    # One row per player and stat kind per refresh: a cheap "stats changed" signal
+    "career_fetches": "player_id",
+    # One row per stat cell written, so queries over these tables can be cached
+    "career_batting": "player_id",
+    "career_bowling": "player_id",
+}
+
+
+def create_change_log_schema(conn):
+    """
+    Create the change_log table and the capture triggers that fill it
+
+    Every insert, update and delete on the CHANGE_LOG_KEYS tables appends
+    (seq, table_name, row_key, op). seq is AUTOINCREMENT, so it only grows.
+    Tables that do not exist yet are skipped; call again after creating them.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key INTEGER,
+            op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D')),
+            changed_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_change_log_table_seq ON change_log(table_name, seq)")
+
+        # Highest seq removed by pruning; readers behind it must resync fully
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_log_pruned (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            through_seq INTEGER NOT NULL
+        )
+        """)
+
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS change_cursors (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """)
+
+        existing = {r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, key in CHANGE_LOG_KEYS.items():
+            if table not in existing:
+                continue
+            for event, op, ref in (("INSERT", "I", "NEW"), ("UPDATE", "U", "NEW"), ("DELETE", "D", "OLD")):
+                cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_cdc_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (table_name, row_key, op) VALUES ('{table}', {ref}.{key}, '{op}');
+                END
+                """)
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+
+
+def create_id_sequence_schema(conn):
+    """
+    Create the id_sequences table used to allocate player IDs without a MAX() scan
+
+    An insert trigger moves the sequence past any explicitly inserted player_id
+    (e.g. API IDs from syncs), so allocated IDs never collide with them.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS id_sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """)
+        cur.execute("""
+        INSERT INTO id_sequences (name, next_value)
+        SELECT 'players', (SELECT COALESCE(MAX(player_id), 0) + 1 FROM players)
+        WHERE NOT EXISTS (SELECT 1 FROM id_sequences WHERE name = 'players')
+        """)
+        cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_players_id_sequence AFTER INSERT ON players
+        WHEN NEW.player_id >= (SELECT next_value FROM id_sequences WHERE name = 'players')
+        BEGIN
+            UPDATE id_sequences SET next_value = NEW.player_id + 1 WHERE name = 'players';
+        END
+        """)
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+
+
+# Sort keys for players paging; each has a (key, player_id) index for keyset pagination
+PLAYER_SORT_KEYS = {
+    "name": "COALESCE(name, '')",
+    "country": "COALESCE(country, '')",
+    "role": "COALESCE(role, '')",
+}
+
+
+def create_player_indexes(conn):
+    """
+    Create the expression indexes used by players paging, sorting and filtering
+
+    Args:
+        conn: Open sqlite3 connection
+    """
+    for column, key in PLAYER_SORT_KEYS.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_players_{column}_page ON players({key}, player_id)")
+    # Country / role filter with the default name sort, without a temp sort
+    name_key = PLAYER_SORT_KEYS["name"]
+    for column in ("country", "role"):
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_players_{column}_name_page "
+            f"ON players({PLAYER_SORT_KEYS[column]}, {name_key}, player_id)"
+        )
+    conn.commit()
+
+
+# Indexed generated columns over each table's raw_json payload:
+# {table: {column: (type, SQL expression over raw_json)}}
+RAW_JSON_COLUMNS = {
+    "matches": {
+        "state": ("TEXT", "json_extract(raw_json, '$.state')"),
+        "match_type": ("TEXT", "json_extract(raw_json, '$.matchType')"),
+        "series_id": ("INTEGER", "json_extract(raw_json, '$.seriesId')"),
+        "toss_winner": ("TEXT", "json_extract(raw_json, '$.tossResults.tossWinnerName')"),
+        "toss_decision": ("TEXT", "json_extract(raw_json, '$.tossResults.decision')"),
+    },
+    "players": {
+        "dob": ("TEXT", "json_extract(raw_json, '$.DoB')"),
+        "birth_place": ("TEXT", "json_extract(raw_json, '$.birthPlace')"),
+    },
+    "scorecards": {
+        "extras_total": ("INTEGER", "json_extract(raw_json, '$.extras.total')"),
+        "batters": ("INTEGER", "json_array_length(raw_json, '$.batsman')"),
+    },
+}
+
+
+def create_raw_json_schema(conn):
+    """
+    Add the raw_json payload column and its indexed generated columns
+
+    Generated columns are VIRTUAL, so they cost no storage and can be added
+    to existing tables with ALTER TABLE; only their indexes are materialised.
+    Filtering on one of them is an index seek instead of a JSON parse per row.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        for table, columns in RAW_JSON_COLUMNS.items():
+            existing = {r[1] for r in cur.execute(f"PRAGMA table_xinfo({table})")}
+            if "raw_json" not in existing:
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN raw_json TEXT")
+            for column, (col_type, expr) in columns.items():
+                if column not in existing:
+                    cur.execute(
+                        f"ALTER TABLE {table} ADD COLUMN {column} {col_type} "
+                        f"GENERATED ALWAYS AS ({expr}) VIRTUAL"
+                    )
+                cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})")
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+
+
+# Career stat tables per kind, as returned by /stats/v1/player/{id}/{kind}
+CAREER_TABLES = {
+    "batting": "career_batting",
+    "bowling": "career_bowling",
+}
+
+
+def create_career_stats_schema(conn):
+    """
+    Create the typed career stat tables and their freshness table
+
+    Each stat table holds one numeric value per (player_id, format, stat);
+    `raw` keeps the API's text (e.g. '183*', '6/24') for display, and the
+    *_pos columns keep the API's row and column order.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        for table in CAREER_TABLES.values():
+            cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                player_id INTEGER NOT NULL,
+                format TEXT NOT NULL,
+                stat TEXT NOT NULL,
+                value REAL,
+                raw TEXT,
+                format_pos INTEGER NOT NULL,
+                stat_pos INTEGER NOT NULL,
+                PRIMARY KEY (player_id, format, stat)
+            ) WITHOUT ROWID
+            """)
+            cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_stat ON {table}(format, stat, value)")
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS career_fetches (
+            player_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            fetched_at INTEGER NOT NULL,
+            PRIMARY KEY (player_id, kind)
+        ) WITHOUT ROWID
+        """)
+        cur.execute("COMMIT")
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+
+
+def create_teams_schema(conn):
+    """
+    Create the teams table filled by team discovery and roster imports
+
+    `roster_fetched_at` / `roster_size` record each team's last successful
+    roster import, so the importer can report and skip recently fetched teams.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS teams (
+        team_id INTEGER PRIMARY KEY,
+        name TEXT,
+        short_name TEXT,
+        category TEXT,
+        roster_fetched_at INTEGER,
+        roster_size INTEGER
+    )
+    """)
+    conn.commit()
+
+
+def create_backfill_schema(conn):
+    """
+    Create the backfill work queue / checkpoint table
+
+    One row per unit of historical work: a series archive page ('archive',
+    key 'international' or 'international:2023'), a series ('series', key
+    series ID) or a scorecard ('scorecard', key match ID). A row is inserted
+    'pending' when discovered and marked 'done' in the same transaction that
+    writes its data, so an interrupted backfill resumes where it stopped.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS backfill_queue (
+        kind TEXT NOT NULL,
+        key TEXT NOT NULL,
+        label TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        updated_at INTEGER,
+        PRIMARY KEY (kind, key)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_backfill_queue_status ON backfill_queue(status, kind)")
+    conn.commit()
+
+
+def create_commentary_schema(conn):
+    """
+    Create the ball-by-ball tables and the per-over view
+
+    `balls` is append-only: one compact all-integer row per delivery, keyed by
+    (match_id, ts) so re-reading an overlapping commentary page inserts
+    nothing. `commentary_cursors` remembers the newest ingested timestamp per
+    match, so each poll only stores newer balls. `commentary_players` holds
+    the batter and bowler names seen in commentary, apart from `players` so
+    ingesting a match never adds stub player rows.
+
+    Args:
+        conn: Open sqlite3 connection with no transaction in progress
+    """
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS balls (
+        match_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        innings INTEGER NOT NULL,
+        over INTEGER NOT NULL,
+        ball INTEGER NOT NULL,
+        runs INTEGER NOT NULL,
+        extras INTEGER NOT NULL,
+        extra_type INTEGER NOT NULL,
+        wicket INTEGER NOT NULL,
+        batter_id INTEGER,
+        bowler_id INTEGER,
+        PRIMARY KEY (match_id, ts)
+    ) WITHOUT ROWID
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS commentary_cursors (
+        match_id INTEGER PRIMARY KEY,
+        last_ts INTEGER NOT NULL,
+        balls INTEGER NOT NULL DEFAULT 0,
+        updated_at INTEGER
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS commentary_players (
+        player_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL
+    )
+    """)
+    # Wides (1) and no-balls (2) are not legal deliveries
+    cur.execute("""
+    CREATE VIEW IF NOT EXISTS over_summary AS
+    SELECT match_id, innings, over + 1 AS over_no,
+           SUM(extra_type NOT IN (1, 2)) AS legal_balls,
+           SUM(runs + extras) AS runs,
+           SUM(extras) AS extras,
+           SUM(wicket) AS wickets,
+           SUM(runs = 4) AS fours,
+           SUM(runs = 6) AS sixes,
+           SUM(runs + extras = 0) AS dots,
+           MIN(ts) AS first_ts,
+           MAX(ts) AS last_ts
+    FROM balls
+    GROUP BY match_id, innings, over
+    """)
+    conn.commit()
+
+
 def main():
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
@@ -46,9 +450,20 @@ def main():
     )
     """)
 
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_scorecards_match_id ON scorecards(match_id)")
+
     # No seed data - use API to import real players
 
     conn.commit()
+    create_stats_schema(conn)
+    create_career_stats_schema(conn)
+    create_teams_schema(conn)
+    create_backfill_schema(conn)
+    create_commentary_schema(conn)
+    create_change_log_schema(conn)
+    create_id_sequence_schema(conn)
+    create_player_indexes(conn)
+    create_raw_json_schema(conn)
     conn.close()
     print("SQLite DB initialized at", DB_PATH)
 
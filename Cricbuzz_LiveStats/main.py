@@ -2,13 +2,39 @@
 Cricbuzz LiveStats - Real-time Cricket Analytics Dashboard
 Main entry point for the Streamlit application
 """
+import time
+_run_started = time.perf_counter()
+
+import importlib
 import streamlit as st
 import sys
 import os
 from datetime import datetime
 
-# Import page modules
-from pages import home, live_scores, player_stats, sql_analytics, crud_operations
+DB_PATH = "db/cricbuzz.db"
+
+# Page registry: modules are imported only when their page is first selected,
+# so a cold start pays for one page's dependencies instead of all five
+PAGES = {
+    "🏠 Home": "pages.home",
+    "📊 Live Scores": "pages.live_scores",
+    "👤 Player Stats": "pages.player_stats",
+    "📈 SQL Analytics": "pages.sql_analytics",
+    "⚙️ CRUD Operations": "pages.crud_operations"
+}
+
+
+def load_page(choice: str):
+    """Import (once per process) and return the module for a page"""
+    return importlib.import_module(PAGES[choice])
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def db_file_info(db_path: str):
+    """DB existence and size for the Debug panel, refreshed at most every 30s"""
+    if not os.path.exists(db_path):
+        return None
+    return os.path.getsize(db_path) / 1024  # KB
 
 # Page configuration
 st.set_page_config(page_title="Cricbuzz LiveStats", layout="wide")
@@ -26,15 +52,7 @@ st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 # Sidebar navigation
 st.sidebar.title("🏏 Cricket Dashboard")
 
-pages = {
-    "🏠 Home": home,
-    "📊 Live Scores": live_scores,
-    "👤 Player Stats": player_stats,
-    "📈 SQL Analytics": sql_analytics,
-    "⚙️ CRUD Operations": crud_operations
-}
-
-choice = st.sidebar.selectbox("Choose a page", list(pages.keys()))
+choice = st.sidebar.selectbox("Choose a page", list(PAGES.keys()), key="page")
 
 # Page descriptions
 page_info = {
@@ -91,15 +109,18 @@ with st.sidebar.expander("🐛 Debug Info", expanded=False):
     st.markdown(f"- Timestamp: `{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}`")
     
     st.markdown("**Database**")
-    db_path = "db/cricbuzz.db"
-    db_exists = os.path.exists(db_path)
-    st.markdown(f"- DB Status: `{'✅ Connected' if db_exists else '❌ Not Found'}`")
-    st.markdown(f"- DB Path: `{db_path}`")
-    if db_exists:
-        db_size = os.path.getsize(db_path) / 1024  # KB
+    db_size = db_file_info(DB_PATH)
+    st.markdown(f"- DB Status: `{'✅ Connected' if db_size is not None else '❌ Not Found'}`")
+    st.markdown(f"- DB Path: `{DB_PATH}`")
+    if db_size is not None:
         st.markdown(f"- DB Size: `{db_size:.2f} KB`")
 
+    st.markdown("**Performance**")
+    render_time = st.empty()
+
 # Route to selected page
-if choice in pages:
-    pages[choice].render()
+if choice in PAGES:
+    load_page(choice).render()
+
+render_time.markdown(f"- Last render: `{(time.perf_counter() - _run_started) * 1000:.0f} ms`")
 
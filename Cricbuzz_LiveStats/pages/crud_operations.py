@@ -1,25 +1,199 @@
 """
 CRUD Operations page for Cricbuzz LiveStats
 """
+import io
 import streamlit as st
 from utils.crud_players import (
-    fetch_players, create_player, update_player, delete_player, get_next_player_id
+    create_player, update_player, delete_player, get_next_player_id, allocate_player_id,
+    import_players, spool_export, fetch_players_by_ids, diff_players, apply_player_changes,
+    merge_player_rows, PlayerConflictError, fetch_player_page, count_players, distinct_player_values
 )
+from utils.player_store import PlayerStore
+from utils.change_log import table_version
+
+PAGE_SIZES = [25, 50, 100]
+PICKER_PAGE_SIZE = 50
+SORT_LABELS = {"name": "Name", "country": "Country", "role": "Role", "player_id": "Player ID"}
+
+
+@st.cache_resource
+def get_player_store() -> PlayerStore:
+    """Process-wide players frame shared by all tabs and sessions"""
+    return PlayerStore()
+
+
+@st.cache_data(show_spinner=False)
+def player_filter_options(column: str, version: int):
+    """Distinct filter values, recomputed only when the players table changes"""
+    return distinct_player_values(column)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_player_count(search: str, country, role, version: int) -> int:
+    """Matching-player count, recounted only when the players table or the filters change"""
+    return count_players(search, country, role)
+
+
+def player_picker(label: str, key: str):
+    """
+    Searchable player select that loads options from SQL a page at a time
+
+    Args:
+        label: Select box label
+        key: Unique widget key prefix
+
+    Returns:
+        dict: Selected player row, or None if nothing matches
+    """
+    term = st.text_input("🔎 Find player", key=f"{key}_term", placeholder="Type a name, country or role")
+    state = st.session_state
+    # Loaded options are kept until the search or the players table changes
+    signature = (term, table_version("players"))
+    if state.get(f"{key}_signature") != signature:
+        state[f"{key}_signature"] = signature
+        page, state[f"{key}_next"] = fetch_player_page(search=term, limit=PICKER_PAGE_SIZE)
+        state[f"{key}_rows"] = page.to_dict("records")
+
+    rows = state[f"{key}_rows"]
+    if not rows:
+        st.warning("No players match." if term else "No players in the database.")
+        return None
+
+    selected = st.selectbox(
+        label,
+        rows,
+        format_func=lambda x: f"{x['player_id']} - {x['name']}",
+        key=f"{key}_select"
+    )
+    if state[f"{key}_next"] is not None and st.button(f"⬇️ Load {PICKER_PAGE_SIZE} more", key=f"{key}_more"):
+        # Continue from the keyset cursor instead of re-reading the rows already shown
+        page, state[f"{key}_next"] = fetch_player_page(search=term, after=state[f"{key}_next"],
+                                                       limit=PICKER_PAGE_SIZE)
+        state[f"{key}_rows"] = rows + page.to_dict("records")
+        st.rerun()
+    return selected
+
+
+def render_player_table():
+    """Read tab: filters, sort and keyset paging all pushed down to SQL"""
+    version = table_version("players")
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        search = st.text_input("Search by name/country/role", placeholder="e.g., England / Batter / Buttler")
+    with col2:
+        country = st.selectbox("Country", [None] + player_filter_options("country", version),
+                               format_func=lambda v: "All" if v is None else (v or "—"))
+    with col3:
+        role = st.selectbox("Role", [None] + player_filter_options("role", version),
+                            format_func=lambda v: "All" if v is None else (v or "—"))
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort = st.selectbox("Sort by", list(SORT_LABELS), format_func=SORT_LABELS.get)
+    with col2:
+        descending = st.toggle("Descending")
+    with col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+
+    # Cursor stack for Prev/Next; any change of filter or sort starts again at page 1
+    signature = (search, country, role, sort, descending, page_size)
+    if st.session_state.get("players_page_signature") != signature:
+        st.session_state.players_page_signature = signature
+        st.session_state.players_page_cursors = [None]
+    cursors = st.session_state.players_page_cursors
+
+    df, next_cursor = fetch_player_page(search, country, role, sort, descending,
+                                        after=cursors[-1], limit=page_size)
+    st.dataframe(df, width='stretch', hide_index=True)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ Prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)} | {cached_player_count(search, country, role, version)} matching players")
+    with col3:
+        if st.button("Next ▶", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+
+def render_grid_editor(store: PlayerStore):
+    """Editable player grid: diff against the loaded frame and save in one transaction"""
+    if "grid_players" not in st.session_state:
+        st.session_state.grid_players = store.frame().copy()
+        st.session_state.grid_version = 0
+
+    original = st.session_state.grid_players
+    edited = st.data_editor(
+        original,
+        num_rows="dynamic",
+        disabled=["player_id"],
+        hide_index=True,
+        use_container_width=True,
+        key=f"player_grid_{st.session_state.grid_version}"
+    )
+
+    changes = diff_players(original, edited)
+    pending = sum(len(v) for v in changes.values())
+    st.caption(
+        f"Pending: {len(changes['inserts'])} new | {len(changes['updates'])} edited | "
+        f"{len(changes['deletes'])} deleted"
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        save = st.button("💾 Save Changes", type="primary", disabled=not pending)
+    with col2:
+        if st.button("🔄 Reload from Database"):
+            del st.session_state["grid_players"]
+            st.rerun()
+
+    if save:
+        touched = [row[0] for _, row in changes["updates"]] + [row[0] for row in changes["deletes"]]
+        try:
+            result = apply_player_changes(changes)
+            refreshed = touched + result["inserted_ids"]
+            st.toast(
+                f"✅ Saved {len(result['inserted_ids'])} new, {len(result['updated_ids'])} updated, "
+                f"{len(result['deleted_ids'])} deleted",
+                icon="✅"
+            )
+        except PlayerConflictError as e:
+            # Nothing was written; pull the current values of the conflicting rows
+            refreshed = e.player_ids
+            st.session_state.grid_conflict = str(e)
+        except Exception as e:
+            st.toast(f"❌ Save failed: {e}", icon="❌")
+            st.error(f"❌ Save failed: {e}")
+            return
+
+        # Re-query only the rows that changed instead of the whole table
+        st.session_state.grid_players = merge_player_rows(
+            original, fetch_players_by_ids(refreshed), refreshed
+        )
+        st.session_state.grid_version += 1
+        st.rerun()
+
+    if "grid_conflict" in st.session_state:
+        st.error(f"⚠️ {st.session_state.pop('grid_conflict')}. Their current values were reloaded; "
+                 "re-apply your edits and save again.")
 
 
 def render():
     """Render CRUD operations page"""
     st.title("🛠 CRUD Operations (Players)")
 
-    tab1, tab2, tab3, tab4 = st.tabs(["➕ Create", "📄 Read", "✏️ Update", "🗑 Delete"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["➕ Create", "📄 Read", "✏️ Update", "🗑 Delete", "📦 Bulk"])
 
     # ---------------- CREATE ----------------
     with tab1:
         st.subheader("Add New Player")
         
-        # Auto-generate next player ID
-        next_id = get_next_player_id()
-        st.info(f"💡 Next available Player ID: **{next_id}**")
+        # Preview only; the ID is reserved from the sequence on submit
+        st.info(f"💡 Next available Player ID: **{get_next_player_id()}**")
 
         with st.form("create_player_form"):
             name = st.text_input("Name*", placeholder="e.g., MS Dhoni")
@@ -35,6 +209,7 @@ def render():
                 if not name.strip():
                     st.error("❌ Name is required.")
                 else:
+                    next_id = allocate_player_id()
                     create_player(next_id, name.strip(), country.strip(), role, batting_style.strip(), bowling_style.strip())
                     st.toast(f"✅ Player '{name}' created successfully!", icon="✅")
                     st.success(f"✅ Player created successfully with ID: {next_id}")
@@ -46,12 +221,8 @@ def render():
     # ---------------- READ ----------------
     with tab2:
         st.subheader("View Players")
-        search = st.text_input("Search by name/country/role", placeholder="e.g., England / Batter / Buttler")
-
         try:
-            df = fetch_players(search)
-            st.dataframe(df, width='stretch')
-            st.caption(f"Total players: {len(df)}")
+            render_player_table()
         except Exception as e:
             st.error(f"Read failed: {e}")
 
@@ -59,52 +230,36 @@ def render():
     with tab3:
         st.subheader("Update Player")
 
-        df_all = fetch_players("")
-        if df_all.empty:
-            st.warning("No players available to update.")
+        if st.toggle("🧮 Batch edit in grid", help="Edit, add and delete many players, then save once"):
+            render_grid_editor(get_player_store())
         else:
-            options = df_all.to_dict("records")
-            selected = st.selectbox(
-                "Select player",
-                options,
-                format_func=lambda x: f"{x['player_id']} - {x['name']}"
-            )
+            selected = player_picker("Select player", key="update")
+            if selected is not None:
+                with st.form("update_player_form"):
+                    name = st.text_input("Name", value=selected["name"] or "")
+                    country = st.text_input("Country", value=selected["country"] or "")
+                    role = st.text_input("Role", value=selected["role"] or "")
+                    batting_style = st.text_input("Batting Style", value=selected["batting_style"] or "")
+                    bowling_style = st.text_input("Bowling Style", value=selected["bowling_style"] or "")
 
-            with st.form("update_player_form"):
-                name = st.text_input("Name", value=selected["name"] or "")
-                country = st.text_input("Country", value=selected["country"] or "")
-                role = st.text_input("Role", value=selected["role"] or "")
-                batting_style = st.text_input("Batting Style", value=selected["batting_style"] or "")
-                bowling_style = st.text_input("Bowling Style", value=selected["bowling_style"] or "")
+                    updated = st.form_submit_button("Update Player")
 
-                updated = st.form_submit_button("Update Player")
-
-            if updated:
-                try:
-                    update_player(int(selected["player_id"]), name.strip(), country.strip(), role.strip(), batting_style.strip(), bowling_style.strip())
-                    st.toast(f"✅ Player '{name}' updated successfully!", icon="✅")
-                    st.success("✅ Player updated successfully!")
-                    st.rerun()
-                except Exception as e:
-                    st.toast(f"❌ Update failed: {e}", icon="❌")
-                    st.error(f"❌ Update failed: {e}")
+                if updated:
+                    try:
+                        update_player(int(selected["player_id"]), name.strip(), country.strip(), role.strip(), batting_style.strip(), bowling_style.strip())
+                        st.toast(f"✅ Player '{name}' updated successfully!", icon="✅")
+                        st.success("✅ Player updated successfully!")
+                        st.rerun()
+                    except Exception as e:
+                        st.toast(f"❌ Update failed: {e}", icon="❌")
+                        st.error(f"❌ Update failed: {e}")
 
     # ---------------- DELETE ----------------
     with tab4:
         st.subheader("Delete Player")
 
-        df_all = fetch_players("")
-        if df_all.empty:
-            st.warning("No players available to delete.")
-        else:
-            options = df_all.to_dict("records")
-            selected = st.selectbox(
-                "Select player to delete",
-                options,
-                format_func=lambda x: f"{x['player_id']} - {x['name']}",
-                key="delete_select"
-            )
-
+        selected = player_picker("Select player to delete", key="delete")
+        if selected is not None:
             st.error("⚠️ This action cannot be undone.")
             confirm = st.checkbox("I confirm I want to delete this player")
 
@@ -121,3 +276,48 @@ def render():
                     except Exception as e:
                         st.toast(f"❌ Delete failed: {e}", icon="❌")
                         st.error(f"❌ Delete failed: {e}")
+
+    # ---------------- BULK IMPORT / EXPORT ----------------
+    with tab5:
+        st.subheader("Bulk Import Players")
+        st.caption("CSV with a header row, or JSON Lines. Columns: player_id (optional), name, "
+                   "country, role, batting_style, bowling_style. Existing IDs are updated.")
+
+        uploaded = st.file_uploader("Roster file", type=["csv", "jsonl", "json"])
+        if uploaded is not None and st.button("📥 Import Players", type="primary"):
+            fmt = "csv" if uploaded.name.lower().endswith(".csv") else "jsonl"
+            total_bytes = uploaded.size or 1
+            progress_bar = st.progress(0)
+            status = st.empty()
+
+            def on_progress(rows_read, rows_imported):
+                progress_bar.progress(min(uploaded.tell() / total_bytes, 1.0))
+                status.caption(f"Read {rows_read} rows, imported {rows_imported}")
+
+            try:
+                stream = io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline="")
+                result = import_players(stream, fmt=fmt, progress=on_progress)
+                st.toast(f"✅ Imported {result['imported']} players", icon="✅")
+                st.success(f"✅ Imported {result['imported']} players, {result['failed']} rows rejected")
+                if result["errors"]:
+                    with st.expander(f"⚠️ Rejected rows ({result['failed']})"):
+                        st.dataframe(
+                            [{"Line": line, "Error": msg} for line, msg in result["errors"]],
+                            use_container_width=True
+                        )
+            except Exception as e:
+                st.toast(f"❌ Import failed: {e}", icon="❌")
+                st.error(f"❌ Import failed: {e}")
+
+        st.divider()
+        st.subheader("Export Players")
+        export_fmt = st.radio("Format", ["csv", "jsonl"], horizontal=True)
+        if st.button("📤 Prepare Export"):
+            # Spooled to a temp file; never joined into one string here
+            with spool_export(export_fmt) as export_file:
+                st.download_button(
+                    label=f"📥 Download players.{export_fmt}",
+                    data=export_file,
+                    file_name=f"players.{export_fmt}",
+                    mime="text/csv" if export_fmt == "csv" else "application/x-ndjson"
+                )
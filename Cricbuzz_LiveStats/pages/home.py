@@ -2,6 +2,7 @@
 Home page for Cricbuzz LiveStats
 """
 import streamlit as st
+from datetime import datetime
 from utils.db_sync import get_sync_stats
 
 
@@ -42,6 +43,13 @@ def render():
                 value=stats['scorecards'],
                 help="Total innings recorded"
             )
+        
+        last_sync = stats.get('last_sync_at')
+        last_sync_text = datetime.fromtimestamp(last_sync).strftime('%Y-%m-%d %H:%M') if last_sync else "never"
+        st.caption(
+            f"🔴 {stats.get('live_matches', 0)} live matches | 🔄 Last sync: {last_sync_text} | "
+            f"💽 {stats['db_pages']} pages ({stats['db_size_kb']:.0f} KB)"
+        )
     except:
         st.info("Database statistics unavailable")
     
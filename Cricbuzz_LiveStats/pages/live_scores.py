@@ -1,10 +1,187 @@
 """
 Live Scores page for Cricbuzz LiveStats
 """
+import time
 import streamlit as st
-from utils.api_client import  fetch_live_scores, fetch_scorecard, build_match_options
 from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
-from utils.db_sync import save_match, save_scorecard, get_sync_stats, bulk_sync_matches, bulk_sync_scorecards
+from utils.db_sync import save_match, get_sync_stats, bulk_sync_matches
+from utils.stream_ingest import ingest_scorecard
+from utils.live_feed import LiveFeed
+from utils.models import Innings
+from typing import List
+
+REFRESH_INTERVALS = [10, 15, 30, 60]
+
+
+@st.cache_resource
+def get_live_feed() -> LiveFeed:
+    """One background poller per process; every session reads its snapshots"""
+    return LiveFeed({
+        "X-RapidAPI-Key": RAPID_API_KEY,
+        "X-RapidAPI-Host": RAPID_API_HOST
+    })
+
+
+def render_score_summary(innings_list: List[Innings]):
+    """Current score table, one column per batting team"""
+    st.subheader("📊 Current Score ")
+    score_data_dict = {}
+
+    for inn in innings_list:
+        score_data_dict[inn.bat_team or "Team"] = {
+            "Runs": inn.runs,
+            "Wickets": inn.wickets,
+            "Overs": inn.overs,
+            "Run Rate": inn.runrate
+        }
+
+    if score_data_dict:
+        import pandas as pd
+        df = pd.DataFrame(score_data_dict)
+        st.dataframe(df, use_container_width=True)
+
+
+def render_full_scorecard(innings_list: List[Innings]):
+    """Innings-by-innings extras, batsmen and bowlers"""
+    st.divider()
+
+    # Loop through all innings
+    for inn in innings_list:
+        team = inn.bat_team or "Team"
+
+        st.markdown(f"### 🏏 {inn.innings_id}st Innings - {team}")
+        st.write(f"**{team}** — {inn.runs}/{inn.wickets} ({inn.overs} ov)  |  Run Rate: {inn.runrate}")
+
+        # Extras
+        byes, legbyes, wides, noballs, penalty, extras_total = inn.extras
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.write("📊 **Extras & Total:**")
+
+            st.write("Byes:", byes)
+            st.write("Leg Byes:", legbyes)
+            st.write("Wides:", wides)
+            st.write("No Balls:", noballs)
+            st.write("Penalty:", penalty)
+
+        with col2:
+            st.metric("Total Extras", extras_total)
+            st.metric("Total Score", inn.runs)
+
+
+        # Batsmen table
+        st.markdown("##### 🧍 Batsmen")
+        if inn.batters:
+            bat_rows = [{
+                "Name": b.name,
+                "Runs": b.runs,
+                "Balls": b.balls,
+                "4s": b.fours,
+                "6s": b.sixes,
+                "SR": b.strike_rate,
+                "Status": b.dismissal
+            } for b in inn.batters]
+            st.dataframe(bat_rows, use_container_width=True)
+        else:
+            st.info("No batsmen data found.")
+
+        # Bowlers table
+        st.markdown("##### 🎯 Bowlers")
+        if inn.bowlers:
+            bowl_rows = [{
+                "Name": bw.name,
+                "Overs": bw.overs,
+                "Maidens": bw.maidens,
+                "Runs": bw.runs,
+                "Wickets": bw.wickets,
+                "Economy": bw.economy
+            } for bw in inn.bowlers]
+            st.dataframe(bowl_rows, use_container_width=True)
+        else:
+            st.info("No bowlers data found.")
+
+        st.divider()
+
+
+def live_score_section(match_id: int):
+    """
+    Score summary for one match
+
+    Wrapped in st.fragment by render(), so auto-refresh reruns only this
+    section and never the match list, selectors or sync controls.
+
+    Args:
+        match_id: Match ID from Cricbuzz API
+    """
+    snap = get_live_feed().scorecard(match_id)
+    if snap is None:
+        st.info("⏳ Waiting for the first scorecard poll...")
+        return
+
+    if snap.innings:
+        render_score_summary(snap.innings)
+    st.caption(f"Feed v{snap.version} · updated {time.time() - snap.fetched_at:.0f}s ago")
+
+
+def live_scorecard_section(match_id: int):
+    """
+    Detailed scorecard for one match; refreshed like live_score_section()
+
+    Args:
+        match_id: Match ID from Cricbuzz API
+    """
+    snap = get_live_feed().scorecard(match_id)
+    if snap is None:
+        st.info("⏳ Waiting for the first scorecard poll...")
+        return
+
+    if snap.innings is None:
+        st.error("Could not fetch scorecard from any endpoint.")
+        st.write("Last error:", snap.error)
+        return
+
+    if not snap.innings:
+        st.warning("No innings found in scorecard response.")
+        return
+
+    render_full_scorecard(snap.innings)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_overs(match_id: int, cursor: int):
+    """Per-over totals; the commentary cursor (newest stored ball) invalidates it"""
+    from utils.commentary import over_aggregates
+    return over_aggregates(match_id)
+
+
+def live_overs_section(match_id: int):
+    """
+    Over-by-over runs and wickets from ingested ball-by-ball commentary
+
+    Args:
+        match_id: Match ID from Cricbuzz API
+    """
+    snap = get_live_feed().commentary(match_id)
+    if snap is None:
+        st.info("⏳ Waiting for the first commentary poll...")
+        return
+    if snap.cursor is None:
+        st.info("No balls bowled yet." if snap.error is None else f"Commentary unavailable: {snap.error}")
+        return
+
+    overs = cached_overs(match_id, snap.cursor)
+    if overs.empty:
+        st.info("No balls stored for this match yet.")
+        return
+    innings = sorted(overs["innings"].unique())
+    current = overs[overs["innings"] == innings[-1]]
+    last = current.iloc[-1]
+    st.caption(f"Innings {innings[-1]}: {last.total_runs}/{last.total_wickets} after "
+               f"{len(current)} over(s) · feed v{snap.version}")
+    st.bar_chart(current.set_index("over_no")[["runs", "wickets"]])
+    with st.expander("Per-over table"):
+        st.dataframe(overs, use_container_width=True, hide_index=True)
 
 
 def render():
@@ -16,7 +193,7 @@ def render():
     with col1:
         try:
             stats = get_sync_stats()
-            st.caption(f"💾 Database: {stats['matches']} matches | {stats['scorecards']} scorecards | {stats['players']} players")
+            st.caption(f"💾 Database: {stats['matches']} matches | {stats['scorecards']} scorecards | {stats['players']} players | 🔴 {stats.get('live_matches', 0)} live at last sync")
         except:
             pass
     
@@ -30,29 +207,22 @@ def render():
         "X-RapidAPI-Host": RAPID_API_HOST
     }
 
-    # Fetch live Scores
-    data = fetch_live_scores(headers)
-    
-    if data is None:
-        st.error("Failed to fetch live match data")
+    # Live list comes from the shared feed; only its poller calls the API
+    feed = get_live_feed()
+    live = feed.live()
+
+    if live.matches is None:
+        st.error(live.error or "Failed to fetch live match data")
         st.stop()
 
     # st.success("Live match data fetched successfully!")
     # st.caption("Data source: Cricbuzz API via RapidAPI")
 
-    # with st.expander("🔍 Debug: Show Raw JSON"):
-    #     st.json(data)
-
-    type_matches = data.get("typeMatches", [])
-    if not type_matches:
-        st.warning("No live scores available right now (typeMatches empty).")
-        st.stop()
-
-    # Build match options
-    match_options = build_match_options(data)
+    # Matches are parsed once per poll by the feed and shared by every session
+    match_options = live.matches
 
     if not match_options:
-        st.warning("Matches found, but could not extract matchId. Check Debug JSON.")
+        st.warning("No live scores available right now.")
         st.stop()
     
     # Bulk sync if button clicked
@@ -62,19 +232,13 @@ def render():
                 # Save all matches
                 match_count = bulk_sync_matches(match_options)
                 
-                # Fetch and save scorecards for all matches
-                scorecards_data = []
+                # Stream each scorecard straight into batched DB writes
+                scorecard_count = 0
                 progress_bar = st.progress(0)
-                for idx, match_opt in enumerate(match_options):
-                    match_id = match_opt.get("match_id")
-                    if match_id:
-                        url, result = fetch_scorecard(match_id, headers)
-                        if url:
-                            scorecards_data.append((match_id, result))
+                for idx, match in enumerate(match_options):
+                    scorecard_count += ingest_scorecard(match.match_id, headers) or 0
                     progress_bar.progress((idx + 1) / len(match_options))
                 
-                scorecard_count = bulk_sync_scorecards(scorecards_data)
-                
                 st.success(f"✓ Synced {match_count} matches and {scorecard_count} innings!")
                 st.session_state.bulk_sync_triggered = False
                 st.rerun()
@@ -86,10 +250,10 @@ def render():
     selected = st.selectbox(
         "🎯 Select a match",
         options=match_options,
-        format_func=lambda x: x["label"]
+        format_func=lambda m: m.label
     )
 
-    info = selected["matchInfo"]
+    info = selected
     
     # Auto-sync: Save match to database
     try:
@@ -98,61 +262,36 @@ def render():
         pass  # Silent fail to not disrupt UI
 
     # Show match details with team names as subheader
-    team1 = info.get("team1", {}).get("teamName", "Team 1")
-    team2 = info.get("team2", {}).get("teamName", "Team 2")
-    st.subheader(f"🏏 {team1} vs {team2}")
+    st.subheader(f"🏏 {info.team1 or 'Team 1'} vs {info.team2 or 'Team 2'}")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.write("🏆 Series:", info.get("seriesName"))
-        st.write("🎯 Match:", info.get("matchDesc"))
-        st.write("📋 Format:", info.get("matchFormat"))
+        st.write("🏆 Series:", info.series_name)
+        st.write("🎯 Match:", info.match_desc)
+        st.write("📋 Format:", info.match_format)
     
     with col2:
-        venue = info.get("venueInfo", {})
-        st.write("🏟️ Venue:", venue.get("ground"))
-        st.write("🌆 City:", venue.get("city"))
-        st.write("🔴 Status:", info.get("status"))
-        st.write("📍 State:", info.get("state"))
-
-    # Fetch scorecard data to show current score
-    match_id = selected["match_id"]
-    url, result = fetch_scorecard(match_id, headers)
-    
-    if url is not None:
-        score_data = result
-        
-        # Auto-sync: Save scorecard to database
-        try:
-            save_scorecard(match_id, score_data)
-        except Exception as e:
-            pass  # Silent fail to not disrupt UI
-        innings_list = score_data.get("scorecard", [])
-        
-        if innings_list:
-            # Display Current Score Summary
-            st.subheader("📊 Current Score ")
-            score_data_dict = {}
-            
-            for inn in innings_list:
-                team = inn.get("batteamname", "Team")
-                score = inn.get("score")
-                wkts = inn.get("wickets")
-                overs = inn.get("overs")
-                rr = inn.get("runrate")
-                
-                score_data_dict[team] = {
-                    "Runs": score,
-                    "Wickets": wkts,
-                    "Overs": overs,
-                    "Run Rate": rr
-                }
-            
-            if score_data_dict:
-                import pandas as pd
-                df = pd.DataFrame(score_data_dict)
-                st.dataframe(df, use_container_width=True)
+        st.write("🏟️ Venue:", info.venue_ground)
+        st.write("🌆 City:", info.venue_city)
+        st.write("🔴 Status:", info.status)
+        st.write("📍 State:", info.state)
+
+    # Auto-refresh reruns only the fragment below, on a timer, from the shared cache
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        auto_refresh = st.toggle("🔄 Auto-refresh", help="Update the score and scorecard without reloading the page")
+    with col2:
+        interval = st.select_slider("Every (seconds)", REFRESH_INTERVALS, value=15, disabled=not auto_refresh)
+
+    run_every = f"{interval}s" if auto_refresh else None
+    match_id = selected.match_id
+
+    st.fragment(live_score_section, run_every=run_every)(match_id)
+
+    # Ball-by-ball: the feed ingests only balls newer than the stored cursor
+    if st.toggle("🎙️ Over by over", help="Ingest ball-by-ball commentary and chart each over"):
+        st.fragment(live_overs_section, run_every=run_every)(match_id)
 
     # Fetch and display scorecard
     st.subheader("📌 Detailed Scorecard")
@@ -162,90 +301,4 @@ def render():
 
     # Only fetch scorecard if button is clicked
     if st.session_state.get("scorecard_loaded", False):
-        match_id = selected["match_id"]
-        url, result = fetch_scorecard(match_id, headers)
-        
-        if url is None:
-            st.error("Could not fetch scorecard from any endpoint.")
-            st.write("Last error:", result)
-            st.stop()
-        
-        score_data = result
-        show_debug = False
-
-        innings_list = score_data.get("scorecard", [])
-        if not innings_list:
-            st.warning("No innings found in scorecard response.")
-            if show_debug:
-                st.json(score_data)
-            st.stop()
-
-        st.divider()
-
-        # Loop through all innings
-        for innings_idx, inn in enumerate(innings_list, 1):
-            team = inn.get("batteamname", "Team")
-            score = inn.get("score")
-            wkts = inn.get("wickets")
-            overs = inn.get("overs")
-            rr = inn.get("runrate")
-
-            st.markdown(f"### 🏏 {innings_idx}st Innings - {team}")
-            st.write(f"**{team}** — {score}/{wkts} ({overs} ov)  |  Run Rate: {rr}")
-
-            # Extras
-            extras = inn.get("extras", {})
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.write("📊 **Extras & Total:**")
-                
-                st.write("Byes:", extras.get("byes", 0))
-                st.write("Leg Byes:", extras.get("legbyes", 0))
-                st.write("Wides:", extras.get("wides", 0))
-                st.write("No Balls:", extras.get("noballs", 0))
-                st.write("Penalty:", extras.get("penalty", 0))
-
-            with col2:
-                st.metric("Total Extras", extras.get("total", 0))
-                st.metric("Total Score", score)
-            
-
-            # Batsmen table
-            st.markdown("##### 🧍 Batsmen")
-            batsmen = inn.get("batsman", [])
-            if batsmen:
-                bat_rows = []
-                for b in batsmen:
-                    bat_rows.append({
-                        "Name": b.get("name"),
-                        "Runs": b.get("runs"),
-                        "Balls": b.get("balls"),
-                        "4s": b.get("fours"),
-                        "6s": b.get("sixes"),
-                        "SR": b.get("strkrate"),
-                        "Status": b.get("outdec")
-                    })
-                st.dataframe(bat_rows, use_container_width=True)
-            else:
-                st.info("No batsmen data found.")
-
-            # Bowlers table
-            st.markdown("##### 🎯 Bowlers")
-            bowlers = inn.get("bowler", [])
-            if bowlers:
-                bowl_rows = []
-                for bw in bowlers:
-                    bowl_rows.append({
-                        "Name": bw.get("name"),
-                        "Overs": bw.get("overs"),
-                        "Maidens": bw.get("maidens"),
-                        "Runs": bw.get("runs"),
-                        "Wickets": bw.get("wickets"),
-                        "Economy": bw.get("economy")
-                    })
-                st.dataframe(bowl_rows, use_container_width=True)
-            else:
-                st.info("No bowlers data found.")
-            
-            st.divider()
+        st.fragment(live_scorecard_section, run_every=run_every)(match_id)
@@ -1,14 +1,15 @@
 """
 Player Stats page for Cricbuzz LiveStats
 """
+import time
 import streamlit as st
-import pandas as pd
 from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
 from utils.api_client import search_players as api_search_players
-from utils.api_client import get_player_info as api_get_player_info
-from utils.api_client import get_player_batting as api_get_player_batting
-from utils.api_client import get_player_bowling as api_get_player_bowling
-from utils.db_sync import save_player, get_sync_stats, bulk_import_top_players
+from utils.api_client import get_player_info, submit_player_request
+from utils.career_stats import BATTING, BOWLING, ensure_career_stats, get_career_stats
+from utils.change_log import table_version
+from utils.player_search import PREFIX_SCORE, PlayerNameIndex
+from utils.db_sync import save_player, get_sync_stats
 
 HEADERS = {
     "x-rapidapi-key": RAPID_API_KEY,
@@ -21,22 +22,194 @@ def search_players(query: str):
     return api_search_players(query, HEADERS)
 
 
-@st.cache_data(ttl=300)
-def get_player_info(player_id: int):
-    """Cached fetch of player information"""
-    return api_get_player_info(player_id, HEADERS)
+# Seconds to wait for one player request before showing an error
+PLAYER_FETCH_TIMEOUT = 30
 
 
-@st.cache_data(ttl=300)
-def get_player_batting(player_id: int):
-    """Cached fetch of player batting statistics"""
-    return api_get_player_batting(player_id, HEADERS)
+def _save_profile(future):
+    """Auto-sync a fetched profile to the database, once per fetch"""
+    try:
+        status, info = future.result()
+        if status == 200:
+            save_player(info)
+    except Exception:
+        pass  # Silent fail to not disrupt UI
 
 
-@st.cache_data(ttl=300)
-def get_player_bowling(player_id: int):
-    """Cached fetch of player bowling statistics"""
-    return api_get_player_bowling(player_id, HEADERS)
+@st.cache_resource(ttl=300, max_entries=64, show_spinner=False)
+def player_requests(player_id: int):
+    """
+    Profile, batting and bowling requests for a player, started together and shared across reruns
+
+    Career stats are served from the local tables and only refetched once
+    older than career_stats.CAREER_STATS_TTL.
+    """
+    futures = {
+        "info": submit_player_request(get_player_info, player_id, HEADERS),
+        BATTING: submit_player_request(get_career_stats, player_id, BATTING, HEADERS),
+        BOWLING: submit_player_request(get_career_stats, player_id, BOWLING, HEADERS),
+    }
+    futures["info"].add_done_callback(_save_profile)
+    return futures
+
+
+def player_result(player_id: int, kind: str):
+    """
+    Wait for one of a player's requests
+
+    Args:
+        player_id: Player ID
+        kind: "info", "batting" or "bowling"
+
+    Returns:
+        tuple: (status_code, data or error text)
+    """
+    future = player_requests(player_id)[kind]
+    try:
+        return future.result(timeout=PLAYER_FETCH_TIMEOUT)
+    except Exception as e:
+        # Drop only this player's failed requests so the next rerun retries them;
+        # a request still running stays cached and the next rerun picks it up
+        if future.done():
+            player_requests.clear(player_id)
+        return None, f"{type(e).__name__}: {e}"
+
+
+@st.cache_resource
+def get_name_index() -> PlayerNameIndex:
+    """Process-wide index of stored player names"""
+    return PlayerNameIndex()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def player_labels(player_ids: tuple, data_version: int):
+    """Names of some players; data_version (players/career change seq) invalidates them"""
+    from utils.player_compare import player_labels as load_player_labels
+    return load_player_labels(player_ids)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_comparison(player_ids: tuple, names: tuple, data_version: int):
+    """Comparison arrays for a player selection; recomputed after any career stats refresh"""
+    from utils.player_compare import compare_players
+    return compare_players(player_ids, names)
+
+
+def render_comparison():
+    """Render the multi-player comparison mode"""
+    from utils.player_compare import comparison_frame
+
+    # Players are added one at a time from the name index, so the browser
+    # only ever receives the search matches and the current selection
+    chosen = st.session_state.setdefault("compare_ids", [])
+    query = st.text_input("Add a player", key="compare_query", placeholder="Type a stored player's name")
+    matches = [m for m in get_name_index().search(query, limit=20) if m.player_id not in chosen] \
+        if len(query.strip()) >= 2 else []
+    if matches:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            pick = st.selectbox("Matching players", matches, key="compare_pick",
+                                format_func=lambda m: f"{m.name}{' - ' + m.country if m.country else ''}")
+        with col2:
+            if st.button("➕ Add", key="compare_add"):
+                chosen.append(int(pick.player_id))
+                st.rerun()
+    elif query.strip():
+        st.caption("No stored player matches that name.")
+
+    options = player_labels(tuple(chosen), table_version("players", "career_fetches"))
+    labels = {
+        int(row.player_id): f"{row.name}{' - ' + row.country if isinstance(row.country, str) else ''}"
+                            f"{'' if row.has_stats else ' (stats not fetched)'}"
+        for row in options.itertuples(index=False)
+    }
+    selected = st.multiselect("Players to compare", chosen, default=chosen, format_func=labels.get,
+                              placeholder="Add two or more players")
+    if selected != chosen:
+        st.session_state["compare_ids"] = selected
+        st.rerun()
+    if len(selected) < 2:
+        st.info("Pick at least two players. Stats already in the database are compared without API calls.")
+        return
+
+    # Only missing or stale players hit the API, all at once
+    with st.spinner("Loading career stats..."):
+        errors = ensure_career_stats(selected, HEADERS)
+    if errors:
+        st.warning(f"Could not refresh {len(errors)} stat set(s); showing what is stored.")
+
+    names = dict(zip(options["player_id"].astype(int), options["name"]))
+    comparison = cached_comparison(tuple(selected), tuple(names[p] for p in selected), table_version("career_fetches"))
+    if not comparison.formats:
+        st.warning("No career stats stored for these players yet.")
+        return
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        format_name = st.radio("Format", comparison.formats, horizontal=True, key="compare_format")
+    with col2:
+        show_ranks = st.toggle("Show ranks", key="compare_ranks")
+
+    frame = comparison_frame(comparison, format_name, ranks=show_ranks)
+    st.markdown("#### 🏅 Batting / bowling score (average percentile, 100 = best)")
+    st.bar_chart(frame[["Batting score", "Bowling score"]])
+    st.markdown("#### 📈 " + ("Ranks (1 = best)" if show_ranks else "Statistics"))
+    st.dataframe(frame.round(2), use_container_width=True)
+
+
+def search_online(query: str):
+    """
+    Search the Cricbuzz API and build player options (stops the page on failure)
+
+    Args:
+        query: Player name
+
+    Returns:
+        list: {"label", "id"} per player found
+    """
+    with st.spinner("Searching players..."):
+        status, results = search_players(query)
+
+    if status != 200:
+        st.error("Player search failed")
+        st.write(results)
+        st.stop()
+
+    # --- IMPORTANT ---
+    # Your search response structure may differ.
+    # We'll try to extract a list of players safely.
+    players = None
+    if isinstance(results, dict):
+        # common possibilities
+        players = results.get("player") or results.get("players") or results.get("data") or results.get("result")
+    if players is None and isinstance(results, list):
+        players = results
+
+    if not players:
+        st.warning(f"❌ No players found for '{query}'")
+        st.info("💡 **Suggestions:**\n- Try searching with the full name (e.g., 'Virat Kohli' instead of 'Virat')\n- Popular players: Virat Kohli, Rohit Sharma, Jasprit Bumrah, AB de Villiers")
+        with st.expander("Debug search response"):
+            st.json(results)
+        st.stop()
+
+    # Build dropdown options
+    options = []
+    for p in players:
+        if not isinstance(p, dict):
+            continue
+        pid = p.get("id") or p.get("playerId")
+        name = p.get("name") or p.get("fullName") or p.get("playerName") or "Unknown"
+        team = p.get("teamName") or p.get("country") or ""
+        if pid:
+            options.append({"label": f"{name} {('- ' + team) if team else ''}", "id": int(pid)})
+
+    if not options:
+        st.warning("Players found but could not detect playerId fields. Open debug.")
+        with st.expander("Debug search response"):
+            st.json(results)
+        st.stop()
+
+    return options
 
 
 def render():
@@ -44,24 +217,21 @@ def render():
     st.title("🎯 Cricket Player Statistics")
     # st.caption("Search players and view profile + detailed batting & bowling stats (RapidAPI)")
     
-    # Show DB sync status with bulk import button
-    col1, col2 = st.columns([3, 1])
-    with col1:
-        try:
-            stats = get_sync_stats()
-            st.caption(f"💾 Database: {stats['players']} players synced")
-        except:
-            pass
-    
-    with col2:
-        if st.button("📥 Import Indian Players", help="Import Indian cricket team players from API"):
-            with st.spinner("Importing players from API..."):
-                try:
-                    count = bulk_import_top_players(team_id=2, headers=HEADERS)
-                    st.success(f"✓ Imported {count} players!")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Import failed: {e}")
+    # Show DB sync status
+    try:
+        stats = get_sync_stats()
+        st.caption(f"💾 Database: {stats['players']} players synced")
+    except:
+        pass
+
+    with st.expander("📥 Import Team Rosters"):
+        render_roster_import()
+
+    mode = st.radio("Mode", ["🔍 Single player", "⚖️ Compare players"], horizontal=True,
+                    key="player_mode", label_visibility="collapsed")
+    if mode == "⚖️ Compare players":
+        render_comparison()
+        return
 
     query = st.text_input("Search player by name", placeholder="e.g., Virat Kohli")
 
@@ -70,255 +240,247 @@ def render():
         st.stop()
 
     if query:
-        with st.spinner("Searching players..."):
-            status, results = search_players(query.strip())
-
-        if status != 200:
-            st.error("Player search failed")
-            st.write(results)
-            st.stop()
-
-        # --- IMPORTANT ---
-        # Your search response structure may differ.
-        # We'll try to extract a list of players safely.
-        players = None
-        if isinstance(results, dict):
-            # common possibilities
-            players = results.get("player") or results.get("players") or results.get("data") or results.get("result")
-        if players is None and isinstance(results, list):
-            players = results
-
-        if not players:
-            st.warning(f"❌ No players found for '{query}'")
-            st.info("💡 **Suggestions:**\n- Try searching with the full name (e.g., 'Virat Kohli' instead of 'Virat')\n- Popular players: Virat Kohli, Rohit Sharma, Jasprit Bumrah, AB de Villiers")
-            with st.expander("Debug search response"):
-                st.json(results)
-            st.stop()
-
-        # Build dropdown options
-        options = []
-        for p in players:
-            if not isinstance(p, dict):
-                continue
-            pid = p.get("id") or p.get("playerId")
-            name = p.get("name") or p.get("fullName") or p.get("playerName") or "Unknown"
-            team = p.get("teamName") or p.get("country") or ""
-            if pid:
-                options.append({"label": f"{name} {('- ' + team) if team else ''}", "id": int(pid)})
-
-        if not options:
-            st.warning("Players found but could not detect playerId fields. Open debug.")
-            with st.expander("Debug search response"):
-                st.json(results)
-            st.stop()
+        query = query.strip()
+        options = None
+        # Stored players answer the search without using API quota; fuzzy-only
+        # (trigram) matches count as a miss, so unstored players are found online
+        if st.session_state.get("search_online_for") != query:
+            matches = get_name_index().search(query)
+            if matches and matches[0].score >= PREFIX_SCORE:
+                options = [{"label": f"{m.name} {('- ' + m.country) if m.country else ''}", "id": m.player_id}
+                           for m in matches]
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.caption(f"💾 {len(matches)} match(es) from the local database")
+                with col2:
+                    if st.button("🌐 Search online", help="Query the Cricbuzz API instead"):
+                        st.session_state["search_online_for"] = query
+                        st.rerun()
+        if options is None:
+            options = search_online(query)
 
         selected = st.selectbox("Select player", options, format_func=lambda x: x["label"])
         player_id = selected["id"]
 
-        # Create three tabs for Profile, Batting, and Bowling
-        tab1, tab2, tab3 = st.tabs(["👤 Profile", "🏏 Batting", "🎯 Bowling"])
-
-        # Tab 1: Profile
-        with tab1:
-            with st.spinner("Loading profile..."):
-                s1, info = get_player_info(player_id)
-
-            if s1 != 200:
-                st.error("Failed to load player profile")
-                st.write(info)
-            else:
-                # Auto-sync: Save player to database
-                try:
-                    save_player(info)
-                except Exception as e:
-                    pass  # Silent fail to not disrupt UI
-                # Profile Header with Image and Nickname
-                if isinstance(info, dict):
-                    profile_col1, profile_col2 = st.columns([1, 3])
-                    
-                    with profile_col1:
-                        # Display player image if available
-                        image_url =  info.get('image') 
-                        if image_url:
-                            st.image(image_url, width=150)
-                        else:
-                            st.markdown("📸 No Image")
-                    
-                    with profile_col2:
-                        # Display player name and nickname
-                        player_name = info.get('name')  or 'Unknown'
-                        player_nickname = info.get('nickName')  or ''
-                        
-                        st.markdown(f"# {player_name}")
-                        if player_nickname:
-                            st.markdown(f"*Nickname: **{player_nickname}***")
-                
-                st.divider()
-                st.subheader("👤 Personal Information")
-                # Display common fields safely
-                if isinstance(info, dict):
-                    # Create three columns for different sections
-                    col1, col2, col3 = st.columns(3)
-                    
-                    # Column 1: Cricket Details
-                    with col1:
-                        st.markdown("**🏏 Cricket Details**")
-                        st.write(f"**Role:** {info.get('role') or info.get('playingRole') or '—'}")
-                        st.write(f"**Batting Style:** {info.get('bat') or '—'}")
-                        st.write(f"**Bowling Style:** {info.get('bowl') or '—'}")
-                        st.write(f"**International Team:** {info.get('intlTeam') or '—'}")
-
-                    
-                    # Column 2: Personal Details
-                    with col2:
-                        st.markdown("**👤 Personal Details**")
-                        st.write(f"**DOB:** {info.get('DoB') or info.get('dob') or '—'}")
-
-                        st.write(f"**Birthplace:** {info.get('birthPlace') or info.get('country') or '—'}")
-                        st.write(f"**Height:** {info.get('height') or '—'}")
-                    
-                    # Column 3: Teams Played For
-                    with col3:
-                        st.markdown("**⚽ Teams Played For**")
-                        teams = info.get('teams') or info.get('teamsList') or []
-                        if isinstance(teams, list):
-                            for team in teams:
-                                if isinstance(team, dict):
-                                    st.write(f"• {team.get('name') or team.get('teamName') or '—'}")
-                                else:
-                                    st.write(f"• {team}")
-                        elif isinstance(teams, str):
-                            # If teams is a comma-separated string, split and display as list
-                            team_list = [t.strip() for t in teams.split(',')]
-                            for team in team_list:
-                                st.write(f"• {team}")
-                        else:
-                            st.write(f"**Current Team:** {teams or '—'}")
-                
-                # Display Full Profile Link
-                # Check for webURL in appIndex first (nested structure)
-                app_index = info.get('appIndex') or {}
-                profile_url = app_index.get('webURL') or info.get('webURL')
-                
-                if profile_url:
-                    st.markdown("---")
-                    st.markdown(f"[🔗 View Full Profile on Cricbuzz]({profile_url})")
-                
-                with st.expander("Debug profile JSON"):
-                    st.json(info)
-
-        # Tab 2: Batting Stats
-        with tab2:
-            with st.spinner("Loading batting stats..."):
-                s2, bat = get_player_batting(player_id)
-
-            if s2 != 200:
-                st.error("Failed to load batting stats")
-                st.write(bat)
-            else:
-                st.subheader("🏏 Batting Statistics")
-                
-                if isinstance(bat, dict):
-                    # Extract headers and values
-                    headers = bat.get('headers', [])
-                    values = bat.get('values', [])
-                    
-                    if headers and values:
-                        # Build DataFrame from the data
-                        df_data = {}
-                        for row in values:
-                            row_values = row.get('values', [])
-                            if row_values:
-                                stat_name = row_values[0]  # First element is the stat name (ROWHEADER)
-                                df_data[stat_name] = row_values[1:]  # Rest are the values for each format
-                        
-                        # Display overview for all formats
-                        st.markdown("#### 📊 Overview ")
-                        
-                        for idx, format_name in enumerate(headers[1:]):
-                            col1, col2, col3, col4 = st.columns(4)
-                            
-                            matches = df_data.get('Matches', ['—'])[idx] if idx < len(df_data.get('Matches', [])) else '—'
-                            runs = df_data.get('Runs', ['—'])[idx] if idx < len(df_data.get('Runs', [])) else '—'
-                            avg = df_data.get('Average', ['—'])[idx] if idx < len(df_data.get('Average', [])) else '—'
-                            sr = df_data.get('SR', ['—'])[idx] if idx < len(df_data.get('SR', [])) else '—'
-                            
-                            with col1:
-                                st.metric(f"Matches ({format_name})", matches)
-                            with col2:
-                                st.metric(f"Runs ({format_name})", runs)
-                            with col3:
-                                st.metric(f"Avg ({format_name})", avg)
-                            with col4:
-                                st.metric(f"SR ({format_name})", sr)
-                        
-                        st.divider()
-                        
-                        # Create DataFrame
-                        df = pd.DataFrame(df_data, index=headers[1:]).T
-                        df.index.name = "Statistics"
-                        
-                        st.markdown("#### 📈 Detailed Statistics")
-                        st.dataframe(df, use_container_width=True)
-                    else:
-                        st.json(bat)
+        # Only the selected view renders; all three requests are already in
+        # flight, so switching views usually finds the data waiting
+        view = st.radio("View", list(PLAYER_VIEWS), horizontal=True, key="player_view",
+                        label_visibility="collapsed")
+        PLAYER_VIEWS[view](player_id)
+
+
+def render_roster_import():
+    """Import the rosters of several teams at once, with a result per team"""
+    from utils.roster_import import discover_teams, import_rosters, stored_teams
+
+    teams = stored_teams()
+    if not teams:
+        st.caption("No teams stored yet - load the international team list first.")
+    labels = {
+        t["team_id"]: (t["name"] or f"Team {t['team_id']}")
+                      + (f" ({t['roster_size']} players)" if t["roster_size"] else "")
+        for t in teams
+    }
+    selected = st.multiselect("Teams", list(labels), format_func=labels.get, key="roster_teams",
+                              default=[2] if 2 in labels else None)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        load_teams = st.button("🔄 Load team list", help="Fetch the international team list from the API")
+    with col2:
+        import_selected = st.button("📥 Import selected", disabled=not selected)
+    with col3:
+        import_all = st.button("📥 Import all",
+                               help="Refresh the international team list and import every team")
+
+    if load_teams:
+        with st.spinner("Fetching team list..."):
+            found = discover_teams(HEADERS)
+        if isinstance(found["international"], str):
+            st.error(f"Team list failed: {found['international']}")
+        else:
+            st.rerun()
+
+    if import_selected or import_all:
+        with st.spinner("Importing rosters..."):
+            report = import_rosters(None if import_all else selected, HEADERS)
+        failed = [r for r in report.teams if r.status == "failed"]
+        message = (f"✓ {report.written} unique players from {len(report.teams) - len(failed)} team(s) "
+                   f"in {report.seconds:.1f}s ({report.duplicates} duplicate listings merged)")
+        (st.warning if failed else st.success)(message)
+        st.dataframe([r._asdict() for r in report.teams], use_container_width=True, hide_index=True)
+
+
+def render_profile(player_id: int):
+    """Render the profile section of a player"""
+    with st.spinner("Loading profile..."):
+        s1, info = player_result(player_id, "info")
+
+    if s1 != 200:
+        st.error("Failed to load player profile")
+        st.write(info)
+    else:
+        # Profile Header with Image and Nickname
+        if isinstance(info, dict):
+            profile_col1, profile_col2 = st.columns([1, 3])
+
+            with profile_col1:
+                # Display player image if available
+                image_url =  info.get('image') 
+                if image_url:
+                    st.image(image_url, width=150)
                 else:
-                    st.json(bat)
-
-        # Tab 3: Bowling Stats
-        with tab3:
-            with st.spinner("Loading bowling stats..."):
-                s3, bowl = get_player_bowling(player_id)
-
-            if s3 != 200:
-                st.error("Failed to load bowling stats")
-                st.write(bowl)
-            else:
-                st.subheader("🎯 Bowling Statistics")
-                
-                if isinstance(bowl, dict):
-                    # Extract headers and values
-                    headers = bowl.get('headers', [])
-                    values = bowl.get('values', [])
-                    
-                    if headers and values:
-                        # Build DataFrame from the data
-                        df_data = {}
-                        for row in values:
-                            row_values = row.get('values', [])
-                            if row_values:
-                                stat_name = row_values[0]  # First element is the stat name (ROWHEADER)
-                                df_data[stat_name] = row_values[1:]  # Rest are the values for each format
-                        
-                        # Display overview for all formats
-                        st.markdown("#### 📊 Overview ")
-                        
-                        for idx, format_name in enumerate(headers[1:]):
-                            col1, col2, col3, col4 = st.columns(4)
-                            
-                            matches = df_data.get('Matches', ['—'])[idx] if idx < len(df_data.get('Matches', [])) else '—'
-                            wickets = df_data.get('Wickets', ['—'])[idx] if idx < len(df_data.get('Wickets', [])) else '—'
-                            avg = df_data.get('Avg', ['—'])[idx] if idx < len(df_data.get('Avg', [])) else '—'
-                            econ = df_data.get('Eco', ['—'])[idx] if idx < len(df_data.get('Eco', [])) else '—'
-                            
-                            with col1:
-                                st.metric(f"Matches ({format_name})", matches)
-                            with col2:
-                                st.metric(f"Wickets ({format_name})", wickets)
-                            with col3:
-                                st.metric(f"Avg ({format_name})", avg)
-                            with col4:
-                                st.metric(f"Economy ({format_name})", econ)
-                        
-                        st.divider()
-                        
-                        # Create DataFrame
-                        df = pd.DataFrame(df_data, index=headers[1:]).T
-                        df.index.name = "Statistics"
-                        
-                        st.markdown("#### 📈 Detailed Statistics")
-                        st.dataframe(df, use_container_width=True)
-                    else:
-                        st.json(bowl)
+                    st.markdown("📸 No Image")
+
+            with profile_col2:
+                # Display player name and nickname
+                player_name = info.get('name')  or 'Unknown'
+                player_nickname = info.get('nickName')  or ''
+
+                st.markdown(f"# {player_name}")
+                if player_nickname:
+                    st.markdown(f"*Nickname: **{player_nickname}***")
+
+        st.divider()
+        st.subheader("👤 Personal Information")
+        # Display common fields safely
+        if isinstance(info, dict):
+            # Create three columns for different sections
+            col1, col2, col3 = st.columns(3)
+
+            # Column 1: Cricket Details
+            with col1:
+                st.markdown("**🏏 Cricket Details**")
+                st.write(f"**Role:** {info.get('role') or info.get('playingRole') or '—'}")
+                st.write(f"**Batting Style:** {info.get('bat') or '—'}")
+                st.write(f"**Bowling Style:** {info.get('bowl') or '—'}")
+                st.write(f"**International Team:** {info.get('intlTeam') or '—'}")
+
+
+            # Column 2: Personal Details
+            with col2:
+                st.markdown("**👤 Personal Details**")
+                st.write(f"**DOB:** {info.get('DoB') or info.get('dob') or '—'}")
+
+                st.write(f"**Birthplace:** {info.get('birthPlace') or info.get('country') or '—'}")
+                st.write(f"**Height:** {info.get('height') or '—'}")
+
+            # Column 3: Teams Played For
+            with col3:
+                st.markdown("**⚽ Teams Played For**")
+                teams = info.get('teams') or info.get('teamsList') or []
+                if isinstance(teams, list):
+                    for team in teams:
+                        if isinstance(team, dict):
+                            st.write(f"• {team.get('name') or team.get('teamName') or '—'}")
+                        else:
+                            st.write(f"• {team}")
+                elif isinstance(teams, str):
+                    # If teams is a comma-separated string, split and display as list
+                    team_list = [t.strip() for t in teams.split(',')]
+                    for team in team_list:
+                        st.write(f"• {team}")
                 else:
-                    st.json(bowl)
+                    st.write(f"**Current Team:** {teams or '—'}")
+
+        # Display Full Profile Link
+        # Check for webURL in appIndex first (nested structure)
+        app_index = info.get('appIndex') or {}
+        profile_url = app_index.get('webURL') or info.get('webURL')
+
+        if profile_url:
+            st.markdown("---")
+            st.markdown(f"[🔗 View Full Profile on Cricbuzz]({profile_url})")
+
+        with st.expander("Debug profile JSON"):
+            st.json(info)
+
+
+# Overview metrics per stat kind: (stat row, metric label)
+CAREER_OVERVIEW = {
+    BATTING: [("Matches", "Matches"), ("Runs", "Runs"), ("Average", "Avg"), ("SR", "SR")],
+    BOWLING: [("Matches", "Matches"), ("Wickets", "Wickets"), ("Avg", "Avg"), ("Eco", "Economy")],
+}
+
+
+def render_career(player_id: int, kind: str):
+    """Render a player's stored batting or bowling statistics"""
+    with st.spinner(f"Loading {kind} stats..."):
+        status, stats = player_result(player_id, kind)
+
+    if status != 200:
+        st.error(f"Failed to load {kind} stats")
+        st.write(stats)
+        return
+
+    st.subheader("🏏 Batting Statistics" if kind == BATTING else "🎯 Bowling Statistics")
+    if stats.text.empty:
+        st.info(f"No {kind} statistics available")
+        return
+    age_min = max(int(time.time() - stats.fetched_at) // 60, 0)
+    st.caption(f"💾 From local database | updated {age_min} min ago")
+
+    # Display overview for all formats
+    st.markdown("#### 📊 Overview ")
+    for format_name in stats.text.columns:
+        cols = st.columns(len(CAREER_OVERVIEW[kind]))
+        for col, (stat, label) in zip(cols, CAREER_OVERVIEW[kind]):
+            value = stats.text[format_name].get(stat)
+            with col:
+                st.metric(f"{label} ({format_name})", value if isinstance(value, str) else "—")
+
+    st.divider()
+
+    st.markdown("#### 📈 Detailed Statistics")
+    st.dataframe(stats.text, use_container_width=True)
+
+
+def render_batting(player_id: int):
+    """Render the batting statistics section of a player"""
+    render_career(player_id, BATTING)
+
+
+def render_bowling(player_id: int):
+    """Render the bowling statistics section of a player"""
+    render_career(player_id, BOWLING)
+
+
+def render_similar(player_id: int):
+    """Render the players with the closest career profile"""
+    from utils.player_similarity import similar_players
+
+    # The profile needs both stat kinds stored; they are usually already in flight
+    with st.spinner("Loading career stats..."):
+        player_result(player_id, BATTING)
+        player_result(player_id, BOWLING)
+
+    k = st.slider("Players to show", 5, 25, 10, key="similar_k")
+    with st.spinner("Finding similar players..."):
+        results = similar_players(player_id, k)
+    if results is None:
+        st.info("No career stats stored for this player, so there is no profile to compare.")
+        return
+    if not results:
+        st.info("No other players with career stats yet. Import or view more players first.")
+        return
+
+    options = player_labels(tuple(p for p, _ in results), table_version("players", "career_fetches"))
+    info = options.set_index("player_id")
+    st.subheader("🧭 Similar Players")
+    st.caption("Cosine similarity of normalised batting and bowling profiles across Test, ODI and T20")
+    st.dataframe(
+        {
+            "Player": [info["name"].get(p, f"Player {p}") for p, _ in results],
+            "Country": [info["country"].get(p) for p, _ in results],
+            "Similarity": [round(score, 3) for _, score in results],
+        },
+        use_container_width=True,
+    )
+
+
+PLAYER_VIEWS = {
+    "👤 Profile": render_profile,
+    "🏏 Batting": render_batting,
+    "🎯 Bowling": render_bowling,
+    "🧭 Similar": render_similar,
+}
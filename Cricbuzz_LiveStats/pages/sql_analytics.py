@@ -1,10 +1,42 @@
 """
 SQL Analytics page for Cricbuzz LiveStats
-25 Cricket Analytics Queries
+25 Cricket Analytics Queries, plus career stat queries (Q26-Q28)
 """
 import streamlit as st
 import time
 from utils.db_connection import run_query
+from utils.db_archive import run_archive_query, list_archive_seasons
+from utils.db_backup import create_backup, list_backups, verify_backup, restore_backup
+from utils.change_log import query_tables, table_version
+from db.init_sqlite import RAW_JSON_COLUMNS
+
+PAYLOAD_FILTER_LIMIT = 200
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_query(sql: str, include_archive: bool, data_version: int):
+    """Cached query results; data_version (change_log version of the tables read) invalidates them"""
+    return _run_query(sql, include_archive)
+
+
+def _run_query(sql: str, include_archive: bool):
+    """Run a query against the live database, or with the season archives attached"""
+    return run_archive_query(sql) if include_archive else run_query(sql)
+
+
+def execute_query(sql: str, include_archive: bool):
+    """
+    Run a query, answering from the cache only when change_log can invalidate it
+
+    Cached results are keyed by the version of the tables the query reads, so
+    a career stats refresh invalidates Q26-Q28 but not the match queries.
+    Queries reading any table outside CHANGE_LOG_KEYS (db_stats, balls, teams,
+    backfill_queue, archives...) always run, so they are never served stale.
+    """
+    tables = None if include_archive else query_tables(sql)
+    if tables:
+        return cached_query(sql, include_archive, table_version(*tables))
+    return _run_query(sql, include_archive)
 
 
 def render():
@@ -28,6 +60,9 @@ def render():
     except:
         pass
     
+    render_backup_panel()
+    render_payload_fields()
+    
     st.divider()
     
     # All queries in a single dictionary for dropdown
@@ -56,7 +91,10 @@ def render():
         "Q22 - Best Run Rates": "SELECT bat_team, match_id, runrate FROM scorecards ORDER BY runrate DESC LIMIT 20;",
         "Q23 - Close Matches (Low Wickets)": "SELECT match_id, team1, team2, COUNT(*) AS innings_with_low_wickets FROM (SELECT m.match_id, m.team1, m.team2 FROM matches m JOIN scorecards s ON m.match_id = s.match_id WHERE s.wickets < 3) GROUP BY match_id, team1, team2 LIMIT 30;",
         "Q24 - Teams Performance": "SELECT team1, COUNT(*) AS team1_matches FROM matches GROUP BY team1 UNION SELECT team2, COUNT(*) AS team2_matches FROM matches GROUP BY team2 ORDER BY 2 DESC;",
-        "Q25 - Complete Match Overview": "SELECT m.match_id, m.series_name, m.team1, m.team2, m.match_format, m.venue_city, COUNT(s.innings_id) AS total_innings, SUM(s.runs) AS total_runs FROM matches m LEFT JOIN scorecards s ON m.match_id = s.match_id GROUP BY m.match_id ORDER BY m.match_id DESC LIMIT 30;"
+        "Q25 - Complete Match Overview": "SELECT m.match_id, m.series_name, m.team1, m.team2, m.match_format, m.venue_city, COUNT(s.innings_id) AS total_innings, SUM(s.runs) AS total_runs FROM matches m LEFT JOIN scorecards s ON m.match_id = s.match_id GROUP BY m.match_id ORDER BY m.match_id DESC LIMIT 30;",
+        "Q26 - Career Run Leaders (Tests)": "SELECT COALESCE(p.name, b.player_id) AS player, p.country, b.value AS runs FROM career_batting b LEFT JOIN players p ON p.player_id = b.player_id WHERE b.format = 'Test' AND b.stat = 'Runs' ORDER BY runs DESC LIMIT 20;",
+        "Q27 - Best Career Batting Average (20+ innings)": "SELECT b.format, COALESCE(p.name, b.player_id) AS player, b.value AS average, i.value AS innings FROM career_batting b JOIN career_batting i ON i.player_id = b.player_id AND i.format = b.format AND i.stat = 'Innings' LEFT JOIN players p ON p.player_id = b.player_id WHERE b.stat = 'Average' AND i.value >= 20 ORDER BY b.format, average DESC;",
+        "Q28 - Most Economical Bowlers (50+ wickets)": "SELECT e.format, COALESCE(p.name, e.player_id) AS player, e.value AS economy, w.value AS wickets FROM career_bowling e JOIN career_bowling w ON w.player_id = e.player_id AND w.format = e.format AND w.stat = 'Wickets' LEFT JOIN players p ON p.player_id = e.player_id WHERE e.stat = 'Eco' AND w.value >= 50 ORDER BY e.format, economy LIMIT 50;"
     }
     
     # Dropdown to select query
@@ -70,11 +108,21 @@ def render():
     else:
         sql = all_queries[pick]
     
+    # Archived seasons are only attached when asked for
+    seasons = list_archive_seasons()
+    include_archive = st.checkbox(
+        "🗄️ Include archived seasons",
+        disabled=not seasons,
+        help="Attach season archives and query history via the all_matches / all_scorecards views"
+    )
+    if include_archive:
+        st.caption(f"Attached seasons: {', '.join(seasons)}")
+    
     # Execute query button with red color
     if st.button("▶️ Execute Query", type="primary", use_container_width=False):
         try:
             start_time = time.time()
-            df = run_query(sql)
+            df = execute_query(sql, include_archive)
             execution_time = time.time() - start_time
             
             st.success(f"✓ Query executed in {execution_time:.2f}s | {len(df)} rows")
@@ -90,3 +138,107 @@ def render():
             )
         except Exception as e:
             st.error(str(e))
+
+
+def payload_filter_sql(table: str, path: str):
+    """
+    Build a filter on a raw_json path
+
+    Uses the indexed generated column when one is defined for the path,
+    otherwise falls back to json_extract over every row.
+
+    Args:
+        table: matches, players or scorecards
+        path: JSON path, e.g. '$.state'
+
+    Returns:
+        tuple: (sql, uses_index); sql takes (value, limit) when indexed, else (path, value, limit)
+    """
+    for column, (_, expr) in RAW_JSON_COLUMNS[table].items():
+        if expr == f"json_extract(raw_json, '{path}')":
+            return f"SELECT * FROM {table} WHERE {column} = ? LIMIT ?", True
+    return f"SELECT * FROM {table} WHERE json_extract(raw_json, ?) = ? LIMIT ?", False
+
+
+def render_payload_fields():
+    """Render the raw payload field browser and filter builder"""
+    with st.expander("🧩 Payload fields", expanded=False):
+        st.caption("Every synced row keeps its source JSON in raw_json. "
+                   "These generated columns are indexed and can be used in any query:")
+        for table, columns in RAW_JSON_COLUMNS.items():
+            st.markdown(f"**{table}**: " + ", ".join(
+                f"`{column}` ({expr.split(', ', 1)[1].rstrip(')')})" for column, (_, expr) in columns.items()
+            ))
+
+        col1, col2, col3 = st.columns([1, 2, 2])
+        with col1:
+            table = st.selectbox("Table", list(RAW_JSON_COLUMNS), key="payload_table")
+        with col2:
+            path = st.text_input("JSON path", value="$.state", key="payload_path")
+        with col3:
+            value = st.text_input("Equals", key="payload_value")
+
+        if st.button("🔎 Filter", disabled=not (path.startswith("$") and value)):
+            sql, uses_index = payload_filter_sql(table, path)
+            # Numeric payload fields compare as numbers
+            typed = int(value) if value.lstrip("-").isdigit() else value
+            params = (typed, PAYLOAD_FILTER_LIMIT) if uses_index else (path, typed, PAYLOAD_FILTER_LIMIT)
+            try:
+                df = run_query(sql, params)
+                st.caption(("⚡ Indexed generated column" if uses_index else "🐢 json_extract scan")
+                           + f" | {len(df)} rows (max {PAYLOAD_FILTER_LIMIT})")
+                st.dataframe(df.drop(columns=["raw_json"], errors="ignore"), use_container_width=True)
+            except Exception as e:
+                st.error(str(e))
+
+
+def render_backup_panel():
+    """Render online backup / restore controls"""
+    with st.expander("💾 Backup & Restore", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            incremental = st.checkbox("Incremental snapshot", value=True,
+                                      help="Only store chunks that changed since earlier snapshots")
+        with col2:
+            compress = st.checkbox("Compress full backup", value=True, disabled=incremental)
+
+        if st.button("📦 Create Backup"):
+            progress_bar = st.progress(0)
+
+            def on_step(status, remaining, total):
+                progress_bar.progress((total - remaining) / total if total else 1.0)
+
+            try:
+                info = create_backup(incremental=incremental, compress=compress, progress=on_step)
+                st.success(f"✓ Created {info['kind']} backup {info['name']} ({info['size'] / 1024:.1f} KB)")
+            except Exception as e:
+                st.error(f"Backup failed: {e}")
+
+        backups = list_backups()
+        if not backups:
+            st.caption("No backups yet.")
+            return
+
+        selected = st.selectbox(
+            "Backups",
+            backups,
+            format_func=lambda b: f"{b['name']} ({b['kind']}, {b['size'] / 1024:.1f} KB)"
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("🔎 Verify"):
+                ok, message = verify_backup(selected["name"])
+                if ok:
+                    st.success(f"✓ {selected['name']} is valid")
+                else:
+                    st.error(f"Verification failed: {message}")
+        with col2:
+            confirm = st.checkbox("I confirm I want to overwrite the live database")
+            if st.button("♻️ Restore", disabled=not confirm):
+                try:
+                    restore_backup(selected["name"])
+                    st.toast(f"✅ Restored {selected['name']}", icon="✅")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Restore failed: {e}")
@@ -0,0 +1,24 @@
+"""
+Shared fixtures for the Cricbuzz LiveStats tests
+
+Run from the app directory:
+    python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+# Modules use paths relative to the app directory (db/cricbuzz.db), as the app does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_db(tmp_path, monkeypatch):
+    """A fresh db/cricbuzz.db under a temporary working directory"""
+    from db import init_sqlite
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "db").mkdir()
+    init_sqlite.main()
+    return tmp_path / "db" / "cricbuzz.db"
@@ -0,0 +1,48 @@
+import json
+import sqlite3
+
+import pytest
+
+from utils import backfill
+
+
+@pytest.fixture
+def conn(app_db, monkeypatch):
+    monkeypatch.setattr(backfill, "_schema_ready", False)
+    backfill._connect().close()
+    conn = sqlite3.connect(app_db)
+    yield conn
+    conn.close()
+
+
+def _store_match(conn, match_id, header=None):
+    conn.execute("INSERT INTO matches (match_id, raw_json) VALUES (?, ?)",
+                 (match_id, json.dumps(header) if header else None))
+    conn.execute("INSERT INTO scorecards (match_id, innings_id, runs) VALUES (?, 1, 100)", (match_id,))
+
+
+def _series(*match_ids):
+    children = [(backfill.SCORECARD, str(m), f"Match {m}") for m in match_ids]
+    return backfill.Fetched(backfill.SERIES, "6732", 200, [], children, None, None)
+
+
+def _queued(conn):
+    return sorted(int(k) for (k,) in conn.execute(
+        "SELECT key FROM backfill_queue WHERE kind = ? AND status = 'pending'", (backfill.SCORECARD,)))
+
+
+def test_partial_live_scorecard_is_backfilled(conn):
+    _store_match(conn, 1, {"state": "In Progress", "complete": False})
+    _store_match(conn, 2, {"state": "Complete", "complete": True, "matchCompleteTimestamp": 1700000000000})
+    _store_match(conn, 3)  # scorecard saved without its header
+    with conn:
+        rows, queued = backfill._apply(conn, [_series(1, 2, 3, 4)])
+    assert queued == 3
+    assert _queued(conn) == [1, 3, 4]
+
+
+def test_complete_flag_alone_marks_a_final_scorecard(conn):
+    _store_match(conn, 5, {"complete": True})
+    with conn:
+        backfill._apply(conn, [_series(5)])
+    assert _queued(conn) == []
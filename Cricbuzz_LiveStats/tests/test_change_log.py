@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from utils import change_log
+
+
+def _insert_player(db_path, player_id):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO players (player_id, name) VALUES (?, ?)", (player_id, f"Player {player_id}"))
+    conn.close()
+
+
+@pytest.fixture
+def subscribers(app_db, monkeypatch):
+    monkeypatch.setattr(change_log, "_subscribers", {})
+    return app_db
+
+
+def test_callback_may_subscribe_and_unsubscribe(subscribers):
+    seen = []
+
+    def callback(keys, seq):
+        seen.append(keys)
+        change_log.subscribe("late", lambda *_: None, ["players"])
+        change_log.unsubscribe("self")
+
+    change_log.subscribe("self", callback, ["players"], from_seq=0)
+    _insert_player(subscribers, 1)
+
+    assert change_log.dispatch_changes() == 1
+    assert seen == [{"players": {1}}]
+    assert set(change_log._subscribers) == {"late"}
+
+
+def test_failing_callback_does_not_block_others(subscribers):
+    delivered = []
+
+    def broken(keys, seq):
+        raise ValueError("boom")
+
+    change_log.subscribe("broken", broken, ["players"], from_seq=0)
+    change_log.subscribe("ok", lambda keys, seq: delivered.append(seq), ["players"], from_seq=0)
+    _insert_player(subscribers, 1)
+
+    with pytest.raises(ValueError):
+        change_log.dispatch_changes()
+    assert len(delivered) == 1
+    assert change_log._subscribers["ok"]["seq"] == delivered[0]
+    # The failed subscriber keeps its position and is retried
+    assert change_log._subscribers["broken"]["seq"] == 0
+    assert not change_log._subscribers["broken"]["busy"]
+
+
+def test_query_tables_of_tracked_and_untracked_queries(app_db):
+    sql = ("SELECT p.name, b.value FROM career_batting b "
+           "LEFT JOIN players p ON p.player_id = b.player_id WHERE b.stat = 'Runs'")
+    assert change_log.query_tables(sql) == {"career_batting", "players"}
+    assert change_log.query_tables("SELECT * FROM db_stats") is None
+    assert change_log.query_tables("DELETE FROM players") is None
+    assert not change_log.is_tracked_query("SELECT 1; SELECT 2")
+
+
+def test_career_cells_bump_their_table_version(app_db):
+    before = change_log.table_version("career_batting")
+    conn = sqlite3.connect(app_db)
+    with conn:
+        conn.execute("INSERT INTO career_batting (player_id, format, stat, value, raw, format_pos, stat_pos) "
+                     "VALUES (7, 'Test', 'Runs', 100, '100', 0, 0)")
+    conn.close()
+    assert change_log.table_version("career_batting") > before
+    assert change_log.table_version("career_bowling") == 0
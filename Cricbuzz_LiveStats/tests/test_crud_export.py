@@ -0,0 +1,30 @@
+import csv
+import io
+import sqlite3
+
+from utils.crud_players import PLAYER_COLUMNS, export_players, spool_export
+
+
+def _insert_players(db_path, count):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("INSERT INTO players (player_id, name, country) VALUES (?, ?, ?)",
+                         [(i, f"Player {i}", "India") for i in range(1, count + 1)])
+    conn.close()
+
+
+def test_spool_matches_streamed_export(app_db):
+    _insert_players(app_db, 120)
+    with spool_export("jsonl", max_memory=1024) as spool:
+        assert spool._rolled  # past max_memory: on disk, not in memory
+        data = spool.read().decode("utf-8")
+    assert data == "".join(export_players("jsonl"))
+    assert len(data.splitlines()) == 120
+
+
+def test_spooled_csv_has_header_and_rows(app_db):
+    _insert_players(app_db, 3)
+    with spool_export("csv") as spool:
+        rows = list(csv.reader(io.TextIOWrapper(spool, encoding="utf-8")))
+    assert tuple(rows[0]) == PLAYER_COLUMNS
+    assert [r[1] for r in rows[1:]] == ["Player 1", "Player 2", "Player 3"]
@@ -0,0 +1,33 @@
+import threading
+import time
+
+from utils import live_feed
+from utils.commentary import IngestResult
+
+
+def test_first_commentary_ingest_runs_off_the_poll_thread(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def slow_ingest(match_id, headers):
+        calls.append(match_id)
+        release.wait(5)
+        return IngestResult(match_id, 120, 12, 5000, None)
+
+    monkeypatch.setattr(live_feed, "fetch_live_scores", lambda headers: None)
+    monkeypatch.setattr(live_feed, "get_cursor", lambda match_id: None)
+    monkeypatch.setattr(live_feed, "ingest_commentary", slow_ingest)
+
+    feed = live_feed.LiveFeed({})
+    feed._commentary_watched[7] = time.monotonic()
+    started = time.monotonic()
+    feed.poll()
+    feed.poll()  # still loading: not started twice
+    assert time.monotonic() - started < 1
+    assert feed._commentary.get(7) is None
+
+    release.set()
+    feed._await(lambda: 7 in feed._commentary, 5)
+    assert feed._commentary[7].cursor == 5000
+    assert calls == [7]
+    assert not feed._history_loading
@@ -0,0 +1,53 @@
+import pytest
+
+from utils.models import (
+    EXTRA_BYE, EXTRA_LEG_BYE, EXTRA_NO_BALL, EXTRA_NONE, EXTRA_WIDE, parse_ball_outcome, parse_commentary
+)
+
+
+@pytest.mark.parametrize("text, event, expected", [
+    # Words in the description are not outcomes
+    ("Starc to Rohit, 1 run, pushed wide of mid-off", "", (1, 0, EXTRA_NONE, 0)),
+    ("Starc to Rohit, FOUR, wide outside off and cut away", "FOUR", (4, 0, EXTRA_NONE, 0)),
+    ("FOUR, wide outside off", "", (4, 0, EXTRA_NONE, 0)),
+    ("Starc to Rohit, no run, full and wide, left alone", "", (0, 0, EXTRA_NONE, 0)),
+    ("no run, full and wide, left alone", "", (0, 0, EXTRA_NONE, 0)),
+    ("Starc to Rohit, SIX, out of the ground!", "SIX", (6, 0, EXTRA_NONE, 0)),
+    ("SIX, out of the ground!", "", (6, 0, EXTRA_NONE, 0)),
+    ("Starc to Rohit, 2 runs, no ball would have been close", "", (2, 0, EXTRA_NONE, 0)),
+    # Outcome tokens
+    ("Starc to Rohit, no run, defended", "", (0, 0, EXTRA_NONE, 0)),
+    ("Starc to Rohit, 3 runs, driven", "", (3, 0, EXTRA_NONE, 0)),
+    ("Starc to Rohit, wide, down leg", "", (0, 1, EXTRA_WIDE, 0)),
+    ("Starc to Rohit, 3 wides, sprayed down leg", "", (0, 3, EXTRA_WIDE, 0)),
+    ("Starc to Rohit, 5 wides, past the keeper for four", "", (0, 5, EXTRA_WIDE, 0)),
+    ("Starc to Rohit, no ball, SIX, over long-on", "SIX", (6, 1, EXTRA_NO_BALL, 0)),
+    ("Starc to Rohit, no ball, 1 run", "", (1, 1, EXTRA_NO_BALL, 0)),
+    ("Starc to Rohit, no ball, leg byes, 1 run", "", (0, 2, EXTRA_NO_BALL, 0)),
+    ("Starc to Rohit, leg byes, 1 run, off the pad", "", (0, 1, EXTRA_LEG_BYE, 0)),
+    ("Starc to Rohit, byes, FOUR, beats everyone", "FOUR", (0, 4, EXTRA_BYE, 0)),
+    ("Starc to Rohit, 2 byes", "", (0, 2, EXTRA_BYE, 0)),
+    ("Starc to Rohit, out Caught by Smith!! Top edge", "WICKET", (0, 0, EXTRA_NONE, 1)),
+    ("Starc to Rohit, out Lbw!! Plumb", "", (0, 0, EXTRA_NONE, 1)),
+    ("Starc to Rohit, FOUR", "FOUR,HIGHSCORE", (4, 0, EXTRA_NONE, 0)),
+    # Event flags fill in an outcome without a runs token
+    ("Starc to Rohit, out Run Out!! 1 run completed", "WICKET", (0, 0, EXTRA_NONE, 1)),
+    ("Starc to Rohit, B0$ FOUR", "", (4, 0, EXTRA_NONE, 0)),
+])
+def test_parse_ball_outcome(text, event, expected):
+    assert parse_ball_outcome(text, event) == expected
+
+
+def test_parse_commentary_skips_non_balls_and_sorts():
+    data = {"commentaryList": [
+        {"overNumber": 19.2, "timestamp": 2000, "inningsId": 2, "commText": "A to B, FOUR, wide of slip",
+         "event": "FOUR", "bowlerStriker": {"bowlId": 7, "bowlName": "A"},
+         "batsmanStriker": {"batId": 5, "batName": "B"}},
+        {"timestamp": 1500, "commText": "End of over 19"},
+        {"overNumber": 19.1, "timestamp": 1000, "inningsId": 2, "commText": "A to B, wide",
+         "bowlerStriker": {"bowlId": 7}, "batsmanStriker": {}},
+    ]}
+    balls = parse_commentary(data)
+    assert [(b.ts, b.over, b.ball) for b in balls] == [(1000, 19, 1), (2000, 19, 2)]
+    assert (balls[0].extras, balls[0].extra_type, balls[0].batter_id) == (1, EXTRA_WIDE, None)
+    assert (balls[1].runs, balls[1].extras, balls[1].batter_id) == (4, 0, 5)
@@ -0,0 +1,46 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from utils import payload_archive
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(payload_archive, "_index_ready", False)
+    return tmp_path
+
+
+def _read_through(body, endpoint="scorecard", key=1):
+    reader = payload_archive.ArchivingReader(io.BytesIO(body), endpoint, key)
+    while reader.read(4):
+        pass
+    return reader
+
+
+def test_streamed_body_is_archived(archive):
+    body = b'{"scoreCard": []}'
+    _read_through(body).close()
+    ((endpoint, key, digest),) = payload_archive._replay_plan()
+    assert (endpoint, key) == ("scorecard", "1")
+    with gzip.open(payload_archive.blob_path(digest)) as f:
+        assert f.read() == body
+    assert not [f for f in os.listdir(payload_archive.PAYLOAD_DIR) if f.endswith(".tmp")]
+
+
+def test_blob_pruned_before_index_row_is_restored(archive, monkeypatch):
+    body = b'{"scoreCard": [1]}'
+    reader = _read_through(body)
+    index = payload_archive._index
+
+    def index_after_prune(endpoint, key, digest, size):
+        # A concurrent prune removes the still unreferenced blob first
+        os.remove(payload_archive.blob_path(digest))
+        index(endpoint, key, digest, size)
+
+    monkeypatch.setattr(payload_archive, "_index", index_after_prune)
+    reader.close()
+    assert payload_archive.load_payload(payload_archive._replay_plan()[0][2]) == {"scoreCard": [1]}
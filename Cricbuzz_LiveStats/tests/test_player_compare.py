@@ -0,0 +1,40 @@
+import numpy as np
+
+from utils.career_stats import BATTING, BOWLING
+from utils.player_compare import percentile_scores, rank_players
+
+
+def _column(*values):
+    """(players, 1 format, 1 metric) array"""
+    return np.array(values, dtype=float).reshape(-1, 1, 1)
+
+
+def test_tied_values_share_the_best_rank():
+    ranks = rank_players(_column(50, 70, 50, 30), [True])
+    assert ranks[:, 0, 0].tolist() == [2, 1, 2, 4]
+
+
+def test_lower_is_better_and_missing_values():
+    ranks = rank_players(_column(4.5, np.nan, 6.0, 4.5), [False])
+    assert ranks[[0, 2, 3], 0, 0].tolist() == [1, 3, 1]
+    assert np.isnan(ranks[1, 0, 0])
+
+
+def test_ties_get_equal_scores_whatever_the_row_order():
+    values = np.stack([_column(40, 40, 20)[..., 0], _column(5.0, 5.0, 7.0)[..., 0]], axis=-1)
+    kinds = [BATTING, BOWLING]
+    scores = percentile_scores(rank_players(values, [True, False]), kinds)
+    assert scores[BATTING][0, 0] == scores[BATTING][1, 0] == 100
+    assert scores[BOWLING][0, 0] == scores[BOWLING][1, 0] == 100
+    assert scores[BATTING][2, 0] < 100
+
+    flipped = percentile_scores(rank_players(values[::-1], [True, False]), kinds)
+    assert np.array_equal(flipped[BATTING][::-1], scores[BATTING])
+
+
+def test_ranks_are_per_format_and_metric():
+    values = np.array([[[1, 9], [5, 5]], [[2, 9], [5, 1]]], dtype=float)
+    ranks = rank_players(values, [True, True])
+    assert ranks[:, 0, 0].tolist() == [2, 1]
+    assert ranks[:, 0, 1].tolist() == [1, 1]
+    assert ranks[:, 1, 1].tolist() == [1, 2]
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+
+import pytest
+
+from db import init_sqlite
+from utils.player_search import (
+    EXACT_SCORE, NAME_PREFIX_SCORE, PREFIX_SCORE, PlayerNameIndex, normalize_name, trigrams
+)
+
+
+def _write(db_path, sql, rows):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(sql, rows)
+    conn.close()
+
+
+def _add_players(db_path, *players):
+    _write(db_path, "INSERT INTO players (player_id, name, country) VALUES (?, ?, ?)", players)
+
+
+@pytest.fixture
+def index(app_db):
+    _add_players(app_db, (1, "Virat Kohli", "India"), (2, "Virender Sehwag", "India"),
+                 (3, "Jasprit Bumrah", "India"), (4, "Ravindra Jadeja", "India"))
+    return PlayerNameIndex()
+
+
+def _ids(matches):
+    return [m.player_id for m in matches]
+
+
+def test_normalize_and_trigrams():
+    assert normalize_name("Ravindra  Jadeja!") == "ravindra jadeja"
+    assert normalize_name("José Buttler") == "jose buttler"
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+def test_prefix_matches_rank_above_fuzzy(index):
+    assert index.search("Virat Kohli")[0].score == EXACT_SCORE
+    assert index.search("virat")[0].score == NAME_PREFIX_SCORE
+    assert [(m.player_id, m.score) for m in index.search("vir koh")] == [(1, PREFIX_SCORE)]
+    assert _ids(index.search("vir")) == [1, 2]  # ties ordered by name
+
+    fuzzy = index.search("kohly")
+    assert _ids(fuzzy) == [1] and fuzzy[0].score < PREFIX_SCORE
+    assert index.search("zzz") == [] and index.search("  ") == []
+
+
+def test_changes_are_applied_incrementally(index, app_db, monkeypatch):
+    assert len(index.search("kohli")) == 1
+    rebuilds = []
+    rebuild = index._rebuild
+    monkeypatch.setattr(index, "_rebuild", lambda seq: (rebuilds.append(seq), rebuild(seq)))
+
+    _add_players(app_db, (5, "Shubman Gill", "India"))
+    _write(app_db, "UPDATE players SET name = ? WHERE player_id = ?", [("Jasprit J Bumrah", 3)])
+    _write(app_db, "DELETE FROM players WHERE player_id = ?", [(1,)])
+
+    assert _ids(index.search("gill")) == [5]
+    assert index.search("jasprit j")[0].name == "Jasprit J Bumrah"
+    assert index.search("kohli") == []
+    assert len(index) == 4 and rebuilds == []
+
+
+def test_restored_database_forces_rebuild(index, app_db, monkeypatch):
+    _add_players(app_db, (5, "Shubman Gill", "India"))
+    assert _ids(index.search("gill")) == [5]
+
+    # A restored backup has an older change_log, so its seq is behind the index
+    os.remove(app_db)
+    init_sqlite.main()
+    _add_players(app_db, (9, "Rohit Sharma", "India"))
+
+    assert _ids(index.search("rohit")) == [9]
+    assert index.search("gill") == [] and len(index) == 1
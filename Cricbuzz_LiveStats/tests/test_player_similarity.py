@@ -0,0 +1,68 @@
+import os
+import sqlite3
+
+import pytest
+
+from utils import player_similarity
+
+
+@pytest.fixture
+def features(app_db, monkeypatch):
+    monkeypatch.setattr(player_similarity, "_reader", {"key": None, "ids": None, "matrix": None})
+    conn = sqlite3.connect(app_db)
+    with conn:
+        for player_id, average, strike_rate in ((1, 45, 55), (2, 44, 56), (3, 20, 90)):
+            conn.execute("INSERT INTO players (player_id, name) VALUES (?, ?)", (player_id, f"P{player_id}"))
+            conn.executemany(
+                "INSERT INTO career_batting (player_id, format, stat, value, raw, format_pos, stat_pos) "
+                "VALUES (?, 'Test', ?, ?, '', 0, ?)",
+                [(player_id, "Average", average, 0), (player_id, "SR", strike_rate, 1)]
+            )
+            conn.execute("INSERT INTO career_fetches (player_id, kind, fetched_at) VALUES (?, 'batting', 0)",
+                         (player_id,))
+    conn.close()
+    return app_db
+
+
+def _feature_files():
+    return sorted(f for f in os.listdir(player_similarity.FEATURE_DIR) if f.endswith((".f32", ".ids")))
+
+
+def test_similar_players_from_a_fresh_build(features):
+    results = player_similarity.similar_players(1, k=2)
+    assert [p for p, _ in results] == [2, 3]
+    assert _feature_files() == ["players-1.f32", "players-1.ids"]
+
+
+def test_rebuild_switches_generation_and_removes_the_old_pair(features):
+    player_similarity.rebuild_features()
+    old_ids, old_matrix = player_similarity._open_readers()
+
+    player_similarity.rebuild_features()
+    assert player_similarity._read_meta()["generation"] == 2
+    assert _feature_files() == ["players-2.f32", "players-2.ids"]
+    # Maps opened before the switch still read their own consistent pair
+    assert len(old_ids) == len(old_matrix) == 3
+
+    ids, matrix = player_similarity._open_readers()
+    assert ids is not old_ids and list(ids) == [1, 2, 3]
+
+
+def test_reader_retries_when_a_generation_disappears(features, monkeypatch):
+    player_similarity.rebuild_features()
+    metas = iter([{"generation": 99}])
+    read_meta = player_similarity._read_meta
+    monkeypatch.setattr(player_similarity, "_read_meta", lambda: next(metas, None) or read_meta())
+    ids, _ = player_similarity._open_readers()
+    assert list(ids) == [1, 2, 3]
+
+
+def test_files_from_before_generations_trigger_a_rebuild(features):
+    os.makedirs(player_similarity.FEATURE_DIR, exist_ok=True)
+    for name in ("players.f32", "players.ids"):
+        open(os.path.join(player_similarity.FEATURE_DIR, name), "wb").close()
+    with open(player_similarity.META_PATH, "w") as f:
+        f.write('{"version": 1, "dim": %d}' % player_similarity.FEATURE_DIM)
+    assert not player_similarity._meta_ok()
+    player_similarity.sync_features()
+    assert _feature_files() == ["players-1.f32", "players-1.ids"]
@@ -0,0 +1,27 @@
+from utils import roster_import
+from utils.api_client import RateLimiter
+
+INDIA = {"team_id": 2, "name": "India", "category": "international"}
+
+
+def _fetch(monkeypatch, response):
+    monkeypatch.setattr(roster_import, "fetch_team_players", lambda team_id, headers: response)
+    return roster_import._fetch_roster(INDIA, {}, RateLimiter(0))
+
+
+def test_roster_players_take_the_team_country(monkeypatch):
+    status, players, _ = _fetch(monkeypatch, (200, {"player": [
+        {"name": "BATSMEN"}, {"id": "1413", "name": "Virat Kohli"},
+    ]}))
+    assert status == 200
+    assert [(p.player_id, p.country) for p in players] == [(1413, "India")]
+
+
+def test_malformed_payload_is_a_team_failure(monkeypatch):
+    status, error, _ = _fetch(monkeypatch, (200, {"player": 5}))
+    assert status is None
+    assert error.startswith("TypeError")
+
+
+def test_http_error_keeps_its_status(monkeypatch):
+    assert _fetch(monkeypatch, (429, "Too many requests"))[:2] == (429, "Too many requests")
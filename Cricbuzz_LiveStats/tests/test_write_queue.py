@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils import db_sync
+from utils.models import Innings
+from utils.write_queue import WriteQueue
+
+
+@pytest.fixture
+def wq(app_db):
+    wq = WriteQueue(str(app_db))
+    yield wq
+    wq.close()
+
+
+def _insert(conn, team_id):
+    conn.execute("INSERT INTO teams (team_id, name) VALUES (?, ?)", (team_id, f"Team {team_id}"))
+    return team_id
+
+
+def _teams(app_db):
+    with sqlite3.connect(app_db) as conn:
+        return sorted(r[0] for r in conn.execute("SELECT team_id FROM teams"))
+
+
+def test_failing_op_is_rolled_back_alone(wq, app_db):
+    def insert_then_fail(conn):
+        _insert(conn, 2)
+        raise ValueError("bad row")
+
+    ok = wq.submit(_insert, 1)
+    bad = wq.submit(insert_then_fail)
+    later = wq.submit(_insert, 3)
+
+    assert ok.result() == 1 and later.result() == 3
+    with pytest.raises(ValueError, match="bad row"):
+        bad.result()
+    assert _teams(app_db) == [1, 3]
+    assert wq.stats()["failed"] == 1
+
+
+def test_broken_transaction_fails_the_batch_and_writer_recovers(wq, app_db):
+    def rollback_inside(conn):
+        conn.execute("ROLLBACK")  # ends the writer's transaction under its savepoint
+
+    # Keep the writer busy until both are queued, so they land in one batch
+    gate = threading.Event()
+    wq.submit(lambda conn: gate.wait(5))
+    first = wq.submit(_insert, 1)
+    broken = wq.submit(rollback_inside)
+    gate.set()
+
+    with pytest.raises(sqlite3.Error):
+        broken.result(5)
+    with pytest.raises(sqlite3.Error):
+        first.result(5)
+    assert wq.submit(_insert, 2).result(5) == 2
+    assert _teams(app_db) == [2]
+
+
+def test_flush_and_close(wq, app_db):
+    wq.submit(_insert, 1)
+    assert wq.flush(5)
+    assert _teams(app_db) == [1]
+
+    wq.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        wq.submit(_insert, 2)
+
+
+def test_ops_cannot_queue_writes(wq):
+    with pytest.raises(RuntimeError, match="cannot queue"):
+        wq.submit(lambda conn: wq.submit(_insert, 1)).result(5)
+
+
+def test_save_scorecard_reads_streams_on_the_callers_thread(wq, app_db, monkeypatch):
+    monkeypatch.setattr(db_sync, "submit_write", wq.submit)
+    readers = []
+
+    def stream():
+        for i in (1, 2):
+            readers.append(threading.current_thread())
+            yield Innings(innings_id=i, bat_team="IND", runs=100 * i)
+
+    future = db_sync.save_scorecard(7, stream())
+    assert readers == [threading.current_thread()] * 2
+    assert future.result(5) == 2
+
+    def broken():
+        yield Innings(innings_id=1, runs=1)
+        raise ConnectionError("response cut off")
+
+    with pytest.raises(ConnectionError):
+        db_sync.save_scorecard(7, broken())
+    wq.flush(5)
+    with sqlite3.connect(app_db) as conn:
+        rows = conn.execute("SELECT innings_id, runs FROM scorecards WHERE match_id = 7 "
+                            "ORDER BY innings_id").fetchall()
+    assert rows == [(1, 100), (2, 200)]
@@ -1,8 +1,35 @@
 """
 API client utilities for Cricbuzz LiveStats
 """
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import IO, Iterator, List, Optional, Tuple
+
 import requests
 
+from utils.models import MatchInfo, loads, parse_live_matches
+from utils.payload_archive import (
+    LIVE, PLAYER_BATTING, PLAYER_BOWLING, PLAYER_INFO, PLAYER_SEARCH, SCORECARD, SERIES_ARCHIVE,
+    SERIES_MATCHES, TEAM_LIST, TEAM_PLAYERS, ArchivingReader, archive_response
+)
+
+API_BASE_URL = "https://cricbuzz-cricket.p.rapidapi.com"
+LIVE_SCORES_URL = f"{API_BASE_URL}/matches/v1/live"
+
+# Scorecard paths, in the order tried
+SCORECARD_PATHS = ("/mcenter/v1/{}/hscard", "/mcenter/v1/{}/scard")
+
+# Threads shared by concurrent player lookups (three requests per player view)
+PLAYER_FETCH_WORKERS = 6
+
+# Team list categories served by /teams/v1/{category}
+TEAM_CATEGORIES = ("international", "league", "domestic", "women")
+
+_player_pool = None
+_player_pool_lock = threading.Lock()
+
 
 def fetch_live_scores(headers: dict):
     """
@@ -14,11 +41,12 @@ def fetch_live_scores(headers: dict):
     Returns:
         dict: Response data or None
     """
-    url = "https://cricbuzz-cricket.p.rapidapi.com/matches/v1/live"
+    url = LIVE_SCORES_URL
     response = requests.get(url, headers=headers)
     
     if response.status_code == 200:
-        return response.json()
+        archive_response(LIVE, "", response.content)
+        return loads(response.content)
     return None
 
 
@@ -35,60 +63,74 @@ def fetch_scorecard(match_id: int, headers: dict):
     Returns:
         tuple: (url, response_data) or (None, error_dict) if all endpoints fail
     """
-    candidates = [
-        f"https://cricbuzz-cricket.p.rapidapi.com/mcenter/v1/{match_id}/hscard",
-        f"https://cricbuzz-cricket.p.rapidapi.com/mcenter/v1/{match_id}/scard",
-    ]
+    candidates = scorecard_urls(match_id)
 
     last_error = None
     for url in candidates:
         r = requests.get(url, headers=headers)
         if r.status_code == 200:
-            return url, r.json()
+            archive_response(SCORECARD, match_id, r.content)
+            return url, loads(r.content)
         last_error = {"url": url, "status_code": r.status_code, "text": r.text[:400]}
 
     return None, last_error
 
 
-def build_match_options(data: dict):
+def scorecard_urls(match_id: int) -> List[str]:
+    """Scorecard endpoints to try, in order (providers expose different paths)"""
+    return [f"{API_BASE_URL}{path.format(match_id)}" for path in SCORECARD_PATHS]
+
+
+@contextmanager
+def stream_response(url: str, headers: dict, params: Optional[dict] = None,
+                    archive: Optional[Tuple[str, object]] = None) -> Iterator[Tuple[int, Optional[IO[bytes]]]]:
     """
-    Parse live scores data and build formatted match options for selectbox
+    Open a GET request without reading the body into memory
     
     Args:
-        data: Raw API response data
+        url: Request URL
+        headers: API request headers
+        params: Query parameters
+        archive: (endpoint, key) to archive the body under as it is read
         
-    Returns:
-        list: Match options with label, match_id, and matchInfo
+    Yields:
+        tuple: (status_code, file-like decompressed body or None if not 200)
     """
-    match_options = []
-    type_matches = data.get("typeMatches", [])
-
-    for t in type_matches:
-        for s in t.get("seriesMatches", []):
-            wrapper = s.get("seriesAdWrapper")
-            if not wrapper:
-                continue
+    r = requests.get(url, headers=headers, params=params, stream=True, timeout=20)
+    body = None
+    try:
+        if r.status_code != 200:
+            yield r.status_code, None
+            return
+        r.raw.decode_content = True
+        body = r.raw
+        if archive is not None:
+            try:
+                body = ArchivingReader(r.raw, *archive)
+            except OSError:
+                pass  # stream unarchived rather than fail the request
+        yield r.status_code, body
+    finally:
+        if isinstance(body, ArchivingReader):
+            body.close()
+        r.close()
 
-            for m in wrapper.get("matches", []):
-                info = m.get("matchInfo", {})
-                match_id = info.get("matchId")
-                if not match_id:
-                    continue
 
-                team1 = info.get("team1", {}).get("teamName", "Team 1")
-                team2 = info.get("team2", {}).get("teamName", "Team 2")
-                label = f"{team1} vs {team2} — {info.get('matchDesc','')} ({info.get('state','')})"
-
-                match_options.append({
-                    "label": label,
-                    "match_id": match_id,
-                    "matchInfo": info
-                })
-
-    return match_options
+def build_match_options(data: dict) -> List[MatchInfo]:
+    """
+    Parse live scores data into matches for the selectbox
+    
+    Args:
+        data: Raw API response data
+        
+    Returns:
+        list: MatchInfo per match (use .label, .match_id)
+    """
+    return parse_live_matches(data)
 
 
-def api_get(path: str, headers: dict, params: dict | None = None):
+def api_get(path: str, headers: dict, params: dict | None = None,
+            archive: tuple | None = None):
     """
     Generic API GET request handler for Cricbuzz endpoints
     
@@ -96,13 +138,94 @@ def api_get(path: str, headers: dict, params: dict | None = None):
         path: API endpoint path
         headers: API request headers
         params: Query parameters
+        archive: (endpoint, key) to archive a successful response under
         
     Returns:
         tuple: (status_code, response_data or error_text)
     """
-    url = f"https://cricbuzz-cricket.p.rapidapi.com{path}"
+    url = f"{API_BASE_URL}{path}"
     r = requests.get(url, headers=headers, params=params, timeout=20)
-    return r.status_code, r.json() if r.status_code == 200 else r.text
+    if r.status_code != 200:
+        return r.status_code, r.text
+    if archive is not None:
+        archive_response(*archive, r.content)
+    return r.status_code, loads(r.content)
+
+
+def get_scorecard(match_id: int, headers: dict):
+    """
+    Get a match scorecard, trying each of SCORECARD_PATHS
+
+    Args:
+        match_id: Match ID
+        headers: API request headers
+
+    Returns:
+        tuple: (status_code, scorecard or error text of the last path tried)
+    """
+    status, data = None, None
+    for path in SCORECARD_PATHS:
+        status, data = api_get(path.format(match_id), headers=headers, archive=(SCORECARD, match_id))
+        # 429: quota exhausted, another path would fail the same way
+        if status in (200, 429):
+            break
+    return status, data
+
+
+def get_commentary(match_id: int, headers: dict, innings: Optional[int] = None,
+                   before_ts: Optional[int] = None):
+    """
+    Get one page of ball-by-ball commentary, newest entries first
+
+    Args:
+        match_id: Match ID
+        headers: API request headers
+        innings: With before_ts, the innings to page back through
+        before_ts: Only entries older than this timestamp (ms); default: latest page
+
+    Returns:
+        tuple: (status_code, commentary)
+    """
+    # Polled every few seconds and kept in the balls table, so not archived
+    if before_ts is None:
+        # Endpoint: /mcenter/v1/{matchId}/comm
+        return api_get(f"/mcenter/v1/{match_id}/comm", headers=headers)
+    # Endpoint: /mcenter/v1/{matchId}/hcomm?iid=&tms=
+    return api_get(f"/mcenter/v1/{match_id}/hcomm", headers=headers,
+                   params={"iid": innings or 1, "tms": before_ts})
+
+
+def get_series_archive(category: str, headers: dict, year: Optional[int] = None):
+    """
+    Get past series of one category
+
+    Args:
+        category: international, league, domestic or women
+        headers: API request headers
+        year: Only series of this year (default: the API's most recent page)
+
+    Returns:
+        tuple: (status_code, series_archive)
+    """
+    # Endpoint: /series/v1/archives/{category}
+    key = f"{category}:{year}" if year else category
+    return api_get(f"/series/v1/archives/{category}", headers=headers,
+                   params={"year": year} if year else None, archive=(SERIES_ARCHIVE, key))
+
+
+def get_series_matches(series_id: int, headers: dict):
+    """
+    Get every match of a series
+
+    Args:
+        series_id: Series ID
+        headers: API request headers
+
+    Returns:
+        tuple: (status_code, series_matches)
+    """
+    # Endpoint: /series/v1/{seriesId}
+    return api_get(f"/series/v1/{series_id}", headers=headers, archive=(SERIES_MATCHES, series_id))
 
 
 def search_players(query: str, headers: dict):
@@ -117,7 +240,8 @@ def search_players(query: str, headers: dict):
         tuple: (status_code, search_results)
     """
     # Endpoint: /stats/v1/player/search with parameter plrN
-    status, data = api_get("/stats/v1/player/search", headers=headers, params={"plrN": query})
+    status, data = api_get("/stats/v1/player/search", headers=headers, params={"plrN": query},
+                           archive=(PLAYER_SEARCH, query))
     return status, data
 
 
@@ -133,7 +257,8 @@ def get_player_info(player_id: int, headers: dict):
         tuple: (status_code, player_info)
     """
     # Endpoint: /stats/v1/player/{playerId}
-    status, data = api_get(f"/stats/v1/player/{player_id}", headers=headers)
+    status, data = api_get(f"/stats/v1/player/{player_id}", headers=headers,
+                           archive=(PLAYER_INFO, player_id))
     return status, data
 
 
@@ -149,7 +274,8 @@ def get_player_batting(player_id: int, headers: dict):
         tuple: (status_code, batting_stats)
     """
     # Endpoint: /stats/v1/player/{playerId}/batting
-    status, data = api_get(f"/stats/v1/player/{player_id}/batting", headers=headers)
+    status, data = api_get(f"/stats/v1/player/{player_id}/batting", headers=headers,
+                           archive=(PLAYER_BATTING, player_id))
     return status, data
 
 
@@ -165,10 +291,33 @@ def get_player_bowling(player_id: int, headers: dict):
         tuple: (status_code, bowling_stats)
     """
     # Endpoint: /stats/v1/player/{playerId}/bowling
-    status, data = api_get(f"/stats/v1/player/{player_id}/bowling", headers=headers)
+    status, data = api_get(f"/stats/v1/player/{player_id}/bowling", headers=headers,
+                           archive=(PLAYER_BOWLING, player_id))
     return status, data
 
 
+def submit_player_request(fn, *args) -> Future:
+    """
+    Run a player request on the shared thread pool
+
+    A player view submits its profile, batting and bowling requests together,
+    so it costs about the slowest of the calls instead of their sum, and each
+    section can render as soon as its own request finishes.
+
+    Args:
+        fn: Request function, e.g. get_player_info
+        *args: Its arguments
+
+    Returns:
+        Future: Resolves to fn's result
+    """
+    global _player_pool
+    with _player_pool_lock:
+        if _player_pool is None:
+            _player_pool = ThreadPoolExecutor(PLAYER_FETCH_WORKERS, thread_name_prefix="player-fetch")
+    return _player_pool.submit(fn, *args)
+
+
 def fetch_team_players(team_id: int, headers: dict):
     """
     Fetch all players from a specific team
@@ -181,6 +330,50 @@ def fetch_team_players(team_id: int, headers: dict):
         tuple: (status_code, players_data)
     """
     # Endpoint: /teams/v1/{teamId}/players
-    url = f"https://cricbuzz-cricket.p.rapidapi.com/teams/v1/{team_id}/players"
+    url = f"{API_BASE_URL}/teams/v1/{team_id}/players"
     r = requests.get(url, headers=headers, timeout=20)
-    return r.status_code, r.json() if r.status_code == 200 else r.text
+    if r.status_code != 200:
+        return r.status_code, r.text
+    archive_response(TEAM_PLAYERS, team_id, r.content)
+    return r.status_code, loads(r.content)
+
+
+def fetch_teams(category: str, headers: dict):
+    """
+    Fetch the teams of one category
+
+    Args:
+        category: One of TEAM_CATEGORIES
+        headers: API request headers
+
+    Returns:
+        tuple: (status_code, teams_data)
+    """
+    # Endpoint: /teams/v1/{category}
+    return api_get(f"/teams/v1/{category}", headers=headers, archive=(TEAM_LIST, category))
+
+
+class RateLimiter:
+    """
+    Spaces calls from any number of threads at most `rate` per second
+
+    Each wait() reserves the next free slot under a lock and sleeps outside
+    it, so concurrent workers queue up instead of bursting past the API's
+    request quota.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        """Block until the caller may make its request"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
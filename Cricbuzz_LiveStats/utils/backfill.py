@@ -0,0 +1,407 @@
+"""
+Resumable historical backfill for Cricbuzz LiveStats
+
+The live pages only store what is live when someone looks. The backfill
+walks the API's history instead: series archive pages list series, a series
+lists its matches, and every completed match gets its scorecard.
+
+Work is a queue of (kind, key) items in the `backfill_queue` table. Each item
+is checkpointed in the same transaction that writes its data and queues the
+items it discovered, so a run stopped by Ctrl+C, a crash, the request
+budget or an exhausted API quota resumes exactly where it left off:
+
+    archive 'international:2023' -> series 6732, 6733, ...
+    series 6732                  -> matches rows + scorecard 78901, ...
+    scorecard 78901              -> scorecards rows + toss/result header
+
+Fetcher threads call the API and parse responses; a single writer thread
+applies finished items in batches, one transaction per batch, so fetchers
+never wait on SQLite and the database sees few, short write transactions.
+
+Usage:
+    python -m utils.backfill run [--category international] [--years 2023 2024]
+                                 [--budget 200] [--workers 4]
+    python -m utils.backfill status
+    python -m utils.backfill retry      # re-queue failed items
+"""
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from db.init_sqlite import create_backfill_schema, create_raw_json_schema
+from utils.api_client import get_scorecard, get_series_archive, get_series_matches
+from utils.db_sync import MATCH_HEADER_MERGE_SQL, MATCH_UPSERT_SQL, SCORECARD_INSERT_SQL
+from utils.models import dumps, parse_scorecard, parse_series_archive, parse_series_matches
+
+DB_PATH = "db/cricbuzz.db"
+
+ARCHIVE = "archive"
+SERIES = "series"
+SCORECARD = "scorecard"
+
+# Deepest work first, so a series' scorecards finish before the next archive page
+_KIND_ORDER = f"CASE kind WHEN '{SCORECARD}' THEN 0 WHEN '{SERIES}' THEN 1 ELSE 2 END"
+
+# matchInfo.state of matches whose scorecards are final
+COMPLETE_STATES = ("Complete",)
+
+# Match IDs (of the json_each list) whose stored scorecard is final: its merged
+# matchHeader says the match was complete. A scorecard saved live mid-match has
+# no such header, so the match is backfilled again once it has finished.
+FINAL_SCORECARDS_SQL = """
+SELECT m.match_id FROM matches m
+WHERE m.match_id IN (SELECT value FROM json_each(?))
+  AND EXISTS (SELECT 1 FROM scorecards s WHERE s.match_id = m.match_id)
+  AND (json_extract(m.raw_json, '$.complete') = 1
+       OR json_extract(m.raw_json, '$.matchCompleteTimestamp') > 0)
+"""
+
+BACKFILL_WORKERS = 4
+# Fetched items per write transaction, and the longest a partial batch waits
+BACKFILL_BATCH_SIZE = 25
+BACKFILL_FLUSH_SECONDS = 0.5
+# Failed attempts before an item is parked as 'failed'
+MAX_ATTEMPTS = 3
+# RapidAPI's status for an exhausted quota / rate limit
+QUOTA_STATUS = 429
+
+# status: HTTP status, or None if the request raised
+Fetched = namedtuple("Fetched", ["kind", "key", "status", "rows", "children", "header", "error"])
+# stopped: 'done', 'budget', 'quota' or 'interrupted'
+BackfillReport = namedtuple("BackfillReport", ["requests", "done", "failed", "rows", "queued",
+                                               "pending", "stopped", "seconds"])
+
+_STOP = object()
+_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, creating the queue table once per process"""
+    global _schema_ready
+    conn = sqlite3.connect(DB_PATH)
+    if not _schema_ready:
+        create_raw_json_schema(conn)
+        create_backfill_schema(conn)
+        _schema_ready = True
+    return conn
+
+
+def queue_archives(categories: Sequence[str], years: Optional[Sequence[int]] = None) -> int:
+    """
+    Queue series archive pages (already queued ones are left as they are)
+
+    Args:
+        categories: international, league, domestic and/or women
+        years: One page per category and year (default: each category's latest page)
+
+    Returns:
+        int: Items newly queued
+    """
+    keys = [f"{c}:{y}" for c in categories for y in years] if years else list(categories)
+    conn = _connect()
+    try:
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO backfill_queue (kind, key, label, updated_at) VALUES (?, ?, ?, ?)",
+                [(ARCHIVE, key, f"{key} series", int(time.time())) for key in keys]
+            )
+            return conn.total_changes - before
+    finally:
+        conn.close()
+
+
+def _fetch(kind: str, key: str, headers: dict) -> Fetched:
+    """Fetcher thread: one API request, parsed into rows and child items"""
+    rows, children, header = [], [], None
+    try:
+        if kind == ARCHIVE:
+            category, _, year = key.partition(":")
+            status, data = get_series_archive(category, headers, int(year) if year else None)
+            if status == 200:
+                children = [(SERIES, str(s.series_id), s.name) for s in parse_series_archive(data)]
+        elif kind == SERIES:
+            status, data = get_series_matches(int(key), headers)
+            if status == 200:
+                matches = parse_series_matches(data)
+                rows = [m.row() for m in matches]
+                children = [(SCORECARD, str(m.match_id), m.label) for m in matches
+                            if m.state in COMPLETE_STATES]
+        else:
+            status, data = get_scorecard(int(key), headers)
+            if status == 200:
+                rows = [inn.row(int(key)) for inn in parse_scorecard(data)]
+                header = dumps(data["matchHeader"]) if data.get("matchHeader") else None
+    except Exception as e:
+        return Fetched(kind, key, None, [], [], None, f"{type(e).__name__}: {e}")
+    error = None if status == 200 else f"{status}: {str(data)[:200]}"
+    return Fetched(kind, key, status, rows, children, header, error)
+
+
+def _apply(conn: sqlite3.Connection, batch: List[Fetched]) -> Tuple[int, int]:
+    """
+    Writer: apply fetched items and checkpoint them, in the caller's transaction
+
+    Returns:
+        tuple: (data rows written, child items queued)
+    """
+    now = int(time.time())
+    rows = queued = 0
+    for f in batch:
+        if f.status == QUOTA_STATUS:
+            continue  # not the item's fault; it stays pending for the next run
+        if f.status != 200:
+            conn.execute(
+                "UPDATE backfill_queue SET attempts = attempts + 1, last_error = ?, updated_at = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE kind = ? AND key = ?",
+                (f.error, now, MAX_ATTEMPTS, f.kind, f.key)
+            )
+            continue
+
+        if f.kind == SERIES:
+            conn.executemany(MATCH_UPSERT_SQL, f.rows)
+        elif f.kind == SCORECARD:
+            match_id = int(f.key)
+            conn.execute("DELETE FROM scorecards WHERE match_id = ?", (match_id,))
+            conn.executemany(SCORECARD_INSERT_SQL, f.rows)
+            if f.header is not None:
+                conn.execute(MATCH_HEADER_MERGE_SQL, (f.header, match_id))
+        rows += len(f.rows)
+
+        children = f.children
+        if children and children[0][0] == SCORECARD:
+            # Skip matches whose final scorecard is stored; a partial one from live sync is redone
+            ids = [int(key) for _, key, _ in children]
+            final = {str(r[0]) for r in conn.execute(FINAL_SCORECARDS_SQL, (json.dumps(ids),))}
+            children = [c for c in children if c[1] not in final]
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO backfill_queue (kind, key, label, updated_at) VALUES (?, ?, ?, ?)",
+            [(kind, key, label, now) for kind, key, label in children]
+        )
+        queued += conn.total_changes - before
+        conn.execute(
+            "UPDATE backfill_queue SET status = 'done', last_error = NULL, updated_at = ? "
+            "WHERE kind = ? AND key = ?", (now, f.kind, f.key)
+        )
+    return rows, queued
+
+
+def _claim(conn: sqlite3.Connection, limit: int, exclude: set) -> List[Tuple[str, str]]:
+    """Next pending items not already being fetched, deepest kind first"""
+    items = conn.execute(
+        f"SELECT kind, key FROM backfill_queue WHERE status = 'pending' "
+        f"ORDER BY {_KIND_ORDER}, updated_at, key LIMIT ?", (limit + len(exclude),)
+    ).fetchall()
+    return [item for item in items if item not in exclude][:limit]
+
+
+def run_backfill(headers: dict, categories: Sequence[str] = ("international",),
+                 years: Optional[Sequence[int]] = None, budget: Optional[int] = None,
+                 workers: int = BACKFILL_WORKERS,
+                 batch_size: int = BACKFILL_BATCH_SIZE) -> BackfillReport:
+    """
+    Queue archive pages and work through the queue until it is empty or a limit is hit
+
+    Args:
+        headers: API request headers
+        categories: Series archive categories to start from
+        years: Archive years (default: latest page per category)
+        budget: Max API requests this run (None = no limit); a scorecard that
+                falls back to its second path counts once
+        workers: Concurrent fetcher threads
+        batch_size: Fetched items per write transaction
+
+    Returns:
+        BackfillReport
+    """
+    started = time.perf_counter()
+    queue_archives(categories, years)
+
+    results = queue.Queue()
+    in_flight = set()
+    cond = threading.Condition()
+    totals = Counter()
+    state = {"stopped": None, "error": None}
+
+    def on_fetched(future, item):
+        if future.cancelled():
+            # Never sent (run stopping); the item is still pending in the queue
+            with cond:
+                in_flight.discard(item)
+                totals["requests"] -= 1
+            return
+        fetched = future.result()
+        if fetched.status == QUOTA_STATUS:
+            with cond:
+                state["stopped"] = "quota"
+        results.put(fetched)
+
+    def writer():
+        conn = _connect()
+        try:
+            finished = False
+            while not finished:
+                batch = []
+                item = results.get()
+                while True:
+                    if item is _STOP:
+                        finished = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= batch_size:
+                        break
+                    try:
+                        item = results.get(timeout=BACKFILL_FLUSH_SECONDS)
+                    except queue.Empty:
+                        break
+                if not batch:
+                    continue
+                with conn:
+                    rows, queued = _apply(conn, batch)
+                with cond:
+                    totals["rows"] += rows
+                    totals["queued"] += queued
+                    for f in batch:
+                        totals["done" if f.status == 200 else "failed" if f.status != QUOTA_STATUS else "quota"] += 1
+                        in_flight.discard((f.kind, f.key))
+                    cond.notify_all()
+        except BaseException as e:
+            with cond:
+                state["error"] = e
+                in_flight.clear()
+                cond.notify_all()
+        finally:
+            conn.close()
+
+    writer_thread = threading.Thread(target=writer, name="backfill-writer", daemon=True)
+    writer_thread.start()
+    pool = ThreadPoolExecutor(max(1, workers), thread_name_prefix="backfill-fetch")
+    reader = _connect()
+    capacity = max(1, workers) * 2  # keep fetchers busy while the writer commits
+    try:
+        while True:
+            with cond:
+                while len(in_flight) >= capacity and state["error"] is None:
+                    cond.wait()
+                if state["error"] is not None or state["stopped"]:
+                    break
+                claimed = set(in_flight)
+            if budget is not None and totals["requests"] >= budget:
+                state["stopped"] = "budget"
+                break
+            limit = capacity - len(claimed)
+            if budget is not None:
+                limit = min(limit, budget - totals["requests"])
+            items = _claim(reader, limit, claimed)
+            if not items:
+                with cond:
+                    if not in_flight:
+                        break
+                    # Wait for the writer to checkpoint and queue what was found
+                    cond.wait(timeout=BACKFILL_FLUSH_SECONDS * 2)
+                continue
+            for kind, key in items:
+                with cond:
+                    in_flight.add((kind, key))
+                totals["requests"] += 1
+                future = pool.submit(_fetch, kind, key, headers)
+                future.add_done_callback(lambda f, item=(kind, key): on_fetched(f, item))
+    except KeyboardInterrupt:
+        state["stopped"] = "interrupted"
+    finally:
+        # Fetches already running finish and are checkpointed; queued ones stay pending
+        pool.shutdown(wait=True, cancel_futures=True)
+        results.put(_STOP)
+        writer_thread.join()
+        reader.close()
+
+    if state["error"] is not None:
+        raise state["error"]
+    pending = queue_status().get("pending", 0)
+    return BackfillReport(totals["requests"], totals["done"], totals["failed"], totals["rows"],
+                          totals["queued"], pending, state["stopped"] or "done",
+                          round(time.perf_counter() - started, 2))
+
+
+def queue_status() -> Dict[str, int]:
+    """
+    Count queued items by status
+
+    Returns:
+        dict: {status: count, 'kind/status': count}
+    """
+    conn = _connect()
+    try:
+        counts = {}
+        for kind, status, n in conn.execute(
+            "SELECT kind, status, COUNT(*) FROM backfill_queue GROUP BY kind, status"
+        ):
+            counts[status] = counts.get(status, 0) + n
+            counts[f"{kind}/{status}"] = n
+        return counts
+    finally:
+        conn.close()
+
+
+def retry_failed(kinds: Optional[Iterable[str]] = None) -> int:
+    """
+    Put failed items back in the queue with a fresh attempt count
+
+    Returns:
+        int: Items re-queued
+    """
+    sql = "UPDATE backfill_queue SET status = 'pending', attempts = 0 WHERE status = 'failed'"
+    kinds = list(kinds or ())
+    if kinds:
+        sql += f" AND kind IN ({', '.join('?' * len(kinds))})"
+    conn = _connect()
+    try:
+        with conn:
+            return conn.execute(sql, kinds).rowcount
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill historical series, matches and scorecards")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="Work through the queue (resumes a previous run)")
+    p_run.add_argument("--category", nargs="+", default=["international"],
+                       choices=["international", "league", "domestic", "women"])
+    p_run.add_argument("--years", nargs="+", type=int, default=None)
+    p_run.add_argument("--budget", type=int, default=None, help="Max API requests this run")
+    p_run.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    p_run.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    sub.add_parser("status", help="Show queue progress")
+    p_retry = sub.add_parser("retry", help="Re-queue failed items")
+    p_retry.add_argument("--kind", nargs="+", choices=[ARCHIVE, SERIES, SCORECARD], default=None)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        for name, n in sorted(queue_status().items()):
+            print(f"{name:<20} {n}")
+    elif args.command == "retry":
+        print(f"{retry_failed(args.kind)} items re-queued")
+    else:
+        from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
+        headers = {
+            "X-RapidAPI-Key": RAPID_API_KEY,
+            "X-RapidAPI-Host": RAPID_API_HOST
+        }
+        r = run_backfill(headers, args.category, args.years, args.budget, args.workers, args.batch_size)
+        print(f"{r.requests} requests in {r.seconds:.1f}s: {r.done} done, {r.failed} failed, "
+              f"{r.rows} rows written, {r.queued} items discovered")
+        print(f"Stopped: {r.stopped}; {r.pending} items pending"
+              + (" - run again to resume" if r.pending else ""))
+
+
+if __name__ == "__main__":
+    main()
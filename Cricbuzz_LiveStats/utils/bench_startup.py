@@ -0,0 +1,218 @@
+"""
+Startup benchmark for Cricbuzz LiveStats
+
+Measures, each in a fresh interpreter so nothing is already imported:
+
+- cold start: `python -X importtime` cumulative import time of main.py's
+  dependencies and of every page module, with the heaviest imports listed
+- first paint: wall time of the first full script run of main.py for each page
+  (via streamlit.testing.v1.AppTest, no browser or server needed)
+
+Results are appended to db/benchmarks/startup.jsonl and compared with the
+previous run so regressions show up as deltas.
+
+Usage:
+    python -m utils.bench_startup [--top 10] [--no-paint] [--no-save]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+HISTORY_PATH = "db/benchmarks/startup.jsonl"
+
+# Mirrors main.PAGES; main.py itself cannot be imported outside `streamlit run`
+PAGE_MODULES = {
+    "🏠 Home": "pages.home",
+    "📊 Live Scores": "pages.live_scores",
+    "👤 Player Stats": "pages.player_stats",
+    "📈 SQL Analytics": "pages.sql_analytics",
+    "⚙️ CRUD Operations": "pages.crud_operations",
+}
+
+# What main.py imports before routing to a page
+SHELL_IMPORTS = "import importlib, os, sys, time, datetime, streamlit"
+
+_FIRST_PAINT_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=120)
+at.session_state["page"] = sys.argv[1]
+started = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - started
+print(json.dumps({"ms": elapsed * 1000, "errors": [str(e.value) for e in at.exception]}))
+"""
+
+
+def _run_python(args: List[str]) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter from the app directory"""
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parse `-X importtime` output
+
+    Args:
+        stderr: Interpreter stderr
+
+    Returns:
+        list: (module, self_us, cumulative_us, depth) per import, in output order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure_imports(statement: str) -> Dict:
+    """
+    Measure the cold import cost of a statement
+
+    Args:
+        statement: Python import statement, e.g. "import pages.home"
+
+    Returns:
+        dict: total_ms (sum of top-level cumulative times), rows and error
+    """
+    result = _run_python(["-X", "importtime", "-c", statement])
+    rows = parse_importtime(result.stderr)
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+    return {
+        "total_ms": sum(r[2] for r in rows if r[3] == 0) / 1000,
+        "rows": rows,
+        "error": error,
+    }
+
+
+def measure_first_paint(label: str) -> Dict:
+    """
+    Time the first script run of main.py on one page in a fresh interpreter
+
+    Args:
+        label: Page label as shown in the sidebar
+
+    Returns:
+        dict: ms and error (None on success)
+    """
+    result = _run_python(["-c", _FIRST_PAINT_SNIPPET, label])
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"ms": None, "error": lines[-1] if lines else "failed"}
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"ms": data["ms"], "error": "; ".join(data["errors"]) or None}
+
+
+def heaviest(rows: List[Tuple[str, int, int, int]], top: int) -> List[Tuple[str, float]]:
+    """Top-level packages by cumulative import time (ms)"""
+    by_package: Dict[str, int] = {}
+    for name, _, cumulative_us, depth in rows:
+        if depth == 0:
+            package = name.split(".")[0]
+            by_package[package] = by_package.get(package, 0) + cumulative_us
+    ranked = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return [(name, us / 1000) for name, us in ranked]
+
+
+def run_benchmark(top: int = 10, paint: bool = True) -> Dict:
+    """
+    Run the full startup benchmark
+
+    Args:
+        top: Number of heaviest packages to report per page
+        paint: Also measure first paint (requires streamlit)
+
+    Returns:
+        dict: Results keyed by "shell" and page label
+    """
+    shell = measure_imports(SHELL_IMPORTS)
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "shell": {"import_ms": shell["total_ms"], "error": shell["error"]},
+        "pages": {},
+    }
+    for label, module in PAGE_MODULES.items():
+        page = measure_imports(f"{SHELL_IMPORTS}; import {module}")
+        entry = {
+            "import_ms": page["total_ms"],
+            "page_only_ms": max(page["total_ms"] - shell["total_ms"], 0.0),
+            "heaviest": heaviest(page["rows"], top),
+            "error": page["error"],
+        }
+        if paint:
+            entry["first_paint"] = measure_first_paint(label)
+        results["pages"][label] = entry
+    return results
+
+
+def _last_run(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                last = line
+    return json.loads(last) if last else None
+
+
+def _delta(now: Optional[float], before: Optional[float]) -> str:
+    if now is None or before is None:
+        return ""
+    return f" ({now - before:+.0f} ms)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Cricbuzz LiveStats cold start and first paint")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest packages to list per page")
+    parser.add_argument("--no-paint", action="store_true", help="Skip the first-paint measurement")
+    parser.add_argument("--no-save", action="store_true", help=f"Do not append results to {HISTORY_PATH}")
+    args = parser.parse_args()
+
+    previous = _last_run(HISTORY_PATH)
+    results = run_benchmark(args.top, paint=not args.no_paint)
+
+    prev_pages = previous["pages"] if previous else {}
+    shell_ms = results["shell"]["import_ms"]
+    prev_shell = previous["shell"]["import_ms"] if previous else None
+    print(f"App shell imports: {shell_ms:.0f} ms{_delta(shell_ms, prev_shell)}")
+    for label, entry in results["pages"].items():
+        before = prev_pages.get(label, {})
+        print(f"\n{label}")
+        if entry["error"]:
+            print(f"  import error: {entry['error']}")
+        print(f"  cold import: {entry['import_ms']:.0f} ms{_delta(entry['import_ms'], before.get('import_ms'))}"
+              f"  (page only {entry['page_only_ms']:.0f} ms)")
+        if "first_paint" in entry:
+            paint = entry["first_paint"]
+            if paint["ms"] is not None:
+                prev_paint = before.get("first_paint", {}).get("ms")
+                print(f"  first paint: {paint['ms']:.0f} ms{_delta(paint['ms'], prev_paint)}")
+            if paint["error"]:
+                print(f"  first paint error: {paint['error']}")
+        for name, ms in entry["heaviest"]:
+            print(f"    {ms:8.1f} ms  {name}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(HISTORY_PATH), exist_ok=True)
+        with open(HISTORY_PATH, "a") as f:
+            f.write(json.dumps(results, ensure_ascii=False) + "\n")
+        print(f"\nSaved to {HISTORY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Sync throughput benchmark for Cricbuzz LiveStats
+
+Runs the same large scorecard (or roster) sync with sync_workers at several
+worker counts against a local API stand-in, so the numbers measure decoding,
+parsing and writing rather than the network or the API quota.
+
+The stand-in is a small http.server in its own process serving the two
+endpoints the sync uses, with deterministic synthetic payloads the size and
+shape of real ones (a Test scorecard with full batting, bowling, fall of
+wickets and partnership lists; a 25-player roster). Each run writes to a
+fresh temporary copy of the schema, never to db/cricbuzz.db.
+
+Results are appended to db/benchmarks/sync.jsonl.
+
+Usage:
+    python -m utils.bench_sync run [--kind scorecard] [--jobs 400] [--workers 0 1 2 4] [--latency 20]
+    python -m utils.bench_sync serve [--port 8765] [--latency 20]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Sequence
+
+from utils.sync_workers import (
+    ROSTER_JOB, SCORECARD_JOB, SYNC_CHUNK_JOBS, roster_jobs, run_sync, scorecard_jobs
+)
+
+HISTORY_PATH = "db/benchmarks/sync.jsonl"
+
+BENCH_JOBS = 400
+BENCH_HEADERS = {"X-RapidAPI-Key": "bench", "X-RapidAPI-Host": "localhost"}
+
+_SCORECARD_RE = re.compile(r"^/mcenter/v1/(\d+)/h?scard$")
+_ROSTER_RE = re.compile(r"^/teams/v1/(\d+)/players$")
+_ROSTER_SECTIONS = (("BATSMEN", 8), ("ALL ROUNDER", 6), ("WICKET KEEPER", 3), ("BOWLER", 8))
+
+
+# ---------------- local API stand-in ----------------
+
+def fake_scorecard(match_id: int) -> dict:
+    """Deterministic scorecard payload shaped like /mcenter/v1/{id}/hscard"""
+    rnd = random.Random(match_id)
+    teams = ("India", "Australia")
+    innings = []
+    for i in range(4):
+        batters = [{
+            "id": match_id * 100 + i * 11 + b, "name": f"Batter {b + 1} {teams[i % 2]}",
+            "nickname": f"B{b + 1}", "runs": rnd.randint(0, 150), "balls": rnd.randint(1, 250),
+            "fours": rnd.randint(0, 15), "sixes": rnd.randint(0, 5),
+            "strkrate": f"{rnd.uniform(20, 150):.2f}", "outdec": "c Fielder b Bowler",
+            "iscaptain": b == 0, "iskeeper": b == 6, "isoverseas": False,
+        } for b in range(11)]
+        bowlers = [{
+            "id": match_id * 100 + 50 + i * 6 + w, "name": f"Bowler {w + 1} {teams[(i + 1) % 2]}",
+            "overs": f"{rnd.randint(5, 30)}.{rnd.randint(0, 5)}", "maidens": rnd.randint(0, 8),
+            "runs": rnd.randint(10, 120), "wickets": rnd.randint(0, 5),
+            "economy": f"{rnd.uniform(2, 7):.2f}", "no_balls": rnd.randint(0, 3), "wides": rnd.randint(0, 3),
+        } for w in range(6)]
+        innings.append({
+            "inningsid": i + 1, "batteamname": teams[i % 2], "batteamsname": teams[i % 2][:3].upper(),
+            "score": sum(b["runs"] for b in batters), "wickets": 10, "overs": rnd.randint(60, 140),
+            "runrate": round(rnd.uniform(2, 5), 2),
+            "extras": {"byes": rnd.randint(0, 8), "legbyes": rnd.randint(0, 8), "wides": rnd.randint(0, 8),
+                       "noballs": rnd.randint(0, 8), "penalty": 0, "total": rnd.randint(0, 30)},
+            "batsman": batters,
+            "bowler": bowlers,
+            "fow": {"fow": [{"batsmanid": b["id"], "batsmanname": b["name"], "overnbr": rnd.uniform(1, 140),
+                             "runs": rnd.randint(0, 500), "ballnbr": rnd.randint(1, 840)} for b in batters[:10]]},
+            "partnership": {"partnership": [{"bat1id": batters[p]["id"], "bat1name": batters[p]["name"],
+                                             "bat1runs": rnd.randint(0, 100), "bat1balls": rnd.randint(0, 200),
+                                             "bat2id": batters[p + 1]["id"], "bat2name": batters[p + 1]["name"],
+                                             "bat2runs": rnd.randint(0, 100), "bat2balls": rnd.randint(0, 200),
+                                             "totalruns": rnd.randint(0, 200), "totalballs": rnd.randint(0, 400)}
+                                            for p in range(10)]},
+        })
+    return {
+        "scorecard": innings,
+        "matchHeader": {"matchId": match_id, "matchFormat": "TEST", "state": "Complete",
+                        "status": f"{teams[0]} won by {rnd.randint(1, 300)} runs",
+                        "tossResults": {"tossWinnerName": teams[rnd.randint(0, 1)], "decision": "Batting"}},
+        "isMatchComplete": True,
+    }
+
+
+def fake_roster(team_id: int) -> dict:
+    """Deterministic roster payload shaped like /teams/v1/{id}/players"""
+    items = []
+    n = 0
+    for section, size in _ROSTER_SECTIONS:
+        items.append({"name": section, "imageId": 0})
+        for _ in range(size):
+            n += 1
+            items.append({"id": team_id * 1000 + n, "name": f"Player {n} of {team_id}", "imageId": n,
+                          "battingStyle": "Right-hand bat", "bowlingStyle": "Right-arm medium"})
+    return {"player": items, "url": f"/teams/{team_id}"}
+
+
+@lru_cache(maxsize=4096)
+def _payload(path: str):
+    m = _SCORECARD_RE.match(path)
+    if m:
+        return json.dumps(fake_scorecard(int(m.group(1)))).encode()
+    m = _ROSTER_RE.match(path)
+    if m:
+        return json.dumps(fake_roster(int(m.group(1)))).encode()
+    return None
+
+
+class _FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        body = _payload(self.path.split("?", 1)[0])
+        status = 200 if body is not None else 404
+        body = body if body is not None else b'{"message": "not found"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fake_api(port: int, latency_ms: float = 0.0):
+    """Serve the API stand-in on 127.0.0.1:port until killed"""
+    _FakeApiHandler.latency = latency_ms / 1000
+    ThreadingHTTPServer(("127.0.0.1", port), _FakeApiHandler).serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+# ---------------- benchmark ----------------
+
+def _template_db(path: str):
+    """Create the app schema in a scratch database"""
+    from db import init_sqlite
+
+    default = init_sqlite.DB_PATH
+    init_sqlite.DB_PATH = path
+    try:
+        init_sqlite.main()
+    finally:
+        init_sqlite.DB_PATH = default
+
+
+def run_benchmark(kind: str = SCORECARD_JOB, jobs: int = BENCH_JOBS,
+                  workers: Sequence[int] = (0, 1, 2, 4), latency_ms: float = 0.0,
+                  chunk_jobs: int = SYNC_CHUNK_JOBS) -> Dict:
+    """
+    Time one sync per worker count against the local API stand-in
+
+    Args:
+        kind: SCORECARD_JOB or ROSTER_JOB
+        jobs: Scorecards / rosters per sync
+        workers: Worker counts to compare (0 = in-process, the baseline)
+        latency_ms: Delay the stand-in adds to each response
+        chunk_jobs: Jobs per worker task
+
+    Returns:
+        dict: Run settings and per worker count: seconds, jobs_per_s, rows_per_s, speedup, failed
+    """
+    if kind == SCORECARD_JOB:
+        job_list = scorecard_jobs(range(1, jobs + 1))
+    else:
+        job_list = roster_jobs([{"team_id": t, "name": f"Team {t}", "category": "international"}
+                                for t in range(1, jobs + 1)])
+
+    port = _free_port()
+    server = multiprocessing.get_context("spawn").Process(
+        target=serve_fake_api, args=(port, latency_ms), daemon=True)
+    server.start()
+    scratch = tempfile.mkdtemp(prefix="bench_sync_")
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "kind": kind, "jobs": jobs, "latency_ms": latency_ms, "chunk_jobs": chunk_jobs,
+        "runs": [],
+    }
+    try:
+        _wait_for_port(port)
+        template = os.path.join(scratch, "template.db")
+        _template_db(template)
+        base_url = f"http://127.0.0.1:{port}"
+        # Warm the stand-in's payload cache so every run sees the same server cost
+        run_sync(job_list, BENCH_HEADERS, 0, chunk_jobs, base_url,
+                 shutil.copy(template, os.path.join(scratch, "warmup.db")), archive=False)
+
+        baseline = None
+        for n in workers:
+            db_path = shutil.copy(template, os.path.join(scratch, f"run_{n}.db"))
+            report = run_sync(job_list, BENCH_HEADERS, n, chunk_jobs, base_url, db_path, archive=False)
+            seconds = report.seconds or 1e-9
+            baseline = baseline or seconds
+            results["runs"].append({
+                "workers": n,
+                "seconds": report.seconds,
+                "jobs_per_s": round(report.jobs / seconds, 1),
+                "rows_per_s": round(report.rows / seconds, 1),
+                "speedup": round(baseline / seconds, 2),
+                "failed": report.failed,
+            })
+    finally:
+        server.terminate()
+        server.join()
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-process sync throughput against a local API stand-in")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_run = sub.add_parser("run", help="Time syncs at several worker counts")
+    p_run.add_argument("--kind", choices=(SCORECARD_JOB, ROSTER_JOB), default=SCORECARD_JOB)
+    p_run.add_argument("--jobs", type=int, default=BENCH_JOBS)
+    p_run.add_argument("--workers", type=int, nargs="+", default=None,
+                       help="Worker counts (default: 0, 1, 2, 4 ... up to the core count)")
+    p_run.add_argument("--latency", type=float, default=0.0, help="Added ms per API response")
+    p_run.add_argument("--chunk", type=int, default=SYNC_CHUNK_JOBS, help="Jobs per worker task")
+    p_run.add_argument("--no-save", action="store_true", help=f"Do not append results to {HISTORY_PATH}")
+    p_serve = sub.add_parser("serve", help="Only run the API stand-in (point --base-url at it)")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--latency", type=float, default=0.0, help="Added ms per API response")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        print(f"API stand-in on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+        try:
+            serve_fake_api(args.port, args.latency)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    workers = args.workers
+    if workers is None:
+        cpus = os.cpu_count() or 1
+        workers = [0] + [n for n in (1, 2, 4, 8, 16, 32) if n < cpus] + [cpus]
+    results = run_benchmark(args.kind, args.jobs, workers, args.latency, args.chunk)
+
+    print(f"{results['jobs']} {results['kind']} jobs, {results['cpus']} CPUs, "
+          f"{results['latency_ms']:.0f} ms stand-in latency")
+    print(f"{'workers':>8} {'seconds':>9} {'jobs/s':>9} {'rows/s':>10} {'speedup':>8}")
+    for run in results["runs"]:
+        label = "in-proc" if run["workers"] == 0 else str(run["workers"])
+        failed = f"  ({run['failed']} failed)" if run["failed"] else ""
+        print(f"{label:>8} {run['seconds']:>9.2f} {run['jobs_per_s']:>9.1f} {run['rows_per_s']:>10.1f} "
+              f"{run['speedup']:>7.2f}x{failed}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(HISTORY_PATH), exist_ok=True)
+        with open(HISTORY_PATH, "a") as f:
+            f.write(json.dumps(results) + "\n")
+        print(f"\nSaved to {HISTORY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Career batting and bowling statistics for Cricbuzz LiveStats
+
+The player batting / bowling endpoints return a grid of strings: `headers`
+lists the formats and each `values` row is a stat followed by one cell per
+format. The whole grid is converted to numbers in one vectorized pass and
+stored in typed tables (career_batting / career_bowling) keyed by
+(player_id, format, stat), so pages and SQL read career stats locally and
+the API is only called when a player's copy is older than CAREER_STATS_TTL.
+
+Usage:
+    python -m utils.career_stats refresh <player_id> [<player_id> ...]
+    python -m utils.career_stats show <player_id> [--kind bowling]
+"""
+import argparse
+import sqlite3
+import time
+from collections import namedtuple
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple, Union
+
+from db.init_sqlite import CAREER_TABLES, create_career_stats_schema, create_change_log_schema
+from utils.api_client import get_player_batting, get_player_bowling, submit_player_request
+from utils.write_queue import run_write
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DB_PATH = "db/cricbuzz.db"
+
+BATTING = "batting"
+BOWLING = "bowling"
+
+# Seconds a player's stored career stats are served before refetching
+CAREER_STATS_TTL = 24 * 3600
+
+_FETCHERS = {BATTING: get_player_batting, BOWLING: get_player_bowling}
+
+# values: stat x format floats (NaN where not numeric); text: the API's strings
+CareerStats = namedtuple("CareerStats", ["fetched_at", "values", "text"])
+
+_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, creating the career tables once per process"""
+    global _schema_ready
+    conn = sqlite3.connect(DB_PATH)
+    if not _schema_ready:
+        create_career_stats_schema(conn)
+        create_change_log_schema(conn)  # capture triggers for career_fetches
+        _schema_ready = True
+    return conn
+
+
+def parse_career_stats(payload: dict) -> "pd.DataFrame":
+    """
+    Convert a batting / bowling payload into typed long-form rows
+
+    Args:
+        payload: Response with `headers` (ROWHEADER + formats) and `values` rows
+
+    Returns:
+        DataFrame: format, stat, value (float, NaN if not numeric), raw,
+                   format_pos, stat_pos - one row per cell
+    """
+    import pandas as pd  # deferred: only needed when stats are refreshed
+
+    formats = list((payload.get("headers") or [])[1:])
+    rows = [r.get("values") or [] for r in payload.get("values") or ()]
+    rows = [r for r in rows if r]
+    width = len(formats)
+    grid = pd.DataFrame(
+        [(list(r[1:]) + [None] * width)[:width] for r in rows],
+        index=[str(r[0]) for r in rows], columns=formats
+    )
+    grid["stat_pos"] = range(len(grid))
+
+    cells = grid.rename_axis("stat").reset_index().melt(
+        id_vars=["stat", "stat_pos"], var_name="format", value_name="raw"
+    )
+    cells["format_pos"] = cells["format"].map({f: i for i, f in enumerate(formats)})
+    # '183*' (not out), '1,234' and '-' in one pass over every cell
+    text = cells["raw"].astype("string").str.strip()
+    cells["value"] = pd.to_numeric(text.str.replace(r"[*,]", "", regex=True), errors="coerce")
+    cells["raw"] = text
+    cells = cells.drop_duplicates(["format", "stat"], keep="last")
+    return cells[["format", "stat", "value", "raw", "format_pos", "stat_pos"]]
+
+
+def _replace_career_stats(conn: sqlite3.Connection, table: str, player_id: int, kind: str, rows: list):
+    """Write operation: swap in a player's cells of one kind and stamp the fetch"""
+    conn.execute(f"DELETE FROM {table} WHERE player_id = ?", (player_id,))
+    conn.executemany(
+        f"INSERT INTO {table} (player_id, format, stat, value, raw, format_pos, stat_pos) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+    )
+    conn.execute(
+        "INSERT INTO career_fetches (player_id, kind, fetched_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(player_id, kind) DO UPDATE SET fetched_at = excluded.fetched_at",
+        (player_id, kind, int(time.time()))
+    )
+
+
+def save_career_stats(player_id: int, kind: str, payload: dict) -> int:
+    """
+    Replace a player's stored stats of one kind with a fresh payload
+
+    The write goes through the process write queue and is committed when
+    this returns, so the stats can be read back straight away.
+
+    Args:
+        player_id: Player ID
+        kind: BATTING or BOWLING
+        payload: Raw batting / bowling response
+
+    Returns:
+        int: Number of cells stored
+    """
+    table = CAREER_TABLES[kind]
+    cells = parse_career_stats(payload)
+    # Python scalars with None for NaN / NA, as sqlite3 expects
+    cells = cells.astype(object).where(cells.notna(), None)
+    rows = [(player_id, *cell) for cell in cells.itertuples(index=False, name=None)]
+
+    if not _schema_ready:
+        _connect().close()  # the writer never changes the schema
+    run_write(_replace_career_stats, table, player_id, kind, rows)
+    return len(rows)
+
+
+def fetched_at(player_id: int, kind: str) -> Optional[int]:
+    """
+    Get when a player's stats of one kind were last stored
+
+    Returns:
+        int: Unix time, or None if never
+    """
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT fetched_at FROM career_fetches WHERE player_id = ? AND kind = ?", (player_id, kind)
+        ).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def load_career_stats(player_id: int, kind: str) -> Optional[CareerStats]:
+    """
+    Read a player's stored stats of one kind
+
+    Args:
+        player_id: Player ID
+        kind: BATTING or BOWLING
+
+    Returns:
+        CareerStats with stat x format frames in API order, or None if not stored
+    """
+    import pandas as pd  # deferred: only query pages need pandas
+
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT fetched_at FROM career_fetches WHERE player_id = ? AND kind = ?", (player_id, kind)
+        ).fetchone()
+        if row is None:
+            return None
+        cells = pd.read_sql_query(
+            f"SELECT format, stat, value, raw, format_pos, stat_pos FROM {CAREER_TABLES[kind]} "
+            "WHERE player_id = ? ORDER BY stat_pos, format_pos",
+            conn, params=(player_id,)
+        )
+    finally:
+        conn.close()
+
+    stats = list(dict.fromkeys(cells["stat"]))
+    formats = list(cells.sort_values("format_pos")["format"].drop_duplicates())
+    values = cells.pivot(index="stat", columns="format", values="value").reindex(index=stats, columns=formats)
+    text = cells.pivot(index="stat", columns="format", values="raw").reindex(index=stats, columns=formats)
+    values.index.name = text.index.name = "Statistics"
+    values.columns.name = text.columns.name = None
+    return CareerStats(row[0], values, text)
+
+
+def refresh_career_stats(player_id: int, kind: str, headers: dict) -> Tuple[int, Union[int, str]]:
+    """
+    Fetch a player's stats of one kind from the API and store them
+
+    Args:
+        player_id: Player ID
+        kind: BATTING or BOWLING
+        headers: API request headers
+
+    Returns:
+        tuple: (status_code, cells stored or error text)
+    """
+    status, payload = _FETCHERS[kind](player_id, headers)
+    if status != 200 or not isinstance(payload, dict):
+        return status, payload
+    return status, save_career_stats(player_id, kind, payload)
+
+
+def get_career_stats(player_id: int, kind: str, headers: dict,
+                     ttl: int = CAREER_STATS_TTL) -> Tuple[Optional[int], Union[CareerStats, str]]:
+    """
+    Get a player's career stats, local first
+
+    Stored stats younger than `ttl` are returned without an API call. Older
+    ones are refreshed; if that fails the stale copy is still returned.
+
+    Args:
+        player_id: Player ID
+        kind: BATTING or BOWLING
+        headers: API request headers
+        ttl: Max age in seconds of stored stats
+
+    Returns:
+        tuple: (status_code, CareerStats or error text); 200 when served locally
+    """
+    stored = fetched_at(player_id, kind)
+    if stored is None or time.time() - stored > ttl:
+        status, result = refresh_career_stats(player_id, kind, headers)
+        if status != 200 and stored is None:
+            return status, result
+    stats = load_career_stats(player_id, kind)
+    if stats is None:
+        return None, "No career stats stored"
+    return 200, stats
+
+
+def ensure_career_stats(player_ids: Iterable[int], headers: dict,
+                        ttl: int = CAREER_STATS_TTL) -> Dict[Tuple[int, str], str]:
+    """
+    Refresh every missing or stale stat kind for several players, concurrently
+
+    Freshness is checked with one query; only the stale (player, kind) pairs
+    hit the API, all at once on the shared player request pool.
+
+    Args:
+        player_ids: Player IDs
+        headers: API request headers
+        ttl: Max age in seconds of stored stats
+
+    Returns:
+        dict: Error text per (player_id, kind) whose refresh failed
+    """
+    player_ids = list(dict.fromkeys(int(p) for p in player_ids))
+    if not player_ids:
+        return {}
+    conn = _connect()
+    try:
+        fresh = set(conn.execute(
+            f"SELECT player_id, kind FROM career_fetches WHERE fetched_at >= ? "
+            f"AND player_id IN ({', '.join('?' * len(player_ids))})",
+            (int(time.time()) - ttl, *player_ids)
+        ).fetchall())
+    finally:
+        conn.close()
+
+    futures = {
+        (player_id, kind): submit_player_request(refresh_career_stats, player_id, kind, headers)
+        for player_id in player_ids for kind in CAREER_TABLES
+        if (player_id, kind) not in fresh
+    }
+    errors = {}
+    for key, future in futures.items():
+        try:
+            status, result = future.result()
+            if status != 200:
+                errors[key] = f"{status}: {result}"
+        except Exception as e:
+            errors[key] = f"{type(e).__name__}: {e}"
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh or show stored career batting / bowling stats")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_refresh = sub.add_parser("refresh", help="Fetch stats from the API and store them")
+    p_refresh.add_argument("player_ids", nargs="+", type=int)
+    p_show = sub.add_parser("show", help="Print stored stats")
+    p_show.add_argument("player_id", type=int)
+    p_show.add_argument("--kind", choices=list(CAREER_TABLES), default=BATTING)
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
+        headers = {
+            "X-RapidAPI-Key": RAPID_API_KEY,
+            "X-RapidAPI-Host": RAPID_API_HOST
+        }
+        for player_id in args.player_ids:
+            for kind in CAREER_TABLES:
+                status, result = refresh_career_stats(player_id, kind, headers)
+                print(f"{player_id} {kind}: {f'{result} stats' if status == 200 else f'failed ({status})'}")
+    else:
+        stats = load_career_stats(args.player_id, args.kind)
+        if stats is None:
+            print("No stats stored")
+        else:
+            print(stats.text.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Change-data-capture utilities for Cricbuzz LiveStats
+
+Triggers on players, matches and scorecards append every row change to the
+change_log table (see db/init_sqlite.py). This module reads that log so caches,
+aggregate tables and exporters can refresh only what changed:
+
+- table_version(): cheap version number to use as a cache key
+- subscribe() + dispatch_changes(): in-process callbacks with changed keys per table
+- consume(): durable, cursor-based reads for out-of-process consumers
+"""
+import sqlite3
+import threading
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from db.init_sqlite import CHANGE_LOG_KEYS, create_change_log_schema
+
+DB_PATH = "db/cricbuzz.db"
+
+Change = namedtuple("Change", ["seq", "table", "key", "op"])
+
+# callback(changed_keys, last_seq) where changed_keys is {table: {row_key, ...}}
+ChangeCallback = Callable[[Dict[str, Set[int]], int], None]
+
+_schema_ready = False
+_subscribers: Dict[str, dict] = {}
+_dispatch_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, creating the change_log schema once per process"""
+    global _schema_ready
+    conn = sqlite3.connect(DB_PATH)
+    if not _schema_ready:
+        create_change_log_schema(conn)
+        _schema_ready = True
+    return conn
+
+
+def _table_filter(tables: Optional[Iterable[str]]) -> Tuple[str, tuple]:
+    """Build an optional `AND table_name IN (...)` clause"""
+    if not tables:
+        return "", ()
+    tables = tuple(tables)
+    unknown = set(tables) - set(CHANGE_LOG_KEYS)
+    if unknown:
+        raise ValueError(f"Tables not captured in change_log: {sorted(unknown)}")
+    return f" AND table_name IN ({', '.join('?' * len(tables))})", tables
+
+
+def latest_seq() -> int:
+    """
+    Get the newest change sequence number
+
+    Returns:
+        int: Highest seq in change_log (0 if empty)
+    """
+    conn = _connect()
+    try:
+        # AUTOINCREMENT high-water mark: O(1) and unaffected by pruning
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        return row[0] if row else 0
+    finally:
+        conn.close()
+
+
+def table_version(*tables: str) -> int:
+    """
+    Get a version number that changes whenever any of the given tables change
+
+    Pass it as an argument to an `st.cache_data` function so the cache entry
+    is only recomputed after a relevant write.
+
+    Args:
+        tables: Table names (default: all captured tables)
+
+    Returns:
+        int: Highest seq touching those tables (0 if none)
+    """
+    if not tables:
+        return latest_seq()
+    _table_filter(tables)
+    conn = _connect()
+    try:
+        # One index seek per table on (table_name, seq)
+        return max(
+            conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM change_log WHERE table_name = ?", (t,)
+            ).fetchone()[0]
+            for t in tables
+        )
+    finally:
+        conn.close()
+
+
+# Authorizer actions a read-only query may trigger while it is prepared
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                 getattr(sqlite3, "SQLITE_RECURSIVE", 33)}
+
+
+def query_tables(sql: str) -> Optional[Set[str]]:
+    """
+    Get the captured tables a read-only query depends on
+
+    The statement is prepared (not run) with an authorizer that records every
+    table it reads, views expanded. Only when all of them are captured in
+    change_log can table_version() of those tables key a cached result.
+
+    Args:
+        sql: One SQL statement
+
+    Returns:
+        set: Tables read, or None if the query writes, reads any table outside
+             CHANGE_LOG_KEYS or cannot be prepared
+    """
+    tables, other = set(), []
+
+    def _authorize(action, arg1, arg2, db_name, source):
+        if action == sqlite3.SQLITE_READ:
+            tables.add(arg1)
+        elif action not in _READ_ACTIONS:
+            other.append(action)
+        return sqlite3.SQLITE_OK
+
+    conn = _connect()
+    try:
+        conn.set_authorizer(_authorize)
+        conn.execute(f"EXPLAIN {sql}")
+    except (sqlite3.Error, sqlite3.Warning):
+        return None  # several statements, or tables only attached at query time
+    finally:
+        conn.close()
+    if tables and not other and tables <= set(CHANGE_LOG_KEYS):
+        return tables
+    return None
+
+
+def is_tracked_query(sql: str) -> bool:
+    """
+    Check whether a query only reads tables captured in change_log
+
+    Args:
+        sql: One SQL statement
+
+    Returns:
+        bool: True if it is a read-only query over CHANGE_LOG_KEYS tables only
+    """
+    return query_tables(sql) is not None
+
+
+def changes_since(seq: int, tables: Optional[Iterable[str]] = None,
+                  limit: int = 10000) -> List[Change]:
+    """
+    Read changes newer than a sequence number
+
+    Args:
+        seq: Last sequence number already seen
+        tables: Only return changes for these tables
+        limit: Maximum number of changes returned
+
+    Returns:
+        list: Change tuples (seq, table, key, op), oldest first
+    """
+    clause, params = _table_filter(tables)
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            f"SELECT seq, table_name, row_key, op FROM change_log WHERE seq > ?{clause} "
+            "ORDER BY seq LIMIT ?",
+            (seq, *params, limit)
+        ).fetchall()
+        return [Change(*r) for r in rows]
+    finally:
+        conn.close()
+
+
+def group_keys(changes: Iterable[Change]) -> Dict[str, Set[int]]:
+    """
+    Collapse changes into the set of affected keys per table
+
+    Args:
+        changes: Change tuples
+
+    Returns:
+        dict: {table: {row_key, ...}}
+    """
+    keys: Dict[str, Set[int]] = {}
+    for c in changes:
+        keys.setdefault(c.table, set()).add(c.key)
+    return keys
+
+
+def subscribe(name: str, callback: ChangeCallback, tables: Optional[Iterable[str]] = None,
+              from_seq: Optional[int] = None):
+    """
+    Register an in-process subscriber
+
+    The callback is invoked from dispatch_changes() with the keys changed since
+    its last delivery. Re-subscribing under the same name replaces the callback.
+
+    Args:
+        name: Unique subscriber name
+        callback: callback(changed_keys, last_seq)
+        tables: Only deliver changes for these tables (default: all)
+        from_seq: Start after this seq (default: the current latest seq)
+    """
+    tables = tuple(tables) if tables else None
+    _table_filter(tables)
+    with _dispatch_lock:
+        _subscribers[name] = {
+            "callback": callback,
+            "tables": tables,
+            "seq": latest_seq() if from_seq is None else from_seq,
+        }
+
+
+def unsubscribe(name: str):
+    """Remove an in-process subscriber"""
+    with _dispatch_lock:
+        _subscribers.pop(name, None)
+
+
+def dispatch_changes() -> int:
+    """
+    Deliver pending changes to every in-process subscriber
+
+    Callbacks run without the subscriber lock held, so they may subscribe or
+    unsubscribe. A subscriber whose callback raises keeps its position and
+    gets the same changes on the next dispatch; the others are still served
+    and the first error is re-raised at the end.
+
+    Returns:
+        int: Number of subscribers that received changes
+    """
+    with _dispatch_lock:
+        # A subscriber being served by another dispatch is left to that one
+        due = [(name, sub) for name, sub in _subscribers.items() if not sub.get("busy")]
+        for _, sub in due:
+            sub["busy"] = True
+
+    delivered, errors = 0, []
+    for name, sub in due:
+        last_seq = None
+        try:
+            changes = changes_since(sub["seq"], sub["tables"])
+            if changes:
+                sub["callback"](group_keys(changes), changes[-1].seq)
+                last_seq = changes[-1].seq
+        except Exception as e:
+            errors.append(e)
+        finally:
+            with _dispatch_lock:
+                sub["busy"] = False
+                # Skipped if the callback unsubscribed or was replaced meanwhile
+                if last_seq is not None and _subscribers.get(name) is sub:
+                    sub["seq"] = last_seq
+        if last_seq is not None:
+            delivered += 1
+    if errors:
+        raise errors[0]
+    return delivered
+
+
+def consume(consumer: str, tables: Optional[Iterable[str]] = None,
+            limit: int = 10000) -> List[Change]:
+    """
+    Read the next batch of changes for a durable consumer
+
+    The consumer's position is stored in change_cursors; call ack() once the
+    batch has been processed so a crash replays it instead of losing it.
+
+    Args:
+        consumer: Consumer name, e.g. "csv_export"
+        tables: Only return changes for these tables
+        limit: Maximum number of changes returned
+
+    Returns:
+        list: Change tuples after the consumer's cursor
+    """
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT seq FROM change_cursors WHERE consumer = ?", (consumer,)).fetchone()
+    finally:
+        conn.close()
+    return changes_since(row[0] if row else 0, tables, limit)
+
+
+def consumer_seq(consumer: str) -> int:
+    """
+    Get a durable consumer's cursor
+
+    Args:
+        consumer: Consumer name
+
+    Returns:
+        int: Last acknowledged seq (0 if the consumer never acked)
+    """
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT seq FROM change_cursors WHERE consumer = ?", (consumer,)).fetchone()
+        return row[0] if row else 0
+    finally:
+        conn.close()
+
+
+def ack(consumer: str, seq: int):
+    """
+    Advance a durable consumer's cursor
+
+    Args:
+        consumer: Consumer name
+        seq: Last processed sequence number
+    """
+    conn = _connect()
+    try:
+        conn.execute("""
+        INSERT INTO change_cursors (consumer, seq) VALUES (?, ?)
+        ON CONFLICT(consumer) DO UPDATE SET seq = MAX(seq, excluded.seq)
+        """, (consumer, seq))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def prune_change_log(keep_after: Optional[int] = None) -> int:
+    """
+    Delete change_log rows every consumer has already processed
+
+    Args:
+        keep_after: Keep changes newer than this seq (default: the lowest
+                    durable cursor, or everything if there are no consumers)
+
+    Returns:
+        int: Number of rows deleted
+    """
+    conn = _connect()
+    try:
+        if keep_after is None:
+            keep_after = conn.execute("SELECT MIN(seq) FROM change_cursors").fetchone()[0]
+            if keep_after is None:
+                return 0
+        with _dispatch_lock:
+            if _subscribers:
+                keep_after = min(keep_after, *(s["seq"] for s in _subscribers.values()))
+        # The newest row per table is kept so table_version() never goes backwards
+        cur = conn.execute("""
+        DELETE FROM change_log
+        WHERE seq <= ? AND seq NOT IN (SELECT MAX(seq) FROM change_log GROUP BY table_name)
+        """, (keep_after,))
+        deleted = cur.rowcount
+        conn.execute("""
+        INSERT INTO change_log_pruned (id, through_seq) VALUES (1, ?)
+        ON CONFLICT(id) DO UPDATE SET through_seq = MAX(through_seq, excluded.through_seq)
+        """, (keep_after,))
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
+
+
+def pruned_through() -> int:
+    """
+    Get the highest seq that pruning may have removed
+
+    A reader whose last seen seq is below this can no longer replay changes
+    incrementally and must reload from the tables.
+
+    Returns:
+        int: Pruning watermark (0 if never pruned)
+    """
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT through_seq FROM change_log_pruned WHERE id = 1").fetchone()
+        return row[0] if row else 0
+    finally:
+        conn.close()
@@ -0,0 +1,256 @@
+"""
+Incremental ball-by-ball commentary ingestion for Cricbuzz LiveStats
+
+Each match has a cursor: the timestamp of the newest ball already stored.
+The commentary endpoint has no "since" parameter, so an ingest reads the
+latest page (newest first) and only pages further back while that page's
+oldest entry is still newer than the cursor - a poll during a live match
+is one request, and full history is read once, the first time a match is
+ingested.
+
+Balls go into the append-only `balls` table as compact integer rows, with
+batter and bowler names kept in `commentary_players`; the cursor only moves
+once the new balls are known to join up with the stored ones, so a failed
+page is re-read on the next poll instead of leaving a gap.
+Per-over aggregates come from the `over_summary` view.
+
+Usage:
+    python -m utils.commentary ingest <match_id> [--follow 15]
+    python -m utils.commentary overs <match_id> [--innings 2]
+"""
+import argparse
+import sqlite3
+import time
+from collections import namedtuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from db.init_sqlite import create_commentary_schema
+from utils.api_client import get_commentary
+from utils.models import Ball, parse_commentary
+from utils.write_queue import run_write
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DB_PATH = "db/cricbuzz.db"
+
+BALL_INSERT_SQL = """
+INSERT OR IGNORE INTO balls
+(match_id, innings, ts, over, ball, runs, extras, extra_type, wicket, batter_id, bowler_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Pages read backwards in one ingest before the rest of the history is given up
+MAX_COMMENTARY_PAGES = 50
+
+# cursor: newest stored ball timestamp after the ingest (None if nothing stored)
+IngestResult = namedtuple("IngestResult", ["match_id", "new_balls", "pages", "cursor", "error"])
+
+_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, creating the commentary tables once per process"""
+    global _schema_ready
+    conn = sqlite3.connect(DB_PATH)
+    if not _schema_ready:
+        create_commentary_schema(conn)
+        _schema_ready = True
+    return conn
+
+
+def get_cursor(match_id: int) -> Optional[int]:
+    """
+    Get the newest ingested ball timestamp of a match
+
+    Returns:
+        int: Timestamp (ms), or None if the match was never ingested
+    """
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT last_ts FROM commentary_cursors WHERE match_id = ?", (match_id,)).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def _oldest_entry(data: dict) -> Optional[Tuple[int, int]]:
+    """(innings, timestamp) of the oldest entry on a page, balls or not"""
+    entries = [c for c in data.get("commentaryList") or () if c.get("timestamp")]
+    if not entries:
+        return None
+    oldest = min(entries, key=lambda c: int(c["timestamp"]))
+    return int(oldest.get("inningsId") or 1), int(oldest["timestamp"])
+
+
+def fetch_new_balls(match_id: int, headers: dict, since_ts: Optional[int],
+                    max_pages: int = MAX_COMMENTARY_PAGES) -> Tuple[List[Ball], int, bool, Optional[str]]:
+    """
+    Read commentary pages back from the newest until `since_ts` is reached
+
+    Args:
+        match_id: Match ID
+        headers: API request headers
+        since_ts: Cursor; None reads the whole match
+        max_pages: Most pages to read
+
+    Returns:
+        tuple: (balls newer than since_ts oldest first, pages read,
+                whether they join up with since_ts, error text or None)
+    """
+    balls, pages = [], 0
+    innings, before = None, None
+    while pages < max_pages:
+        status, data = get_commentary(match_id, headers, innings, before)
+        pages += 1
+        if status != 200:
+            return balls, pages, False, f"{status}: {str(data)[:200]}"
+        page = parse_commentary(data)
+        balls[:0] = [b for b in page if since_ts is None or b.ts > since_ts]
+        oldest = _oldest_entry(data)
+        if oldest is None:
+            if before is not None and innings and innings > 1:
+                innings -= 1  # innings break: continue in the previous innings
+                continue
+            return balls, pages, True, None  # reached the start of the match
+        if since_ts is not None and oldest[1] <= since_ts:
+            return balls, pages, True, None
+        innings, before = oldest
+    # History longer than max_pages: keep what was read rather than refetch it forever
+    return balls, pages, True, None
+
+
+def _append_balls(conn: sqlite3.Connection, match_id: int, balls: List[Ball], advance_cursor: bool) -> int:
+    """Write operation: insert new balls and names, then move the cursor"""
+    before = conn.total_changes
+    conn.executemany(BALL_INSERT_SQL, [b.row(match_id) for b in balls])
+    added = conn.total_changes - before
+    names = {(b.batter_id, b.batter) for b in balls if b.batter_id and b.batter}
+    names |= {(b.bowler_id, b.bowler) for b in balls if b.bowler_id and b.bowler}
+    conn.executemany(
+        "INSERT INTO commentary_players (player_id, name) VALUES (?, ?) "
+        "ON CONFLICT(player_id) DO UPDATE SET name = excluded.name WHERE name != excluded.name",
+        sorted(names)
+    )
+    if advance_cursor and balls:
+        conn.execute(
+            "INSERT INTO commentary_cursors (match_id, last_ts, balls, updated_at) "
+            "VALUES (?, ?, (SELECT COUNT(*) FROM balls WHERE match_id = ?), ?) "
+            "ON CONFLICT(match_id) DO UPDATE SET last_ts = MAX(last_ts, excluded.last_ts), "
+            "balls = excluded.balls, updated_at = excluded.updated_at",
+            (match_id, max(b.ts for b in balls), match_id, int(time.time()))
+        )
+    return added
+
+
+def save_balls(match_id: int, balls: List[Ball], advance_cursor: bool) -> int:
+    """
+    Append balls and move the match cursor in one queued write
+
+    Batter and bowler names go into `commentary_players`, not `players`, so
+    ball rows stay integer-only without adding stub players.
+
+    Args:
+        match_id: Match ID
+        balls: Parsed balls
+        advance_cursor: Move the cursor to the newest ball
+
+    Returns:
+        int: Balls newly stored, once committed
+    """
+    if not _schema_ready:
+        _connect().close()
+    return run_write(_append_balls, match_id, balls, advance_cursor)
+
+
+def ingest_commentary(match_id: int, headers: dict, max_pages: int = MAX_COMMENTARY_PAGES) -> IngestResult:
+    """
+    Store the balls bowled in a match since its last ingest
+
+    Args:
+        match_id: Match ID
+        headers: API request headers
+        max_pages: Most commentary pages to read
+
+    Returns:
+        IngestResult
+    """
+    since_ts = get_cursor(match_id)
+    balls, pages, joined, error = fetch_new_balls(match_id, headers, since_ts, max_pages)
+    added = save_balls(match_id, balls, advance_cursor=joined) if balls else 0
+    cursor = max([b.ts for b in balls] + [since_ts or 0]) if joined else since_ts
+    return IngestResult(match_id, added, pages, cursor or None, error)
+
+
+def over_aggregates(match_id: int, innings: Optional[int] = None) -> "pd.DataFrame":
+    """
+    Per-over totals of a match from stored balls
+
+    Args:
+        match_id: Match ID
+        innings: Only this innings (default: all)
+
+    Returns:
+        DataFrame: innings, over_no, legal_balls, runs, extras, wickets, fours,
+                   sixes, dots, total_runs, total_wickets (running totals per
+                   innings) and bowler (of the over's last ball)
+    """
+    import pandas as pd  # deferred: only the live page and CLI need pandas
+
+    sql = """
+    SELECT o.innings, o.over_no, o.legal_balls, o.runs, o.extras, o.wickets,
+           o.fours, o.sixes, o.dots,
+           SUM(o.runs) OVER w AS total_runs,
+           SUM(o.wickets) OVER w AS total_wickets,
+           (SELECT COALESCE(p.name, cp.name, b.bowler_id) FROM balls b
+            LEFT JOIN players p ON p.player_id = b.bowler_id
+            LEFT JOIN commentary_players cp ON cp.player_id = b.bowler_id
+            WHERE b.match_id = o.match_id AND b.ts = o.last_ts) AS bowler
+    FROM over_summary o
+    WHERE o.match_id = ? {innings}
+    WINDOW w AS (PARTITION BY o.innings ORDER BY o.over_no)
+    ORDER BY o.innings, o.over_no
+    """.format(innings="AND o.innings = ?" if innings is not None else "")
+    params = (match_id, innings) if innings is not None else (match_id,)
+    conn = _connect()
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest ball-by-ball commentary and show per-over totals")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="Store balls bowled since the last ingest")
+    p_ingest.add_argument("match_id", type=int)
+    p_ingest.add_argument("--follow", type=float, default=None, metavar="SECONDS",
+                          help="Keep polling every SECONDS until interrupted")
+    p_overs = sub.add_parser("overs", help="Print per-over totals")
+    p_overs.add_argument("match_id", type=int)
+    p_overs.add_argument("--innings", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "overs":
+        overs = over_aggregates(args.match_id, args.innings)
+        print(overs.to_string(index=False) if not overs.empty else "No balls stored")
+        return
+
+    from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
+    headers = {
+        "X-RapidAPI-Key": RAPID_API_KEY,
+        "X-RapidAPI-Host": RAPID_API_HOST
+    }
+    try:
+        while True:
+            r = ingest_commentary(args.match_id, headers)
+            print(f"{r.new_balls} new balls from {r.pages} page(s)" + (f" - {r.error}" if r.error else ""))
+            if args.follow is None:
+                break
+            time.sleep(args.follow)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
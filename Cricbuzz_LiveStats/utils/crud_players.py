@@ -1,19 +1,84 @@
+import csv
+import io
+import json
 import pandas as pd
 import sqlite3
+import tempfile
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from db.init_sqlite import PLAYER_SORT_KEYS, create_id_sequence_schema, create_player_indexes
+from utils.db_sync import PLAYER_UPSERT_SQL
+from utils.write_queue import run_write, submit_write
 
 DB_PATH = "db/cricbuzz.db"
 
+PLAYER_COLUMNS = ("player_id", "name", "country", "role", "batting_style", "bowling_style")
+
+# Stop collecting individual error messages after this many bad rows
+MAX_REPORTED_ERRORS = 500
+
+# Exports larger than this are spooled to a temporary file instead of memory
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+class PlayerConflictError(Exception):
+    """Raised when a batch edit touches players that changed since they were loaded"""
+
+    def __init__(self, player_ids: Iterable[int]):
+        self.player_ids = sorted(player_ids)
+        super().__init__(f"Players changed by someone else since loading: {self.player_ids}")
+
+_player_schema_ready = False
+
+
+def _ensure_player_schema(conn: sqlite3.Connection):
+    """Create the player ID sequence and paging indexes once per process (for older DBs)"""
+    global _player_schema_ready
+    if not _player_schema_ready:
+        create_id_sequence_schema(conn)
+        create_player_indexes(conn)
+        _player_schema_ready = True
+
+
+def _ensure_write_schema():
+    """Run the schema setup before queuing writes (the writer never changes the schema)"""
+    if not _player_schema_ready:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            _ensure_player_schema(conn)
+        finally:
+            conn.close()
+
+
+def _execute(conn: sqlite3.Connection, sql: str, params: tuple) -> int:
+    """Write operation: one statement -> rows changed"""
+    return conn.execute(sql, params).rowcount
+
+
+def _allocate_player_ids(cur: sqlite3.Cursor, count: int = 1) -> int:
+    """Reserve count consecutive player IDs; must run inside the caller's write transaction"""
+    # UPDATE first so the write lock is held before the value is read
+    cur.execute("UPDATE id_sequences SET next_value = next_value + ? WHERE name = 'players'", (count,))
+    cur.execute("SELECT next_value FROM id_sequences WHERE name = 'players'")
+    return cur.fetchone()[0] - count
+
+
 def get_next_player_id() -> int:
-    """Get the next available player ID"""
+    """Get the next available player ID (a peek; use allocate_player_id() to reserve it)"""
     conn = sqlite3.connect(DB_PATH)
     try:
+        _ensure_player_schema(conn)
         cur = conn.cursor()
-        cur.execute("SELECT MAX(player_id) FROM players")
-        max_id = cur.fetchone()[0]
-        return (max_id or 0) + 1
+        cur.execute("SELECT next_value FROM id_sequences WHERE name = 'players'")
+        return cur.fetchone()[0]
     finally:
         conn.close()
 
+def allocate_player_id() -> int:
+    """Reserve the next player ID from the sequence"""
+    _ensure_write_schema()
+    return run_write(lambda conn: _allocate_player_ids(conn.cursor()))
+
 def fetch_players(search: str = "") -> pd.DataFrame:
     """Fetch players with optional search filter"""
     sql = """
@@ -34,38 +99,525 @@ def fetch_players(search: str = "") -> pd.DataFrame:
         conn.close()
 
 def create_player(player_id: int, name: str, country: str, role: str, batting_style: str, bowling_style: str):
-    """Create a new player"""
+    """Create a new player (waits until the queued write is committed)"""
+    run_write(_execute, """
+        INSERT INTO players (player_id, name, country, role, batting_style, bowling_style)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (player_id, name, country, role, batting_style, bowling_style))
+
+def update_player(player_id: int, name: str, country: str, role: str, batting_style: str, bowling_style: str):
+    """Update an existing player (waits until the queued write is committed)"""
+    run_write(_execute, """
+        UPDATE players
+        SET name = ?, country = ?, role = ?, batting_style = ?, bowling_style = ?
+        WHERE player_id = ?
+    """, (name, country, role, batting_style, bowling_style, player_id))
+
+def delete_player(player_id: int):
+    """Delete a player (waits until the queued write is committed)"""
+    run_write(_execute, "DELETE FROM players WHERE player_id = ?", (player_id,))
+
+
+def _iter_csv(stream: IO[str]) -> Iterator[tuple]:
+    """Yield (line_no, row_dict) from a CSV stream with a header row"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _iter_jsonl(stream: IO[str]) -> Iterator[tuple]:
+    """Yield (line_no, row_dict) from a JSON Lines stream"""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, e
+            continue
+        yield line_no, row
+
+
+def validate_player_row(row) -> tuple:
+    """
+    Validate and normalise one imported player row
+
+    Args:
+        row: Mapping with PLAYER_COLUMNS keys (player_id may be empty)
+
+    Returns:
+        tuple: (player_id or None, name, country, role, batting_style, bowling_style)
+
+    Raises:
+        ValueError: If the row is malformed
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object, got {type(row).__name__}")
+
+    raw_id = row.get("player_id")
+    if raw_id in (None, ""):
+        player_id = None
+    else:
+        try:
+            player_id = int(raw_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"player_id must be an integer, got {raw_id!r}")
+        if player_id <= 0:
+            raise ValueError(f"player_id must be positive, got {player_id}")
+
+    name = str(row.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+
+    fields = []
+    for col in PLAYER_COLUMNS[2:]:
+        value = row.get(col)
+        value = str(value).strip() if value is not None else ""
+        fields.append(value or None)
+    return (player_id, name, *fields)
+
+
+def _write_chunk(conn: sqlite3.Connection, rows: list) -> int:
+    """Write operation: upsert one chunk of validated rows, allocating missing IDs"""
+    missing = sum(1 for r in rows if r[0] is None)
+    if missing:
+        next_id = _allocate_player_ids(conn.cursor(), missing)
+        filled = []
+        for r in rows:
+            if r[0] is None:
+                r = (next_id, *r[1:])
+                next_id += 1
+            filled.append(r)
+        rows = filled
+    conn.executemany(PLAYER_UPSERT_SQL, rows)
+    return len(rows)
+
+
+def import_players(stream: IO[str], fmt: str = "csv", chunk_size: int = 1000,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Stream-import players from CSV or JSON Lines
+
+    Rows are parsed and validated one at a time and upserted in chunks, each
+    chunk one queued write, so memory stays flat regardless of file size.
+    The next chunk is parsed while the writer commits the previous one.
+    Rows without a player_id get IDs from the player ID sequence.
+
+    Args:
+        stream: Text stream (CSV with header, or one JSON object per line)
+        fmt: "csv" or "jsonl"
+        chunk_size: Rows per write
+        progress: Optional callback(rows_read, rows_imported) after each chunk
+
+    Returns:
+        dict: imported (int), failed (int), errors (list of (line_no, message))
+    """
+    if fmt == "csv":
+        rows_iter = _iter_csv(stream)
+    elif fmt == "jsonl":
+        rows_iter = _iter_jsonl(stream)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    result = {"imported": 0, "failed": 0, "errors": []}
+    read = 0
+    chunk = []
+    pending = None
+
+    def _collect():
+        # At most one chunk in flight; a failed write stops the import
+        nonlocal pending
+        if pending is not None:
+            result["imported"] += pending.result()
+            pending = None
+
+    _ensure_write_schema()
+    try:
+        for line_no, row in rows_iter:
+            read += 1
+            try:
+                if isinstance(row, Exception):
+                    raise ValueError(f"invalid JSON: {row}")
+                chunk.append(validate_player_row(row))
+            except ValueError as e:
+                result["failed"] += 1
+                if len(result["errors"]) < MAX_REPORTED_ERRORS:
+                    result["errors"].append((line_no, str(e)))
+                continue
+
+            if len(chunk) >= chunk_size:
+                _collect()
+                pending = submit_write(_write_chunk, chunk)
+                chunk = []
+                if progress:
+                    progress(read, result["imported"])
+
+        _collect()
+        if chunk:
+            result["imported"] += run_write(_write_chunk, chunk)
+        if progress:
+            progress(read, result["imported"])
+        return result
+    finally:
+        if pending is not None:
+            pending.exception()  # let the chunk in flight settle before returning or raising
+
+
+def export_players(fmt: str = "csv", chunk_size: int = 5000) -> Iterator[str]:
+    """
+    Stream-export all players as CSV or JSON Lines text chunks
+
+    Rows are fetched from a cursor chunk_size at a time and serialised
+    immediately, so no DataFrame of the whole table is built.
+
+    Args:
+        fmt: "csv" or "jsonl"
+        chunk_size: Rows fetched and emitted per chunk
+
+    Yields:
+        str: Serialised text for the next chunk (CSV header first)
+    """
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unsupported format: {fmt}")
+
     conn = sqlite3.connect(DB_PATH)
     try:
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO players (player_id, name, country, role, batting_style, bowling_style)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (player_id, name, country, role, batting_style, bowling_style))
-        conn.commit()
+        cur = conn.execute(f"SELECT {', '.join(PLAYER_COLUMNS)} FROM players ORDER BY player_id")
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(PLAYER_COLUMNS)
+            yield buf.getvalue()
+
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            if fmt == "csv":
+                buf = io.StringIO()
+                csv.writer(buf).writerows(rows)
+                yield buf.getvalue()
+            else:
+                yield "".join(json.dumps(dict(zip(PLAYER_COLUMNS, r))) + "\n" for r in rows)
     finally:
         conn.close()
 
-def update_player(player_id: int, name: str, country: str, role: str, batting_style: str, bowling_style: str):
-    """Update an existing player"""
+
+def spool_export(fmt: str = "csv", max_memory: int = EXPORT_SPOOL_BYTES) -> IO[bytes]:
+    """
+    Write a streamed export to a temporary file, ready to be read back
+
+    Chunks from export_players() are encoded and written as they arrive; the
+    file stays in memory up to max_memory bytes and moves to disk beyond it.
+
+    Args:
+        fmt: "csv" or "jsonl"
+        max_memory: Bytes kept in memory before spilling to disk
+
+    Returns:
+        Binary file object positioned at the start; close it when done
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        for chunk in export_players(fmt):
+            spool.write(chunk.encode("utf-8"))
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def fetch_players_by_ids(player_ids: Iterable[int]) -> pd.DataFrame:
+    """
+    Fetch only the given players
+
+    Args:
+        player_ids: Player IDs to load
+
+    Returns:
+        pd.DataFrame: Matching players (missing IDs are simply absent)
+    """
+    ids = [int(i) for i in player_ids]
+    frames = []
     conn = sqlite3.connect(DB_PATH)
     try:
-        cur = conn.cursor()
-        cur.execute("""
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            frames.append(pd.read_sql_query(
+                f"SELECT {', '.join(PLAYER_COLUMNS)} FROM players "
+                f"WHERE player_id IN ({', '.join('?' * len(batch))})",
+                conn, params=batch
+            ))
+    finally:
+        conn.close()
+    if not frames:
+        return pd.DataFrame(columns=PLAYER_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _row_tuple(values, clean: bool = True) -> tuple:
+    """Convert a row's values to a tuple with NaN as None; clean also strips and blanks to None"""
+    out = []
+    for v in values:
+        if v is None or (isinstance(v, float) and pd.isna(v)):
+            out.append(None)
+        elif clean and isinstance(v, str):
+            out.append(v.strip() or None)
+        else:
+            out.append(v)
+    return tuple(out)
+
+
+def diff_players(original: pd.DataFrame, edited: pd.DataFrame) -> Dict[str, list]:
+    """
+    Compute the inserts, updates and deletes between two player frames
+
+    Rows are matched on player_id; edited rows without a player_id are new.
+
+    Args:
+        original: Frame as loaded from the database
+        edited: Frame after editing (e.g. from st.data_editor)
+
+    Returns:
+        dict: inserts (list of rows without player_id), updates (list of
+              (original_row, new_row)), deletes (list of original rows);
+              rows are tuples in PLAYER_COLUMNS order
+    """
+    cols = list(PLAYER_COLUMNS[1:])
+    orig = original.set_index("player_id")[cols]
+
+    is_new = edited["player_id"].isna()
+    inserts = [_row_tuple(r) for r in edited.loc[is_new, cols].itertuples(index=False)]
+
+    kept = edited.loc[~is_new].astype({"player_id": "int64"}).set_index("player_id")[cols]
+    deleted_ids = orig.index.difference(kept.index)
+    common = orig.index.intersection(kept.index)
+
+    before = orig.loc[common].fillna("").astype(str).apply(lambda c: c.str.strip())
+    after = kept.loc[common].fillna("").astype(str).apply(lambda c: c.str.strip())
+    changed_ids = common[(before != after).any(axis=1).to_numpy()]
+
+    # Original rows keep their exact stored values for the optimistic checks
+    updates = [
+        (_row_tuple((int(pid), *orig.loc[pid]), clean=False), _row_tuple((int(pid), *kept.loc[pid])))
+        for pid in changed_ids
+    ]
+    deletes = [_row_tuple((int(pid), *orig.loc[pid]), clean=False) for pid in deleted_ids]
+    return {"inserts": inserts, "updates": updates, "deletes": deletes}
+
+
+def apply_player_changes(changes: Dict[str, list]) -> Dict[str, List[int]]:
+    """
+    Apply a batch of player inserts, updates and deletes in one transaction
+
+    Updates and deletes are optimistic: they only apply if the row still holds
+    the originally loaded values. Any conflict rolls back the whole batch.
+
+    Args:
+        changes: Output of diff_players()
+
+    Returns:
+        dict: inserted_ids, updated_ids, deleted_ids
+
+    Raises:
+        ValueError: If an inserted or updated row has no name
+        PlayerConflictError: If any row changed since it was loaded
+    """
+    for row in changes["inserts"]:
+        if not row[0]:
+            raise ValueError("Name is required for new players")
+    for _, new in changes["updates"]:
+        if not new[1]:
+            raise ValueError(f"Name is required (player {new[0]})")
+
+    _ensure_write_schema()
+    return run_write(_apply_changes, changes)
+
+
+def _apply_changes(conn: sqlite3.Connection, changes: Dict[str, list]) -> Dict[str, List[int]]:
+    """Write operation for apply_player_changes; raising rolls back its savepoint"""
+    match_original = " AND ".join(f"{c} IS ?" for c in PLAYER_COLUMNS[1:])
+    conflicts = []
+    result = {"inserted_ids": [], "updated_ids": [], "deleted_ids": []}
+    cur = conn.cursor()
+
+    for old, new in changes["updates"]:
+        cur.execute(f"""
             UPDATE players
             SET name = ?, country = ?, role = ?, batting_style = ?, bowling_style = ?
-            WHERE player_id = ?
-        """, (name, country, role, batting_style, bowling_style, player_id))
-        conn.commit()
+            WHERE player_id = ? AND {match_original}
+        """, (*new[1:], old[0], *old[1:]))
+        if cur.rowcount == 1:
+            result["updated_ids"].append(old[0])
+        else:
+            conflicts.append(old[0])
+
+    for old in changes["deletes"]:
+        cur.execute(f"DELETE FROM players WHERE player_id = ? AND {match_original}", old)
+        if cur.rowcount == 1:
+            result["deleted_ids"].append(old[0])
+        else:
+            conflicts.append(old[0])
+
+    if conflicts:
+        raise PlayerConflictError(conflicts)
+
+    next_id = _allocate_player_ids(cur, len(changes["inserts"])) if changes["inserts"] else 0
+    for offset, row in enumerate(changes["inserts"]):
+        cur.execute(f"""
+            INSERT INTO players ({', '.join(PLAYER_COLUMNS)})
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (next_id + offset, *row))
+        result["inserted_ids"].append(next_id + offset)
+    return result
+
+
+def merge_player_rows(frame: pd.DataFrame, fresh: pd.DataFrame,
+                      refreshed_ids: Iterable[int]) -> pd.DataFrame:
+    """
+    Patch a loaded player frame with re-queried rows instead of reloading it
+
+    Args:
+        frame: Previously loaded players
+        fresh: Current database rows for refreshed_ids (see fetch_players_by_ids)
+        refreshed_ids: IDs that were re-queried; those absent from fresh are dropped
+
+    Returns:
+        pd.DataFrame: Updated frame, ordered by name
+    """
+    refreshed = set(int(i) for i in refreshed_ids)
+    kept = frame[~frame["player_id"].isin(refreshed)]
+    merged = pd.concat([kept, fresh], ignore_index=True) if not fresh.empty else kept
+    return merged.sort_values("name", kind="stable").reset_index(drop=True)
+
+
+def _player_filters(search: str = "", country: Optional[str] = None,
+                    role: Optional[str] = None) -> Tuple[List[str], list]:
+    """Build WHERE conditions and params for the player filters"""
+    where, params = [], []
+    if search.strip():
+        like = f"%{search.strip()}%"
+        where.append("(name LIKE ? OR country LIKE ? OR role LIKE ?)")
+        params += [like, like, like]
+    if country is not None:
+        where.append(f"{PLAYER_SORT_KEYS['country']} = ?")
+        params.append(country)
+    if role is not None:
+        where.append(f"{PLAYER_SORT_KEYS['role']} = ?")
+        params.append(role)
+    return where, params
+
+
+def fetch_player_page(search: str = "", country: Optional[str] = None, role: Optional[str] = None,
+                      sort: str = "name", descending: bool = False,
+                      after: Optional[tuple] = None, limit: int = 50) -> Tuple[pd.DataFrame, Optional[tuple]]:
+    """
+    Fetch one page of players with keyset pagination
+
+    Sorting, filtering and paging all run in SQL on the (sort key, player_id)
+    indexes, so a page costs the same no matter how many players exist.
+
+    Args:
+        search: Substring of name, country or role
+        country: Exact country ('' matches missing)
+        role: Exact role ('' matches missing)
+        sort: "name", "country", "role" or "player_id"
+        descending: Sort descending
+        after: Cursor returned with the previous page (None for the first page)
+        limit: Page size
+
+    Returns:
+        tuple: (page DataFrame, cursor for the next page or None if last page)
+    """
+    if sort != "player_id" and sort not in PLAYER_SORT_KEYS:
+        raise ValueError(f"Unsupported sort column: {sort}")
+
+    where, params = _player_filters(search, country, role)
+    direction, op = ("DESC", "<") if descending else ("ASC", ">")
+
+    if sort == "player_id":
+        key = "player_id"
+        order_by = f"player_id {direction}"
+        if after is not None:
+            where.append(f"player_id {op} ?")
+            params.append(after[1])
+    else:
+        key = PLAYER_SORT_KEYS[sort]
+        order_by = f"{key} {direction}, player_id {direction}"
+        if after is not None:
+            # The plain bound lets SQLite seek the expression index; the row value breaks ties
+            where.append(f"{key} {op}= ? AND ({key}, player_id) {op} (?, ?)")
+            params += [after[0], *after]
+
+    sql = f"SELECT {key} AS sort_key, {', '.join(PLAYER_COLUMNS)} FROM players"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order_by} LIMIT ?"
+    params.append(limit + 1)
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        _ensure_player_schema(conn)
+        df = pd.read_sql_query(sql, conn, params=params)
     finally:
         conn.close()
 
-def delete_player(player_id: int):
-    """Delete a player"""
+    next_cursor = None
+    if len(df) > limit:
+        df = df.iloc[:limit]
+        last = df.iloc[-1]
+        next_cursor = (last["sort_key"], int(last["player_id"]))
+    return df.drop(columns="sort_key").reset_index(drop=True), next_cursor
+
+
+def count_players(search: str = "", country: Optional[str] = None, role: Optional[str] = None) -> int:
+    """
+    Count players matching the filters
+
+    Unfiltered counts come from the trigger-maintained db_stats counter.
+
+    Args:
+        search: Substring of name, country or role
+        country: Exact country
+        role: Exact role
+
+    Returns:
+        int: Number of matching players
+    """
+    where, params = _player_filters(search, country, role)
     conn = sqlite3.connect(DB_PATH)
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM players WHERE player_id = ?", (player_id,))
-        conn.commit()
+        if not where:
+            row = conn.execute("SELECT value FROM db_stats WHERE metric = 'players'").fetchone()
+            if row is not None:
+                return row[0]
+        sql = "SELECT COUNT(*) FROM players"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return conn.execute(sql, params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def distinct_player_values(column: str) -> List[str]:
+    """
+    List distinct values of a filterable player column, read from its index
+
+    Args:
+        column: "country" or "role"
+
+    Returns:
+        list: Sorted distinct values ('' stands for missing)
+    """
+    if column not in ("country", "role"):
+        raise ValueError(f"Unsupported filter column: {column}")
+    key = PLAYER_SORT_KEYS[column]
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        _ensure_player_schema(conn)
+        return [r[0] for r in conn.execute(f"SELECT DISTINCT {key} FROM players ORDER BY 1")]
     finally:
         conn.close()
@@ -0,0 +1,252 @@
+"""
+Hot/archive split utilities for Cricbuzz LiveStats
+
+Completed matches and their scorecard innings are moved out of the hot
+database into one archive SQLite file per season (db/archive/cricbuzz_<year>.db).
+Archives are attached on demand and exposed through the `all_matches` and
+`all_scorecards` views, so live queries stay small and history stays queryable.
+
+Usage:
+    python -m utils.db_archive --older-than-days 7
+"""
+import argparse
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DB_PATH = "db/cricbuzz.db"
+ARCHIVE_DIR = "db/archive"
+
+ARCHIVED_TABLES = ("matches", "scorecards")
+
+# Status texts the Cricbuzz API uses once a match is over
+COMPLETED_STATUS_PATTERNS = (
+    "% won by %",
+    "%match drawn%",
+    "%match tied%",
+    "%no result%",
+    "%abandon%",
+)
+
+_SEASON_FILE_RE = re.compile(r"^cricbuzz_(\d{4})\.db$")
+
+
+def archive_path(season: str) -> str:
+    """
+    Get the archive file path for a season
+
+    Args:
+        season: Four digit season year, e.g. "2024"
+
+    Returns:
+        str: Path of the season archive database
+    """
+    if not re.fullmatch(r"\d{4}", str(season)):
+        raise ValueError(f"Invalid season: {season!r}")
+    return os.path.join(ARCHIVE_DIR, f"cricbuzz_{season}.db")
+
+
+def list_archive_seasons() -> List[str]:
+    """
+    List seasons that have an archive file on disk
+
+    Returns:
+        list: Season years, oldest first
+    """
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    seasons = []
+    for file_name in os.listdir(ARCHIVE_DIR):
+        m = _SEASON_FILE_RE.match(file_name)
+        if m:
+            seasons.append(m.group(1))
+    return sorted(seasons)
+
+
+def _table_columns(conn: sqlite3.Connection, schema: str, table: str) -> List[str]:
+    """Writable (non-generated) columns of a table in the given schema"""
+    rows = conn.execute(f"PRAGMA {schema}.table_xinfo({table})").fetchall()
+    return [r[1] for r in rows if r[6] == 0]
+
+
+def _ensure_archive_tables(conn: sqlite3.Connection, alias: str):
+    """Create archive tables with the same definition as the hot tables"""
+    for table in ARCHIVED_TABLES:
+        row = conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if row is None:
+            raise RuntimeError(f"Table '{table}' missing - run db/init_sqlite.py first")
+        ddl = row[0].replace(f"CREATE TABLE {table}", f"CREATE TABLE IF NOT EXISTS {alias}.{table}", 1)
+        conn.execute(ddl)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {alias}.idx_scorecards_match_id ON scorecards(match_id)")
+
+
+def _move_season(conn: sqlite3.Connection, season: str, match_ids: List[int]) -> int:
+    """Move one season's matches and innings into its archive in a single transaction"""
+    conn.execute("ATTACH DATABASE ? AS arch", (archive_path(season),))
+    try:
+        _ensure_archive_tables(conn, "arch")
+
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (match_id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.archive_ids")
+        conn.executemany("INSERT INTO temp.archive_ids VALUES (?)", [(m,) for m in match_ids])
+        in_batch = "match_id IN (SELECT match_id FROM temp.archive_ids)"
+
+        match_cols = [c for c in _table_columns(conn, "main", "matches")
+                      if c in _table_columns(conn, "arch", "matches")]
+        # Archive assigns its own scorecard row ids
+        card_cols = [c for c in _table_columns(conn, "main", "scorecards")
+                     if c != "id" and c in _table_columns(conn, "arch", "scorecards")]
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DELETE FROM arch.scorecards WHERE {in_batch}")
+            conn.execute(f"""
+            INSERT OR REPLACE INTO arch.matches ({', '.join(match_cols)})
+            SELECT {', '.join(match_cols)} FROM main.matches WHERE {in_batch}
+            """)
+            conn.execute(f"""
+            INSERT INTO arch.scorecards ({', '.join(card_cols)})
+            SELECT {', '.join(card_cols)} FROM main.scorecards WHERE {in_batch}
+            ORDER BY match_id, innings_id
+            """)
+            conn.execute(f"DELETE FROM main.scorecards WHERE {in_batch}")
+            moved = conn.execute(f"DELETE FROM main.matches WHERE {in_batch}").rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return moved
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.archive_ids")
+        conn.execute("DETACH DATABASE arch")
+
+
+def archive_completed_matches(older_than_days: int = 7) -> Dict[str, int]:
+    """
+    Move completed matches and their innings into per-season archive files
+
+    Args:
+        older_than_days: Only archive matches that started at least this many days ago
+
+    Returns:
+        dict: Number of matches archived per season
+    """
+    cutoff_ms = int((datetime.now() - timedelta(days=older_than_days)).timestamp() * 1000)
+    status_filter = " OR ".join("status LIKE ?" for _ in COMPLETED_STATUS_PATTERNS)
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        rows = conn.execute(f"""
+        SELECT match_id, strftime('%Y', start_date / 1000, 'unixepoch') AS season
+        FROM matches
+        WHERE start_date IS NOT NULL AND start_date < ? AND ({status_filter})
+        """, (cutoff_ms, *COMPLETED_STATUS_PATTERNS)).fetchall()
+
+        by_season: Dict[str, List[int]] = {}
+        for match_id, season in rows:
+            if season:
+                by_season.setdefault(season, []).append(match_id)
+
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        return {season: _move_season(conn, season, ids) for season, ids in sorted(by_season.items())}
+    finally:
+        conn.close()
+
+
+def _create_unified_views(conn: sqlite3.Connection, aliases: List[str]):
+    """Create temp views that UNION ALL the hot tables with every attached archive"""
+    for table in ARCHIVED_TABLES:
+        cols = _table_columns(conn, "main", table)
+        selects = [f"SELECT {', '.join(cols)} FROM main.{table}"]
+        for alias in aliases:
+            present = set(_table_columns(conn, alias, table))
+            select_list = ", ".join(c if c in present else f"NULL AS {c}" for c in cols)
+            selects.append(f"SELECT {select_list} FROM {alias}.{table}")
+        conn.execute(f"DROP VIEW IF EXISTS temp.all_{table}")
+        conn.execute(f"CREATE TEMP VIEW all_{table} AS {' UNION ALL '.join(selects)}")
+
+
+def connect_with_archives(seasons: Optional[List[str]] = None) -> sqlite3.Connection:
+    """
+    Open the hot database with season archives attached
+
+    The connection exposes `all_matches` and `all_scorecards` views covering
+    hot and archived rows; the plain `matches`/`scorecards` tables stay hot-only.
+
+    Args:
+        seasons: Seasons to attach (default: every archive on disk)
+
+    Returns:
+        sqlite3.Connection: Connection with archives attached
+    """
+    seasons = list_archive_seasons() if seasons is None else [str(s) for s in seasons]
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(seasons) > limit:
+            raise ValueError(
+                f"Cannot attach {len(seasons)} archives (SQLite limit is {limit}); "
+                "pass the seasons you need"
+            )
+
+        aliases = []
+        for season in seasons:
+            path = archive_path(season)
+            if not os.path.exists(path):
+                continue
+            alias = f"archive_{season}"
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+            aliases.append(alias)
+
+        _create_unified_views(conn, aliases)
+        return conn
+    except Exception:
+        conn.close()
+        raise
+
+
+def run_archive_query(sql: str, params: Optional[tuple] = None,
+                      seasons: Optional[List[str]] = None) -> "pd.DataFrame":
+    """
+    Execute SQL with archives attached and return results as DataFrame
+
+    Args:
+        sql: SQL query string (may use all_matches / all_scorecards)
+        params: Optional parameters for parameterized queries
+        seasons: Seasons to attach (default: every archive on disk)
+
+    Returns:
+        pd.DataFrame: Query results
+    """
+    import pandas as pd  # deferred so the archive CLI starts without pandas
+
+    conn = connect_with_archives(seasons)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive completed matches by season")
+    parser.add_argument("--older-than-days", type=int, default=7,
+                        help="Only archive matches that started at least this many days ago")
+    args = parser.parse_args()
+
+    moved = archive_completed_matches(args.older_than_days)
+    if not moved:
+        print("No completed matches to archive")
+    for season, count in moved.items():
+        print(f"Archived {count} matches to {archive_path(season)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Online backup and restore utilities for Cricbuzz LiveStats
+
+Backups are taken with the SQLite backup API in small paged steps, so sync
+writers are only ever blocked for one step at a time. Two kinds are supported:
+
+- full: one gzip-compressed copy of the database (cricbuzz_<stamp>.db.gz)
+- snapshot: incremental, content-addressed chunks plus a JSON manifest
+  (cricbuzz_<stamp>.snapshot.json); unchanged chunks are shared between snapshots
+
+Usage:
+    python -m utils.db_backup backup [--incremental] [--no-compress]
+    python -m utils.db_backup list
+    python -m utils.db_backup verify <name>
+    python -m utils.db_backup restore <name>
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+DB_PATH = "db/cricbuzz.db"
+BACKUP_DIR = "db/backups"
+CHUNK_DIR = os.path.join(BACKUP_DIR, "chunks")
+
+# Pages copied per backup step, and pause between steps so writers can get in
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+
+# Pages per content-addressed chunk in incremental snapshots
+SNAPSHOT_CHUNK_PAGES = 64
+
+_SUFFIXES = {
+    ".snapshot.json": "snapshot",
+    ".db.gz": "full",
+    ".db": "full",
+}
+
+ProgressCallback = Callable[[int, int, int], None]
+
+
+def _online_copy(src_path: str, dest_path: str, progress: Optional[ProgressCallback] = None):
+    """Copy a live database page-by-page with the SQLite backup API"""
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst, pages=BACKUP_PAGES_PER_STEP, progress=progress, sleep=BACKUP_STEP_SLEEP)
+    finally:
+        dst.close()
+        src.close()
+
+
+def _integrity_check(path: str) -> Tuple[bool, str]:
+    """Run PRAGMA integrity_check on a database file"""
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        return result == "ok", result
+    finally:
+        conn.close()
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _chunk_path(digest: str) -> str:
+    return os.path.join(CHUNK_DIR, digest[:2], f"{digest}.gz")
+
+
+def _write_snapshot(db_copy: str, manifest_path: str) -> Dict:
+    """Split a database copy into content-addressed chunks and write the manifest"""
+    conn = sqlite3.connect(db_copy)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+
+    chunk_size = page_size * SNAPSHOT_CHUNK_PAGES
+    chunks, new_chunks = [], 0
+    with open(db_copy, "rb") as f:
+        for data in iter(lambda: f.read(chunk_size), b""):
+            digest = hashlib.sha256(data).hexdigest()
+            path = _chunk_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with gzip.open(path + ".tmp", "wb") as out:
+                    out.write(data)
+                os.replace(path + ".tmp", path)
+                new_chunks += 1
+            chunks.append(digest)
+
+    manifest = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "page_size": page_size,
+        "chunk_size": chunk_size,
+        "size": os.path.getsize(db_copy),
+        "sha256": _file_sha256(db_copy),
+        "chunks": chunks,
+        "new_chunks": new_chunks,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def create_backup(incremental: bool = False, compress: bool = True,
+                  progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    Take an online backup of the database
+
+    Args:
+        incremental: Store an incremental chunked snapshot instead of a full copy
+        compress: Gzip the full copy (snapshot chunks are always compressed)
+        progress: Optional callback(status, remaining, total) called after each step
+
+    Returns:
+        dict: Backup name, kind, path and size in bytes
+    """
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    base = f"cricbuzz_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    suffix = ".snapshot.json" if incremental else (".db.gz" if compress else ".db")
+    # Names are unique across backup kinds so restore/verify can resolve them
+    name, n = base, 1
+    while any(os.path.exists(os.path.join(BACKUP_DIR, name + s)) for s in _SUFFIXES):
+        name = f"{base}-{n}"
+        n += 1
+    path = os.path.join(BACKUP_DIR, name + suffix)
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=BACKUP_DIR)
+    os.close(fd)
+    try:
+        _online_copy(DB_PATH, tmp_path, progress)
+
+        ok, message = _integrity_check(tmp_path)
+        if not ok:
+            raise RuntimeError(f"Backup copy failed integrity check: {message}")
+
+        if incremental:
+            _write_snapshot(tmp_path, path)
+        elif compress:
+            with open(tmp_path, "rb") as src, gzip.open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "name": name,
+        "kind": "snapshot" if incremental else "full",
+        "path": path,
+        "size": os.path.getsize(path),
+    }
+
+
+def _backup_file(name: str) -> Tuple[str, str]:
+    """Resolve a backup name to (path, suffix)"""
+    for suffix in _SUFFIXES:
+        path = os.path.join(BACKUP_DIR, name + suffix)
+        if os.path.exists(path):
+            return path, suffix
+    raise FileNotFoundError(f"Backup not found: {name}")
+
+
+def list_backups() -> List[Dict]:
+    """
+    List available backups
+
+    Returns:
+        list: Backup dicts (name, kind, path, size, created), newest first
+    """
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+
+    backups = []
+    for file_name in os.listdir(BACKUP_DIR):
+        for suffix, kind in _SUFFIXES.items():
+            if file_name.endswith(suffix):
+                path = os.path.join(BACKUP_DIR, file_name)
+                backups.append({
+                    "name": file_name[:-len(suffix)],
+                    "kind": kind,
+                    "path": path,
+                    "size": os.path.getsize(path),
+                    "created": datetime.fromtimestamp(os.path.getmtime(path)),
+                })
+                break
+    return sorted(backups, key=lambda b: b["created"], reverse=True)
+
+
+def _materialize(name: str, dest_path: str):
+    """Write the plain database file for a backup to dest_path"""
+    path, suffix = _backup_file(name)
+
+    if suffix == ".db":
+        shutil.copyfile(path, dest_path)
+    elif suffix == ".db.gz":
+        with gzip.open(path, "rb") as src, open(dest_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+    else:
+        with open(path) as f:
+            manifest = json.load(f)
+        with open(dest_path, "wb") as dst:
+            for digest in manifest["chunks"]:
+                with gzip.open(_chunk_path(digest), "rb") as src:
+                    shutil.copyfileobj(src, dst)
+        if _file_sha256(dest_path) != manifest["sha256"]:
+            raise RuntimeError(f"Snapshot {name} does not match its manifest checksum")
+
+
+def verify_backup(name: str) -> Tuple[bool, str]:
+    """
+    Verify a backup can be restored
+
+    Args:
+        name: Backup name as returned by list_backups()
+
+    Returns:
+        tuple: (ok, message)
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        _materialize(name, tmp_path)
+        return _integrity_check(tmp_path)
+    except (OSError, RuntimeError, sqlite3.DatabaseError) as e:
+        return False, str(e)
+    finally:
+        os.remove(tmp_path)
+
+
+def restore_backup(name: str, progress: Optional[ProgressCallback] = None):
+    """
+    Restore the live database from a backup
+
+    The backup is verified first, then copied over the live database with the
+    backup API so open connections see a consistent switch.
+
+    Args:
+        name: Backup name as returned by list_backups()
+        progress: Optional callback(status, remaining, total) called after each step
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        _materialize(name, tmp_path)
+        ok, message = _integrity_check(tmp_path)
+        if not ok:
+            raise RuntimeError(f"Backup {name} failed integrity check: {message}")
+        _online_copy(tmp_path, DB_PATH, progress)
+    finally:
+        os.remove(tmp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backup and restore the Cricbuzz LiveStats database")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_backup = sub.add_parser("backup", help="Take an online backup")
+    p_backup.add_argument("--incremental", action="store_true", help="Chunked incremental snapshot")
+    p_backup.add_argument("--no-compress", action="store_true", help="Store the full copy uncompressed")
+    sub.add_parser("list", help="List backups")
+    sub.add_parser("verify", help="Verify a backup").add_argument("name")
+    sub.add_parser("restore", help="Restore a backup over the live database").add_argument("name")
+
+    args = parser.parse_args()
+
+    if args.command == "backup":
+        info = create_backup(incremental=args.incremental, compress=not args.no_compress)
+        print(f"Created {info['kind']} backup {info['name']} ({info['size'] / 1024:.1f} KB)")
+    elif args.command == "list":
+        for b in list_backups():
+            print(f"{b['name']}  {b['kind']:<8}  {b['size'] / 1024:>10.1f} KB  {b['created']:%Y-%m-%d %H:%M:%S}")
+    elif args.command == "verify":
+        ok, message = verify_backup(args.name)
+        print(f"{args.name}: {'OK' if ok else 'FAILED'} ({message})")
+        raise SystemExit(0 if ok else 1)
+    elif args.command == "restore":
+        restore_backup(args.name)
+        print(f"Restored {args.name} to {DB_PATH}")
+
+
+if __name__ == "__main__":
+    main()
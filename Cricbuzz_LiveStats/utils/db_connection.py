@@ -3,11 +3,13 @@ Database Connection Handler - Database-agnostic design
 Supports PostgreSQL, MySQL, SQLite with centralized connection management
 """
 import sqlite3
-import pandas as pd
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from contextlib import contextmanager
 import os
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class DatabaseConnection:
     """Centralized database connection handler"""
@@ -96,7 +98,7 @@ class DatabaseConnection:
                 conn.close()
 
 
-def run_query(sql: str, params: Optional[tuple] = None) -> pd.DataFrame:
+def run_query(sql: str, params: Optional[tuple] = None) -> "pd.DataFrame":
     """
     Execute SQL query and return results as DataFrame
     Database-agnostic implementation
@@ -108,6 +110,8 @@ def run_query(sql: str, params: Optional[tuple] = None) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Query results
     """
+    import pandas as pd  # deferred: only query pages need pandas
+
     db = DatabaseConnection()
     
     with db.get_connection_context() as conn:
@@ -2,147 +2,290 @@
 Database sync utilities for saving live API data to SQLite
 """
 import sqlite3
+import time
 from datetime import datetime
+from itertools import islice
+from concurrent.futures import Future
+from typing import Iterable, Iterator, Optional, Union
+from db.init_sqlite import create_raw_json_schema, create_stats_schema
+from utils.models import (
+    Innings, MatchInfo, Player,
+    dumps, parse_match_info, parse_player, parse_roster, parse_scorecard
+)
+from utils.write_queue import run_write, submit_write
 
 DB_PATH = "db/cricbuzz.db"
 
+# Upserts rather than INSERT OR REPLACE: REPLACE removes the old row without
+# firing delete triggers, which would drift the db_stats counters.
+# raw_json is merged (json_patch) so fields from the scorecard's matchHeader,
+# such as tossResults, survive the next live-list upsert.
+MATCH_UPSERT_SQL = """
+INSERT INTO matches
+(match_id, series_name, match_desc, match_format, team1, team2,
+ venue_ground, venue_city, status, start_date, raw_json)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(match_id) DO UPDATE SET
+    series_name = excluded.series_name,
+    match_desc = excluded.match_desc,
+    match_format = excluded.match_format,
+    team1 = excluded.team1,
+    team2 = excluded.team2,
+    venue_ground = excluded.venue_ground,
+    venue_city = excluded.venue_city,
+    status = excluded.status,
+    start_date = excluded.start_date,
+    raw_json = CASE WHEN excluded.raw_json IS NULL THEN matches.raw_json
+                    ELSE json_patch(COALESCE(matches.raw_json, '{}'), excluded.raw_json) END
+"""
+
+MATCH_HEADER_MERGE_SQL = """
+UPDATE matches SET raw_json = json_patch(COALESCE(raw_json, '{}'), ?)
+WHERE match_id = ?
+"""
+
+PLAYER_UPSERT_SQL = """
+INSERT INTO players
+(player_id, name, country, role, batting_style, bowling_style)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(player_id) DO UPDATE SET
+    name = excluded.name,
+    country = excluded.country,
+    role = excluded.role,
+    batting_style = excluded.batting_style,
+    bowling_style = excluded.bowling_style
+"""
+
+# API players also carry their source payload; manual CRUD rows use
+# PLAYER_UPSERT_SQL and leave an existing raw_json untouched. Payloads differ
+# by endpoint (a league roster has no country, a roster entry no birth date),
+# so fields a payload lacks keep their stored value and payloads are merged.
+PLAYER_PAYLOAD_UPSERT_SQL = """
+INSERT INTO players
+(player_id, name, country, role, batting_style, bowling_style, raw_json)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(player_id) DO UPDATE SET
+    name = COALESCE(excluded.name, players.name),
+    country = COALESCE(excluded.country, players.country),
+    role = COALESCE(excluded.role, players.role),
+    batting_style = COALESCE(excluded.batting_style, players.batting_style),
+    bowling_style = COALESCE(excluded.bowling_style, players.bowling_style),
+    raw_json = CASE WHEN excluded.raw_json IS NULL THEN players.raw_json
+                    ELSE json_patch(COALESCE(players.raw_json, '{}'), excluded.raw_json) END
+"""
+
+TEAM_UPSERT_SQL = """
+INSERT INTO teams (team_id, name, short_name, category)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(team_id) DO UPDATE SET
+    name = COALESCE(excluded.name, teams.name),
+    short_name = COALESCE(excluded.short_name, teams.short_name),
+    category = COALESCE(excluded.category, teams.category)
+"""
+
+# Rows per executemany when writing from a (possibly streaming) iterator
+SYNC_BATCH_SIZE = 500
+
+SCORECARD_INSERT_SQL = """
+INSERT INTO scorecards
+(match_id, innings_id, bat_team, runs, wickets, overs, runrate, raw_json)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_stats_schema_ready = False
+_raw_json_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, adding the raw_json columns once per process (for older DBs)"""
+    global _raw_json_schema_ready
+    conn = sqlite3.connect(DB_PATH)
+    if not _raw_json_schema_ready:
+        create_raw_json_schema(conn)
+        _raw_json_schema_ready = True
+    return conn
+
+
+def _ensure_write_schema():
+    """Run the once-per-process schema upgrades before queuing writes (the writer never changes the schema)"""
+    if not (_raw_json_schema_ready and _stats_schema_ready):
+        conn = _connect()
+        try:
+            _ensure_stats_schema(conn)
+        finally:
+            conn.close()
+
+
+def _ensure_stats_schema(conn: sqlite3.Connection):
+    """Create db_stats and its triggers once per process (for DBs made before they existed)"""
+    global _stats_schema_ready
+    if not _stats_schema_ready:
+        create_stats_schema(conn)
+        _stats_schema_ready = True
+
+
+def _set_stat(cur: sqlite3.Cursor, metric: str, value: int):
+    """Set a db_stats metric that is not trigger-maintained"""
+    cur.execute("UPDATE db_stats SET value = ? WHERE metric = ?", (value, metric))
+
+
+def _as_innings(scorecard: Union[Iterable[Innings], dict, None]) -> Iterable[Innings]:
+    """Accept parsed innings (list or stream) or a raw scorecard payload"""
+    if scorecard is None:
+        return []
+    return parse_scorecard(scorecard) if isinstance(scorecard, dict) else scorecard
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    """Split an iterator into lists of at most `size` items"""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _scorecard_rows(match_id: int, scorecard: Union[Iterable[Innings], dict, None]) -> list:
+    """Build a match's scorecard rows on the caller's thread (a stream is read to the end here)"""
+    return [inn.row(match_id) for inn in _as_innings(scorecard)]
+
+
+def _write_innings(cur: sqlite3.Cursor, match_id: int, rows: list, batch_size: int) -> int:
+    """Replace a match's scorecard rows"""
+    cur.execute("DELETE FROM scorecards WHERE match_id = ?", (match_id,))
+    for batch in _batches(rows, batch_size):
+        cur.executemany(SCORECARD_INSERT_SQL, batch)
+    return len(rows)
 
-def save_match(match_info: dict):
+
+def save_match(match_info: Union[MatchInfo, dict]) -> Optional[Future]:
     """
     Save or update match data to the database
     
+    The write is queued on the process writer; page renders can drop the
+    Future and carry on without waiting for the write lock.
+    
     Args:
-        match_info: Match information dictionary from API
+        match_info: Parsed MatchInfo (or a raw matchInfo dict from API)
+    
+    Returns:
+        Future: Resolves once committed (None if there was nothing to save)
     """
-    conn = sqlite3.connect(DB_PATH)
+    if isinstance(match_info, dict):
+        match_info = parse_match_info(match_info)
+    if match_info is None:
+        return None
+
+    _ensure_write_schema()
+    return submit_write(_execute, MATCH_UPSERT_SQL, match_info.row())
+
+
+def _execute(conn: sqlite3.Connection, sql: str, params: tuple):
+    """Write operation: one statement"""
+    conn.execute(sql, params)
+
+
+def _header_json(scorecard) -> Optional[str]:
+    """A raw scorecard's matchHeader (toss, result...) as JSON, or None"""
+    header = scorecard.get("matchHeader") if isinstance(scorecard, dict) else None
+    return dumps(header) if header else None
+
+
+def _merge_match_header(cur: sqlite3.Cursor, match_id: int, header: Optional[str]):
+    """Merge a matchHeader from _header_json into matches.raw_json"""
+    if header:
+        cur.execute(MATCH_HEADER_MERGE_SQL, (header, match_id))
+
+
+def _replace_scorecard(conn: sqlite3.Connection, match_id: int, rows: list,
+                       header: Optional[str], batch_size: int) -> int:
+    """Write operation: replace a match's innings and merge its matchHeader"""
     cur = conn.cursor()
-    
-    try:
-        match_id = match_info.get("matchId")
-        if not match_id:
-            return
-        
-        cur.execute("""
-        INSERT OR REPLACE INTO matches 
-        (match_id, series_name, match_desc, match_format, team1, team2, 
-         venue_ground, venue_city, status, start_date)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            match_id,
-            match_info.get("seriesName"),
-            match_info.get("matchDesc"),
-            match_info.get("matchFormat"),
-            match_info.get("team1", {}).get("teamName"),
-            match_info.get("team2", {}).get("teamName"),
-            match_info.get("venueInfo", {}).get("ground"),
-            match_info.get("venueInfo", {}).get("city"),
-            match_info.get("status"),
-            match_info.get("startDate")
-        ))
-        
-        conn.commit()
-    finally:
-        conn.close()
+    count = _write_innings(cur, match_id, rows, batch_size)
+    _merge_match_header(cur, match_id, header)
+    return count
 
 
-def save_scorecard(match_id: int, scorecard_data: dict):
+def save_scorecard(match_id: int, scorecard: Union[Iterable[Innings], dict],
+                   batch_size: int = SYNC_BATCH_SIZE) -> Future:
     """
     Save scorecard innings data to the database
     
+    A stream is read to the end here, on the caller's thread, and only the
+    finished rows are queued, so a slow response never holds the writer.
+    The old rows are replaced in one write; if a streamed scorecard fails
+    part-way, nothing is queued and the match keeps its previous innings.
+    
     Args:
         match_id: Match ID
-        scorecard_data: Scorecard data from API
-    """
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+        scorecard: Parsed innings - a list or a stream such as
+                   models.iter_scorecard() - or the raw payload from API
+        batch_size: Innings per executemany
     
-    try:
-        innings_list = scorecard_data.get("scorecard", [])
-        
-        # Delete existing scorecard data for this match
-        cur.execute("DELETE FROM scorecards WHERE match_id = ?", (match_id,))
-        
-        # Insert new scorecard data
-        for innings_idx, inn in enumerate(innings_list, 1):
-            cur.execute("""
-            INSERT INTO scorecards 
-            (match_id, innings_id, bat_team, runs, wickets, overs, runrate)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                match_id,
-                innings_idx,
-                inn.get("batteamname"),
-                inn.get("score"),
-                inn.get("wickets"),
-                inn.get("overs"),
-                inn.get("runrate")
-            ))
-        
-        conn.commit()
-    finally:
-        conn.close()
+    Returns:
+        Future: Number of innings saved, once committed
+    """
+    rows = _scorecard_rows(match_id, scorecard)
+    _ensure_write_schema()
+    return submit_write(_replace_scorecard, match_id, rows, _header_json(scorecard), batch_size)
 
 
-def save_player(player_info: dict):
+def save_player(player_info: Union[Player, dict]) -> Optional[Future]:
     """
     Save or update player data to the database
     
     Args:
-        player_info: Player information dictionary from API
-    """
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+        player_info: Parsed Player (or a player dict from API)
     
-    try:
-        player_id = player_info.get("id") or player_info.get("playerId")
-        if not player_id:
-            return
-        
-        cur.execute("""
-        INSERT OR REPLACE INTO players 
-        (player_id, name, country, role, batting_style, bowling_style)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            player_id,
-            player_info.get("name"),
-            player_info.get("intlTeam") or player_info.get("country"),
-            player_info.get("role") or player_info.get("playingRole"),
-            player_info.get("bat") or player_info.get("batting_style"),
-            player_info.get("bowl") or player_info.get("bowling_style")
-        ))
-        
-        conn.commit()
-    finally:
-        conn.close()
+    Returns:
+        Future: Resolves once committed (None if there was nothing to save)
+    """
+    if isinstance(player_info, dict):
+        player_info = parse_player(player_info)
+    if player_info is None:
+        return None
+
+    _ensure_write_schema()
+    return submit_write(_execute, PLAYER_PAYLOAD_UPSERT_SQL, player_info.row())
 
 
 def get_sync_stats():
     """
     Get database sync statistics
     
+    Counts come from the trigger-maintained db_stats table, so the cost does
+    not grow with table size.
+    
     Returns:
-        dict: Count of records in each table
+        dict: Row counts (players, matches, scorecards), live_matches,
+              last_sync_at (epoch seconds, 0 if never), db_pages and db_size_kb
     """
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    conn = _connect()
     
     try:
-        stats = {}
-        
-        cur.execute("SELECT COUNT(*) FROM players")
-        stats['players'] = cur.fetchone()[0]
+        _ensure_stats_schema(conn)
+        cur = conn.cursor()
         
-        cur.execute("SELECT COUNT(*) FROM matches")
-        stats['matches'] = cur.fetchone()[0]
+        cur.execute("SELECT metric, value FROM db_stats")
+        stats = dict(cur.fetchall())
         
-        cur.execute("SELECT COUNT(*) FROM scorecards")
-        stats['scorecards'] = cur.fetchone()[0]
+        # Both read the database header, not the tables
+        page_count = cur.execute("PRAGMA page_count").fetchone()[0]
+        page_size = cur.execute("PRAGMA page_size").fetchone()[0]
+        stats['db_pages'] = page_count
+        stats['db_size_kb'] = page_count * page_size / 1024
         
         return stats
     finally:
         conn.close()
 
 
+def _delete_players(conn: sqlite3.Connection) -> int:
+    """Write operation: delete every player"""
+    return conn.execute("DELETE FROM players").rowcount
+
+
 def clear_all_players():
     """
     Clear all players from the database
@@ -150,19 +293,32 @@ def clear_all_players():
     Returns:
         int: Number of players deleted
     """
-    conn = sqlite3.connect(DB_PATH)
+    return run_write(_delete_players)
+
+
+def _upsert_players(conn: sqlite3.Connection, rows: list, batch_size: int) -> int:
+    """Write operation: upsert API player rows in batches and stamp last_sync_at"""
     cur = conn.cursor()
-    
-    try:
-        cur.execute("SELECT COUNT(*) FROM players")
-        count = cur.fetchone()[0]
-        
-        cur.execute("DELETE FROM players")
-        conn.commit()
-        
-        return count
-    finally:
-        conn.close()
+    for batch in _batches(rows, batch_size):
+        cur.executemany(PLAYER_PAYLOAD_UPSERT_SQL, batch)
+    _set_stat(cur, "last_sync_at", int(time.time()))
+    return len(rows)
+
+
+def bulk_upsert_players(players: Iterable[Player], batch_size: int = SYNC_BATCH_SIZE) -> int:
+    """
+    Upsert API players in batches, all in one transaction
+
+    Args:
+        players: Parsed players (list or stream)
+        batch_size: Rows per executemany
+
+    Returns:
+        int: Number of players written
+    """
+    rows = [p.row() for p in players]
+    _ensure_write_schema()
+    return run_write(_upsert_players, rows, batch_size)
 
 
 def bulk_import_top_players(team_id: int = 2, headers: dict = None):
@@ -192,93 +348,56 @@ def bulk_import_top_players(team_id: int = 2, headers: dict = None):
         raise Exception(f"Failed to fetch players from API: {status} - {data}")
     
     # Parse the response to extract players
-    players = []
-    if isinstance(data, dict):
-        # Try different possible response structures
-        player_list = data.get("player") or data.get("players") or data.get("data") or []
-    elif isinstance(data, list):
-        player_list = data
-    else:
-        player_list = []
+    players = parse_roster(data, default_country="India" if team_id == 2 else None)
     
-    if not player_list:
+    if not players:
         raise Exception("No players found in API response")
     
-    conn = sqlite3.connect(DB_PATH)
+    return bulk_upsert_players(players)
+
+
+def _upsert_matches(conn: sqlite3.Connection, rows: list, live: int, batch_size: int) -> int:
+    """Write operation: upsert match rows in batches and record the live count"""
     cur = conn.cursor()
-    
-    try:
-        count = 0
-        for p in player_list:
-            # Extract player information from API response
-            player_id = p.get("id") or p.get("playerId")
-            name = p.get("name") or p.get("fullName")
-            
-            if not player_id or not name:
-                continue
-            
-            country = p.get("country") or p.get("intlTeam") or "India"
-            role = p.get("role") or p.get("playingRole") or "Player"
-            batting_style = p.get("bat") or p.get("batting_style") or p.get("battingStyle")
-            bowling_style = p.get("bowl") or p.get("bowling_style") or p.get("bowlingStyle")
-            
-            cur.execute("""
-            INSERT OR REPLACE INTO players 
-            (player_id, name, country, role, batting_style, bowling_style)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """, (player_id, name, country, role, batting_style, bowling_style))
-            count += 1
-        
-        conn.commit()
-        return count
-    finally:
-        conn.close()
+    for batch in _batches(rows, batch_size):
+        cur.executemany(MATCH_UPSERT_SQL, batch)
 
+    _set_stat(cur, "live_matches", live)
+    _set_stat(cur, "last_sync_at", int(time.time()))
+    return len(rows)
 
-def bulk_sync_matches(match_options: list):
+
+def bulk_sync_matches(matches: Iterable[MatchInfo], batch_size: int = SYNC_BATCH_SIZE):
     """
     Bulk save all matches from live scores API
     
     Args:
-        match_options: List of match options from build_match_options()
+        matches: Parsed matches - build_match_options() or a stream
+                 such as models.iter_live_matches()
+        batch_size: Matches per executemany
     
     Returns:
         int: Number of matches saved
     """
-    conn = sqlite3.connect(DB_PATH)
+    rows = []
+    live = 0
+    for m in matches:  # A stream is read here, not on the writer thread
+        rows.append(m.row())
+        live += m.is_live
+    _ensure_write_schema()
+    return run_write(_upsert_matches, rows, live, batch_size)
+
+
+def _replace_scorecards(conn: sqlite3.Connection, scorecards: list) -> int:
+    """Write operation: replace the innings of several matches"""
     cur = conn.cursor()
-    
-    try:
-        count = 0
-        for match_opt in match_options:
-            info = match_opt.get("matchInfo", {})
-            match_id = info.get("matchId")
-            if not match_id:
-                continue
-            
-            cur.execute("""
-            INSERT OR REPLACE INTO matches 
-            (match_id, series_name, match_desc, match_format, team1, team2, 
-             venue_ground, venue_city, status, start_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                match_id,
-                info.get("seriesName"),
-                info.get("matchDesc"),
-                info.get("matchFormat"),
-                info.get("team1", {}).get("teamName"),
-                info.get("team2", {}).get("teamName"),
-                info.get("venueInfo", {}).get("ground"),
-                info.get("venueInfo", {}).get("city"),
-                info.get("status"),
-                info.get("startDate")
-            ))
-            count += 1
-        
-        conn.commit()
-        return count
-    finally:
-        conn.close()
+    count = 0
+    for match_id, rows, header in scorecards:
+        count += _write_innings(cur, match_id, rows, SYNC_BATCH_SIZE)
+        _merge_match_header(cur, match_id, header)
+
+    _set_stat(cur, "last_sync_at", int(time.time()))
+    return count
 
 
 def bulk_sync_scorecards(scorecards_data: list):
@@ -286,43 +405,12 @@ def bulk_sync_scorecards(scorecards_data: list):
     Bulk save scorecards for multiple matches
     
     Args:
-        scorecards_data: List of tuples (match_id, scorecard_dict)
+        scorecards_data: List of tuples (match_id, innings list or raw scorecard dict)
     
     Returns:
         int: Number of innings saved
     """
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    
-    try:
-        count = 0
-        for match_id, scorecard_data in scorecards_data:
-            if not scorecard_data:
-                continue
-                
-            innings_list = scorecard_data.get("scorecard", [])
-            
-            # Delete existing scorecard data for this match
-            cur.execute("DELETE FROM scorecards WHERE match_id = ?", (match_id,))
-            
-            # Insert new scorecard data
-            for innings_idx, inn in enumerate(innings_list, 1):
-                cur.execute("""
-                INSERT INTO scorecards 
-                (match_id, innings_id, bat_team, runs, wickets, overs, runrate)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    match_id,
-                    innings_idx,
-                    inn.get("batteamname"),
-                    inn.get("score"),
-                    inn.get("wickets"),
-                    inn.get("overs"),
-                    inn.get("runrate")
-                ))
-                count += 1
-        
-        conn.commit()
-        return count
-    finally:
-        conn.close()
+    scorecards = [(match_id, _scorecard_rows(match_id, scorecard), _header_json(scorecard))
+                  for match_id, scorecard in scorecards_data if scorecard]
+    _ensure_write_schema()
+    return run_write(_replace_scorecards, scorecards)
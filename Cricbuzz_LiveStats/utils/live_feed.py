@@ -0,0 +1,306 @@
+"""
+In-process live feed for Cricbuzz LiveStats
+
+One LiveFeed per process (held in `st.cache_resource` by the Live Scores page)
+polls the Cricbuzz API from a background thread and keeps the latest live
+match list and watched scorecards in memory; for matches whose over-by-over
+view is open it also ingests new ball-by-ball commentary into the database.
+A match's first ingest (its whole history, up to MAX_COMMENTARY_PAGES
+requests) runs on a thread of its own, so it never holds up the poll.
+Every snapshot carries a version number that only moves when the payload
+changes, so sessions either read the latest snapshot or block in
+wait_for_update() until a newer one is published.
+API calls scale with the number of watched matches, not with the number of users.
+"""
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from utils.api_client import build_match_options, fetch_live_scores, fetch_scorecard
+from utils.commentary import get_cursor, ingest_commentary
+from utils.db_sync import save_scorecard
+from utils.models import Innings, MatchInfo, parse_scorecard
+
+# Payloads are parsed once per poll; snapshots hold only the parsed models.
+# matches/innings stay None until the first successful fetch.
+LiveSnapshot = namedtuple("LiveSnapshot", ["version", "fetched_at", "matches", "error"])
+ScorecardSnapshot = namedtuple("ScorecardSnapshot", ["version", "fetched_at", "innings", "error"])
+# Balls live in the database; the snapshot tells readers whether they moved
+CommentarySnapshot = namedtuple("CommentarySnapshot", ["version", "fetched_at", "cursor", "error"])
+
+POLL_INTERVAL = 10
+# Stop polling a scorecard nobody has read for this long; pause entirely when idle
+WATCH_TTL = 120
+
+
+class LiveFeed:
+    """Background poller that owns the live match list and watched scorecards"""
+
+    def __init__(self, headers: dict, interval: float = POLL_INTERVAL, save_scorecards: bool = True):
+        """
+        Args:
+            headers: API request headers
+            interval: Seconds between polls
+            save_scorecards: Save each changed scorecard to the database
+        """
+        self._headers = headers
+        self._interval = interval
+        self._save_scorecards = save_scorecards
+
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._version = 0
+        self._live = LiveSnapshot(0, None, None, None)
+        self._scorecards: Dict[int, ScorecardSnapshot] = {}
+        self._watched: Dict[int, float] = {}
+        self._commentary: Dict[int, CommentarySnapshot] = {}
+        self._commentary_watched: Dict[int, float] = {}
+        self._history_loading = set()
+        self._last_read = 0.0
+        self.polls = 0
+
+    # ---------------- readers ----------------
+
+    @property
+    def version(self) -> int:
+        """Feed-wide version; increases whenever any snapshot changes"""
+        return self._version
+
+    def live(self, wait: float = 15.0) -> LiveSnapshot:
+        """
+        Get the latest live match list
+
+        Starts the poller on first use and waits (up to `wait` seconds) for the
+        first poll so a cold process does not render an empty page.
+
+        Args:
+            wait: Max seconds to wait if nothing has been fetched yet
+
+        Returns:
+            LiveSnapshot: version, fetched_at, matches, error
+        """
+        self._touch()
+        if self._live.fetched_at is None:
+            self._await(lambda: self._live.fetched_at is not None, wait)
+        return self._live
+
+    def scorecard(self, match_id: int, wait: float = 15.0) -> Optional[ScorecardSnapshot]:
+        """
+        Get the latest scorecard for a match and keep it watched
+
+        Args:
+            match_id: Match ID from Cricbuzz API
+            wait: Max seconds to wait if it has not been fetched yet
+
+        Returns:
+            ScorecardSnapshot or None if the first fetch has not finished in time
+        """
+        match_id = int(match_id)
+        with self._cond:
+            new = match_id not in self._watched
+            self._watched[match_id] = time.monotonic()
+        self._touch(poll_now=new)
+        if match_id not in self._scorecards:
+            self._await(lambda: match_id in self._scorecards, wait)
+        return self._scorecards.get(match_id)
+
+    def commentary(self, match_id: int, wait: float = 15.0) -> Optional[CommentarySnapshot]:
+        """
+        Keep a match's commentary ingested and get its latest ingest status
+
+        Args:
+            match_id: Match ID from Cricbuzz API
+            wait: Max seconds to wait if it has not been ingested yet
+
+        Returns:
+            CommentarySnapshot (cursor = newest stored ball) or None if the
+            first ingest has not finished in time
+        """
+        match_id = int(match_id)
+        with self._cond:
+            new = match_id not in self._commentary_watched
+            self._commentary_watched[match_id] = time.monotonic()
+        self._touch(poll_now=new)
+        if match_id not in self._commentary:
+            self._await(lambda: match_id in self._commentary, wait)
+        return self._commentary.get(match_id)
+
+    def wait_for_update(self, since_version: int, timeout: float) -> int:
+        """
+        Block until the feed version moves past since_version
+
+        Args:
+            since_version: Version the caller has already rendered
+            timeout: Max seconds to wait
+
+        Returns:
+            int: Current version (unchanged if the wait timed out)
+        """
+        self._touch()
+        self._await(lambda: self._version > since_version, timeout)
+        return self._version
+
+    def stats(self) -> Dict:
+        """Feed status for display: version, polls, watched matches, last fetch"""
+        with self._cond:
+            return {
+                "version": self._version,
+                "polls": self.polls,
+                "watched": sorted(self._watched),
+                "commentary": sorted(self._commentary_watched),
+                "fetched_at": self._live.fetched_at,
+                "error": self._live.error,
+            }
+
+    # ---------------- lifecycle ----------------
+
+    def start(self):
+        """Start the poller thread (idempotent)"""
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the poller thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def refresh(self):
+        """Ask the poller to poll now instead of at the next interval"""
+        self._touch(poll_now=True)
+
+    # ---------------- internals ----------------
+
+    def _touch(self, poll_now: bool = False):
+        self._last_read = time.monotonic()
+        self.start()
+        if poll_now:
+            self._wake.set()
+
+    def _await(self, predicate, timeout: float):
+        with self._cond:
+            self._cond.wait_for(predicate, timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if time.monotonic() - self._last_read < WATCH_TTL:
+                try:
+                    self.poll()
+                except Exception as e:
+                    self._publish_live(None, f"{type(e).__name__}: {e}")
+            self._wake.wait(self._interval)
+            self._wake.clear()
+
+    def poll(self):
+        """Fetch the live list and every watched scorecard once"""
+        self.polls += 1
+        data = fetch_live_scores(self._headers)
+        if data is None:
+            self._publish_live(None, "Failed to fetch live match data")
+        else:
+            self._publish_live(build_match_options(data), None)
+
+        now = time.monotonic()
+        with self._cond:
+            for match_id, last in list(self._watched.items()):
+                if now - last > WATCH_TTL:
+                    del self._watched[match_id]
+                    self._scorecards.pop(match_id, None)
+            watched = list(self._watched)
+            for match_id, last in list(self._commentary_watched.items()):
+                if now - last > WATCH_TTL:
+                    del self._commentary_watched[match_id]
+                    self._commentary.pop(match_id, None)
+            commentary = list(self._commentary_watched)
+
+        for match_id in watched:
+            url, result = fetch_scorecard(match_id, self._headers)
+            if url is None:
+                self._publish_scorecard(match_id, None, result)
+            else:
+                self._publish_scorecard(match_id, parse_scorecard(result), None)
+
+        # Only balls newer than each match's cursor are requested and stored
+        for match_id in commentary:
+            with self._cond:
+                if match_id in self._history_loading:
+                    continue
+            try:
+                if get_cursor(match_id) is None:
+                    self._load_history(match_id)
+                    continue
+                result = ingest_commentary(match_id, self._headers)
+                self._publish_commentary(match_id, result.cursor, result.error)
+            except Exception as e:
+                self._publish_commentary(match_id, None, f"{type(e).__name__}: {e}")
+
+    def _load_history(self, match_id: int):
+        """Run a match's first (full history) ingest off the poll thread"""
+        def load():
+            try:
+                result = ingest_commentary(match_id, self._headers)
+                cursor, error = result.cursor, result.error
+            except Exception as e:
+                cursor, error = None, f"{type(e).__name__}: {e}"
+            with self._cond:
+                self._history_loading.discard(match_id)
+                watched = match_id in self._commentary_watched
+            if watched:
+                self._publish_commentary(match_id, cursor, error)
+
+        with self._cond:
+            self._history_loading.add(match_id)
+        threading.Thread(target=load, name=f"commentary-history-{match_id}", daemon=True).start()
+
+    def _bump(self) -> int:
+        # Called with the condition held
+        self._version += 1
+        return self._version
+
+    def _publish_live(self, matches: Optional[List[MatchInfo]], error: Optional[str]):
+        with self._cond:
+            old = self._live
+            # A failed poll keeps serving the last good match list
+            matches = matches if matches is not None else old.matches
+            changed = old.fetched_at is None or matches != old.matches or error != old.error
+            version = self._bump() if changed else old.version
+            self._live = LiveSnapshot(version, time.time(), matches, error)
+            self._cond.notify_all()
+
+    def _publish_scorecard(self, match_id: int, innings: Optional[List[Innings]], error):
+        with self._cond:
+            old = self._scorecards.get(match_id)
+            if old is not None and innings is None and old.innings is not None:
+                # Keep the last good scorecard over a transient endpoint failure
+                self._scorecards[match_id] = old._replace(fetched_at=time.time())
+                self._cond.notify_all()
+                return
+            changed = old is None or (innings, error) != (old.innings, old.error)
+            version = self._bump() if changed else old.version
+            self._scorecards[match_id] = ScorecardSnapshot(version, time.time(), innings, error)
+            self._cond.notify_all()
+
+        # Each change is saved once per process, not once per viewer
+        if changed and innings is not None and self._save_scorecards:
+            try:
+                save_scorecard(match_id, innings)
+            except Exception:
+                pass  # Silent fail; the in-memory feed is still current
+
+    def _publish_commentary(self, match_id: int, cursor: Optional[int], error: Optional[str]):
+        with self._cond:
+            old = self._commentary.get(match_id)
+            if old is not None and cursor is None:
+                cursor = old.cursor
+            changed = old is None or (cursor, error) != (old.cursor, old.error)
+            version = self._bump() if changed else old.version
+            self._commentary[match_id] = CommentarySnapshot(version, time.time(), cursor, error)
+            self._cond.notify_all()
@@ -0,0 +1,589 @@
+"""
+Typed models and single-pass parsers for Cricbuzz API payloads
+
+Each payload is walked once into compact `__slots__` dataclasses that every
+consumer (live feed, DB sync, pages) shares, instead of re-walking nested
+dicts with `.get()` chains. `loads()` uses orjson when it is installed and
+falls back to the standard json module.
+
+The iter_* parsers read a response body incrementally with ijson (when
+installed) and yield one match or innings at a time, so memory is bounded by
+the largest innings rather than the whole payload.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import IO, Any, Iterator, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional; iter_* parsers fall back to a full decode
+    ijson = None
+
+LIVE_MATCH_INFO_PREFIX = "typeMatches.item.seriesMatches.item.seriesAdWrapper.matches.item.matchInfo"
+SCORECARD_INNINGS_PREFIX = "scorecard.item"
+
+# balls.extra_type codes
+EXTRA_NONE, EXTRA_WIDE, EXTRA_NO_BALL, EXTRA_BYE, EXTRA_LEG_BYE = range(5)
+
+# Outcome tokens of a commentary line, matched whole: extras, then runs
+_EXTRAS_TOKEN_RE = re.compile(r"(?:(\d+)\s+)?(wides?|no\s*ball|leg\s*byes?|byes?)")
+_RUNS_TOKEN_RE = re.compile(r"no run|(\d+)\s+runs?|(four)|(six)")
+# Commentary formatting placeholders such as 'B0$' (bold text substituted by the app)
+_COMM_MARKUP_RE = re.compile(r"\b[A-Z]\d+\$")
+
+# matchInfo.state values for matches that are not in play
+NOT_LIVE_STATES = frozenset({"Complete", "Preview", "Upcoming", "Abandon"})
+
+
+def dumps(value: Any) -> str:
+    """
+    Encode a value as compact JSON text, with orjson if available
+
+    Args:
+        value: JSON-serialisable value
+
+    Returns:
+        str: JSON text
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(payload: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON payload, with orjson if available
+
+    Args:
+        payload: Raw response body
+
+    Returns:
+        Decoded JSON value
+    """
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+@dataclass(slots=True)
+class MatchInfo:
+    match_id: int
+    series_name: Optional[str] = None
+    match_desc: Optional[str] = None
+    match_format: Optional[str] = None
+    team1: Optional[str] = None
+    team2: Optional[str] = None
+    venue_ground: Optional[str] = None
+    venue_city: Optional[str] = None
+    status: Optional[str] = None
+    state: Optional[str] = None
+    start_date: Optional[int] = None
+    # Source matchInfo as JSON text, stored in matches.raw_json
+    raw: Optional[str] = field(default=None, compare=False, repr=False)
+
+    @property
+    def label(self) -> str:
+        """Select box label, e.g. 'India vs Australia — 1st Test (In Progress)'"""
+        return (f"{self.team1 or 'Team 1'} vs {self.team2 or 'Team 2'} — "
+                f"{self.match_desc or ''} ({self.state or ''})")
+
+    @property
+    def is_live(self) -> bool:
+        return self.state not in NOT_LIVE_STATES
+
+    def row(self) -> tuple:
+        """Parameters for MATCH_UPSERT_SQL"""
+        return (self.match_id, self.series_name, self.match_desc, self.match_format,
+                self.team1, self.team2, self.venue_ground, self.venue_city,
+                self.status, self.start_date, self.raw)
+
+
+@dataclass(slots=True)
+class BatterLine:
+    name: Optional[str]
+    runs: Optional[int] = None
+    balls: Optional[int] = None
+    fours: Optional[int] = None
+    sixes: Optional[int] = None
+    strike_rate: Optional[float] = None
+    dismissal: Optional[str] = None
+
+
+@dataclass(slots=True)
+class BowlerLine:
+    name: Optional[str]
+    overs: Optional[float] = None
+    maidens: Optional[int] = None
+    runs: Optional[int] = None
+    wickets: Optional[int] = None
+    economy: Optional[float] = None
+
+
+@dataclass(slots=True)
+class Innings:
+    innings_id: int
+    bat_team: Optional[str] = None
+    runs: Optional[int] = None
+    wickets: Optional[int] = None
+    overs: Optional[float] = None
+    runrate: Optional[float] = None
+    # byes, legbyes, wides, noballs, penalty, total
+    extras: Tuple[int, int, int, int, int, int] = (0, 0, 0, 0, 0, 0)
+    batters: List[BatterLine] = field(default_factory=list)
+    bowlers: List[BowlerLine] = field(default_factory=list)
+    # Source innings object as JSON text, stored in scorecards.raw_json
+    raw: Optional[str] = field(default=None, compare=False, repr=False)
+
+    def row(self, match_id: int) -> tuple:
+        """Parameters for the scorecards INSERT"""
+        return (match_id, self.innings_id, self.bat_team, self.runs,
+                self.wickets, self.overs, self.runrate, self.raw)
+
+
+@dataclass(slots=True)
+class Player:
+    player_id: int
+    name: Optional[str] = None
+    country: Optional[str] = None
+    role: Optional[str] = None
+    batting_style: Optional[str] = None
+    bowling_style: Optional[str] = None
+    # Source player object as JSON text, stored in players.raw_json
+    raw: Optional[str] = field(default=None, compare=False, repr=False)
+
+    def row(self) -> tuple:
+        """Parameters for PLAYER_PAYLOAD_UPSERT_SQL"""
+        return (self.player_id, self.name, self.country, self.role,
+                self.batting_style, self.bowling_style, self.raw)
+
+
+def parse_match_info(info: dict) -> Optional[MatchInfo]:
+    """
+    Parse one matchInfo object
+
+    Args:
+        info: matchInfo dict from the API
+
+    Returns:
+        MatchInfo, or None if it has no matchId
+    """
+    match_id = info.get("matchId")
+    if not match_id:
+        return None
+    team1 = info.get("team1") or {}
+    team2 = info.get("team2") or {}
+    venue = info.get("venueInfo") or {}
+    return MatchInfo(
+        match_id,
+        info.get("seriesName"),
+        info.get("matchDesc"),
+        info.get("matchFormat"),
+        team1.get("teamName"),
+        team2.get("teamName"),
+        venue.get("ground"),
+        venue.get("city"),
+        info.get("status"),
+        info.get("state"),
+        info.get("startDate"),
+        dumps(info),
+    )
+
+
+def parse_live_matches(data: dict) -> List[MatchInfo]:
+    """
+    Parse the live scores payload in a single pass
+
+    Args:
+        data: Raw live scores response
+
+    Returns:
+        list: MatchInfo per match with a matchId, in API order
+    """
+    matches = []
+    for t in data.get("typeMatches") or ():
+        for s in t.get("seriesMatches") or ():
+            wrapper = s.get("seriesAdWrapper")
+            if not wrapper:
+                continue
+            for m in wrapper.get("matches") or ():
+                match = parse_match_info(m.get("matchInfo") or {})
+                if match is not None:
+                    matches.append(match)
+    return matches
+
+
+@dataclass(slots=True)
+class Series:
+    series_id: int
+    name: Optional[str] = None
+    start_date: Optional[int] = None
+    end_date: Optional[int] = None
+
+
+def parse_series_archive(data: dict) -> List[Series]:
+    """
+    Parse a /series/v1/archives/{category} page
+
+    Args:
+        data: Response with `seriesMapProto` groups of `series`
+
+    Returns:
+        list: Series with an id, in API order
+    """
+    found = []
+    for group in data.get("seriesMapProto") or ():
+        for s in group.get("series") or ():
+            if s.get("id"):
+                found.append(Series(int(s["id"]), s.get("name"), s.get("startDt"), s.get("endDt")))
+    return found
+
+
+def parse_series_matches(data: dict) -> List[MatchInfo]:
+    """
+    Parse the matches of a /series/v1/{seriesId} response
+
+    Args:
+        data: Response with `matchDetails` day groups (ad entries are skipped)
+
+    Returns:
+        list: MatchInfo per match with a matchId, in API order
+    """
+    matches = []
+    for day in data.get("matchDetails") or ():
+        for m in (day.get("matchDetailsMap") or {}).get("match") or ():
+            match = parse_match_info(m.get("matchInfo") or {})
+            if match is not None:
+                matches.append(match)
+    return matches
+
+
+def parse_innings(innings_id: int, inn: dict) -> Innings:
+    """
+    Parse one innings object with its batting and bowling lines
+
+    Args:
+        innings_id: 1-based innings number
+        inn: Innings dict from the scorecard payload
+
+    Returns:
+        Innings
+    """
+    extras = inn.get("extras") or {}
+    return Innings(
+        innings_id,
+        inn.get("batteamname"),
+        inn.get("score"),
+        inn.get("wickets"),
+        inn.get("overs"),
+        inn.get("runrate"),
+        (extras.get("byes", 0), extras.get("legbyes", 0), extras.get("wides", 0),
+         extras.get("noballs", 0), extras.get("penalty", 0), extras.get("total", 0)),
+        [BatterLine(b.get("name"), b.get("runs"), b.get("balls"), b.get("fours"),
+                    b.get("sixes"), b.get("strkrate"), b.get("outdec"))
+         for b in inn.get("batsman") or ()],
+        [BowlerLine(bw.get("name"), bw.get("overs"), bw.get("maidens"), bw.get("runs"),
+                    bw.get("wickets"), bw.get("economy"))
+         for bw in inn.get("bowler") or ()],
+        dumps(inn),
+    )
+
+
+def parse_scorecard(data: dict) -> List[Innings]:
+    """
+    Parse a scorecard payload into innings with batting and bowling lines
+
+    Args:
+        data: Raw scorecard response
+
+    Returns:
+        list: Innings, numbered from 1 in API order
+    """
+    return [parse_innings(i, inn) for i, inn in enumerate(data.get("scorecard") or (), 1)]
+
+
+def iter_live_matches(body: IO[bytes]) -> Iterator[MatchInfo]:
+    """
+    Stream matches out of a live scores response body
+
+    Args:
+        body: File-like response body (bytes)
+
+    Yields:
+        MatchInfo per match with a matchId, as soon as it is decoded
+    """
+    if ijson is None:
+        yield from parse_live_matches(loads(body.read()))
+        return
+    for info in ijson.items(body, LIVE_MATCH_INFO_PREFIX, use_float=True):
+        match = parse_match_info(info)
+        if match is not None:
+            yield match
+
+
+def iter_scorecard(body: IO[bytes]) -> Iterator[Innings]:
+    """
+    Stream innings out of a scorecard response body
+
+    Args:
+        body: File-like response body (bytes)
+
+    Yields:
+        Innings (with batters and bowlers), numbered from 1, as each is decoded
+    """
+    if ijson is None:
+        yield from parse_scorecard(loads(body.read()))
+        return
+    for i, inn in enumerate(ijson.items(body, SCORECARD_INNINGS_PREFIX, use_float=True), 1):
+        yield parse_innings(i, inn)
+
+
+@dataclass(slots=True)
+class Ball:
+    innings: int
+    ts: int  # commentary timestamp (ms); orders balls within a match
+    over: int  # completed overs before this ball, e.g. 19 for 19.4
+    ball: int  # ball within the over as shown by the API (wides repeat it)
+    runs: int  # off the bat
+    extras: int
+    extra_type: int  # EXTRA_* code
+    wicket: int
+    batter_id: Optional[int]
+    bowler_id: Optional[int]
+    batter: Optional[str] = field(default=None, compare=False, repr=False)
+    bowler: Optional[str] = field(default=None, compare=False, repr=False)
+
+    def row(self, match_id: int) -> tuple:
+        """Parameters for BALL_INSERT_SQL"""
+        return (match_id, self.innings, self.ts, self.over, self.ball, self.runs, self.extras,
+                self.extra_type, self.wicket, self.batter_id, self.bowler_id)
+
+
+def parse_ball_outcome(text: str, event: str = "") -> Tuple[int, int, int, int]:
+    """
+    Read the outcome of a ball from its commentary line
+
+    Lines read 'Bowler to Batter, <outcome>, <description>', with outcomes
+    such as 'no run', '2 runs', 'FOUR', 'wide', '3 wides', 'leg byes, 1 run',
+    'no ball, SIX' or 'out Caught by ...'. Only whole outcome tokens and the
+    event flags are read; words in the description never count.
+
+    Args:
+        text: commText
+        event: The entry's event flags, e.g. 'WICKET' or 'FOUR,HIGHSCORE'
+
+    Returns:
+        tuple: (bat runs, extras, extra_type, wicket 0/1)
+    """
+    parts = [p.strip().rstrip("!.").strip().lower()
+             for p in _COMM_MARKUP_RE.sub("", text or "").split(",")]
+    event = {e.strip() for e in (event or "").upper().split(",")}
+    wicket = int("WICKET" in event)
+    # Only the outcome tokens are read, never the free-text description after
+    # them ('1 run, pushed wide of mid-off' is a single, not a wide)
+    start = 1 if len(parts) > 1 and not _outcome_token(parts[0]) else 0
+    extra_type, extra_count, counted, byes_off_no_ball = EXTRA_NONE, None, None, False
+    for position, token in enumerate(parts[start:start + 3]):
+        kind = _outcome_token(token)
+        if kind == "out" and position == 0:
+            wicket = 1
+            break
+        if kind == "extras" and counted is None:
+            match = _EXTRAS_TOKEN_RE.fullmatch(token)
+            name = match.group(2).replace(" ", "")
+            code = (EXTRA_WIDE if name.startswith("wide") else EXTRA_NO_BALL if name == "noball"
+                    else EXTRA_LEG_BYE if name.startswith("legbye") else EXTRA_BYE)
+            if extra_type == EXTRA_NO_BALL and code in (EXTRA_BYE, EXTRA_LEG_BYE):
+                byes_off_no_ball = True
+            elif extra_type == EXTRA_NONE:
+                extra_type = code
+                extra_count = int(match.group(1)) if match.group(1) else None
+            continue
+        if kind == "runs":
+            match = _RUNS_TOKEN_RE.fullmatch(token)
+            counted = 4 if match.group(2) else 6 if match.group(3) else int(match.group(1) or 0)
+        break
+    if counted is None:
+        # No runs token ('wide', '3 byes', 'out ...'): boundary flags still count
+        counted = 6 if "SIX" in event else 4 if "FOUR" in event else extra_count or 0
+
+    if extra_type == EXTRA_WIDE:
+        return 0, extra_count or 1 + counted, EXTRA_WIDE, wicket
+    if extra_type == EXTRA_NO_BALL:
+        # A no-ball's runs are off the bat unless they were byes
+        if byes_off_no_ball:
+            return 0, 1 + counted, EXTRA_NO_BALL, wicket
+        return counted, 1, EXTRA_NO_BALL, wicket
+    if extra_type in (EXTRA_BYE, EXTRA_LEG_BYE):
+        return 0, counted, extra_type, wicket
+    return counted, 0, EXTRA_NONE, wicket
+
+
+def _outcome_token(token: str) -> Optional[str]:
+    """'extras', 'runs' or 'out' if a comma-separated part is a whole outcome token, else None"""
+    if _EXTRAS_TOKEN_RE.fullmatch(token):
+        return "extras"
+    if _RUNS_TOKEN_RE.fullmatch(token):
+        return "runs"
+    if re.match(r"out\b", token):
+        return "out"
+    return None
+
+
+def parse_commentary(data: dict) -> List[Ball]:
+    """
+    Parse the ball entries of a commentary page
+
+    Entries without an over number or bowler (over summaries, pre-match
+    notes) are skipped.
+
+    Args:
+        data: /mcenter/v1/{id}/comm or hcomm response with `commentaryList`
+
+    Returns:
+        list: Ball per delivery, oldest first
+    """
+    balls = []
+    for c in data.get("commentaryList") or ():
+        over_number = c.get("overNumber")
+        bowler = c.get("bowlerStriker") or {}
+        if over_number is None or not c.get("timestamp") or not bowler.get("bowlId"):
+            continue
+        batter = c.get("batsmanStriker") or {}
+        over = int(float(over_number))
+        runs, extras, extra_type, wicket = parse_ball_outcome(c.get("commText"), c.get("event"))
+        balls.append(Ball(
+            int(c.get("inningsId") or 1), int(c["timestamp"]), over,
+            round((float(over_number) - over) * 10), runs, extras, extra_type, wicket,
+            int(batter["batId"]) if batter.get("batId") else None, int(bowler["bowlId"]),
+            batter.get("batName"), bowler.get("bowlName"),
+        ))
+    balls.sort(key=lambda b: b.ts)
+    return balls
+
+
+def parse_player(p: dict, default_country: Optional[str] = None,
+                 default_role: Optional[str] = None) -> Optional[Player]:
+    """
+    Parse a player object from the search, info or team endpoints
+
+    Args:
+        p: Player dict from the API
+        default_country: Country when the payload has none
+        default_role: Role when the payload has none
+
+    Returns:
+        Player, or None if it has no id
+    """
+    player_id = p.get("id") or p.get("playerId")
+    if not player_id:
+        return None
+    return Player(
+        int(player_id),
+        p.get("name") or p.get("fullName"),
+        p.get("intlTeam") or p.get("country") or default_country,
+        p.get("role") or p.get("playingRole") or default_role,
+        p.get("bat") or p.get("batting_style") or p.get("battingStyle"),
+        p.get("bowl") or p.get("bowling_style") or p.get("bowlingStyle"),
+        dumps(p),
+    )
+
+
+# Roster section headers (entries without an id) -> role of the players below them
+ROSTER_SECTION_ROLES = (
+    ("WICKET", "WK-Batsman"),
+    ("ALL", "All-rounder"),
+    ("BOWL", "Bowler"),
+    ("BAT", "Batsman"),
+)
+
+
+@dataclass(slots=True)
+class Team:
+    team_id: int
+    name: Optional[str] = None
+    short_name: Optional[str] = None
+    category: Optional[str] = None
+
+    def row(self) -> tuple:
+        """Parameters for TEAM_UPSERT_SQL"""
+        return (self.team_id, self.name, self.short_name, self.category)
+
+
+def parse_teams(data: Any, category: str) -> List[Team]:
+    """
+    Parse a /teams/v1/{category} list
+
+    Args:
+        data: Response dict with a `list` of teams (and unnumbered group headers)
+        category: international, league, domestic or women
+
+    Returns:
+        list: Teams that have a teamId
+    """
+    items = data.get("list") or [] if isinstance(data, dict) else []
+    return [Team(int(t["teamId"]), t.get("teamName"), t.get("teamSName"), category)
+            for t in items if isinstance(t, dict) and t.get("teamId")]
+
+
+def parse_roster(data: Any, default_country: Optional[str] = None) -> List[Player]:
+    """
+    Parse a /teams/v1/{teamId}/players roster
+
+    The roster interleaves section headers ('BATSMEN', 'ALL ROUNDER', ...)
+    with players; each player takes the role of the section it is listed in.
+
+    Args:
+        data: Roster response
+        default_country: Country for players whose payload has none
+
+    Returns:
+        list: Players that have both an id and a name
+    """
+    items = data.get("player") or [] if isinstance(data, dict) else data or []
+    players = []
+    section_role = None
+    for p in items:
+        if not isinstance(p, dict):
+            continue
+        if not (p.get("id") or p.get("playerId")):
+            header = (p.get("name") or "").upper()
+            section_role = next((role for key, role in ROSTER_SECTION_ROLES if key in header), None)
+            continue
+        player = parse_player(p, default_country, section_role)
+        if player is not None and player.name:
+            players.append(player)
+    return players
+
+
+def parse_players(data: Any, default_country: Optional[str] = None,
+                  default_role: Optional[str] = None) -> List[Player]:
+    """
+    Parse a list of players from any of the API's list shapes
+
+    Args:
+        data: Response dict (player/players/data key) or list
+        default_country: Country when a player has none
+        default_role: Role when a player has none
+
+    Returns:
+        list: Players that have both an id and a name
+    """
+    if isinstance(data, dict):
+        items = data.get("player") or data.get("players") or data.get("data") or []
+    elif isinstance(data, list):
+        items = data
+    else:
+        items = []
+
+    players = []
+    for p in items:
+        player = parse_player(p, default_country, default_role)
+        if player is not None and player.name:
+            players.append(player)
+    return players
@@ -0,0 +1,471 @@
+"""
+Content-addressed archive of raw Cricbuzz API responses
+
+Every successful response from utils/api_client.py is stored once as a gzip
+blob named by the SHA-256 of its bytes (db/payloads/<2>/<sha>.json.gz), and
+indexed as (endpoint, key, fetched_at, sha256) in db/payloads/index.db.
+Identical payloads - an unchanged live list polled every 10s - cost one
+index row, not another blob.
+
+Payloads that are polled while they change keep a bounded history: only the
+newest KEEP_LATEST per key of the LATEST_ONLY endpoints (replay uses just the
+newest anyway), and for the live list the newest KEEP_LATEST plus one per
+LIVE_THIN_SECONDS. Older index rows are dropped as new ones arrive, and blobs
+no longer referenced are deleted.
+
+`replay` rebuilds matches, scorecards, players and teams from the archive with no
+network calls: worker processes decompress and parse blobs in parallel, and
+the parent applies the parsed rows in fetch order in a single transaction.
+
+Usage:
+    python -m utils.payload_archive stats
+    python -m utils.payload_archive prune
+    python -m utils.payload_archive replay [--workers 4] [--reset]
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, IO, Iterable, List, Optional, Set, Tuple
+
+from utils.models import (
+    dumps, loads, parse_live_matches, parse_player, parse_roster, parse_scorecard, parse_series_matches,
+    parse_teams
+)
+
+DB_PATH = "db/cricbuzz.db"
+PAYLOAD_DIR = "db/payloads"
+INDEX_PATH = os.path.join(PAYLOAD_DIR, "index.db")
+
+# Set CRICBUZZ_ARCHIVE_PAYLOADS=0 to stop archiving responses
+ARCHIVE_ENABLED = os.getenv("CRICBUZZ_ARCHIVE_PAYLOADS", "1") != "0"
+
+# Endpoint names used in the index (api_client passes these)
+LIVE = "live"
+SCORECARD = "scorecard"
+PLAYER_INFO = "player_info"
+TEAM_PLAYERS = "team_players"
+TEAM_LIST = "team_list"
+SERIES_ARCHIVE = "series_archive"
+SERIES_MATCHES = "series_matches"
+PLAYER_SEARCH = "player_search"
+PLAYER_BATTING = "player_batting"
+PLAYER_BOWLING = "player_bowling"
+
+# Endpoints where only the newest payload per key matters on replay
+LATEST_ONLY = (SCORECARD, PLAYER_INFO, SERIES_MATCHES)
+
+# Retention for repeatedly fetched payloads: newest kept per (endpoint, key)
+KEEP_LATEST = 3
+# Older live lists are thinned to the last one of each period (seconds)
+LIVE_THIN_SECONDS = 3600
+
+_index_ready = False
+
+
+def _connect_index() -> sqlite3.Connection:
+    """Open the payload index, creating it once per process"""
+    global _index_ready
+    os.makedirs(PAYLOAD_DIR, exist_ok=True)
+    conn = sqlite3.connect(INDEX_PATH)
+    if not _index_ready:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS payload_index (
+            id INTEGER PRIMARY KEY,
+            endpoint TEXT NOT NULL,
+            key TEXT NOT NULL DEFAULT '',
+            fetched_at REAL NOT NULL,
+            sha256 TEXT NOT NULL,
+            size INTEGER NOT NULL
+        )
+        """)
+        conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_payload_endpoint_key
+        ON payload_index(endpoint, key, fetched_at)
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_payload_sha256 ON payload_index(sha256)")
+        conn.commit()
+        _index_ready = True
+    return conn
+
+
+def blob_path(digest: str) -> str:
+    """
+    Get the blob file path for a payload hash
+
+    Args:
+        digest: SHA-256 hex digest of the raw payload
+
+    Returns:
+        str: Path of the gzip blob
+    """
+    return os.path.join(PAYLOAD_DIR, digest[:2], f"{digest}.json.gz")
+
+
+def _prune_key(conn: sqlite3.Connection, endpoint: str, key: str) -> Set[str]:
+    """Drop index rows of one (endpoint, key) beyond the retention policy -> their hashes"""
+    if endpoint in LATEST_ONLY:
+        keep = "SELECT id FROM payload_index WHERE endpoint = ? AND key = ? ORDER BY id DESC LIMIT ?"
+        keep_args = (endpoint, key, KEEP_LATEST)
+    elif endpoint == LIVE:
+        keep = ("SELECT id FROM (SELECT id FROM payload_index WHERE endpoint = ? AND key = ? "
+                "ORDER BY id DESC LIMIT ?) "
+                "UNION SELECT MAX(id) FROM payload_index WHERE endpoint = ? AND key = ? "
+                "GROUP BY CAST(fetched_at / ? AS INTEGER)")
+        keep_args = (endpoint, key, KEEP_LATEST, endpoint, key, LIVE_THIN_SECONDS)
+    else:
+        return set()
+    where = f"endpoint = ? AND key = ? AND id NOT IN ({keep})"
+    args = (endpoint, key, *keep_args)
+    dropped = {r[0] for r in conn.execute(f"SELECT sha256 FROM payload_index WHERE {where}", args)}
+    if dropped:
+        conn.execute(f"DELETE FROM payload_index WHERE {where}", args)
+    return dropped
+
+
+def _remove_unreferenced(conn: sqlite3.Connection, digests: Iterable[str]) -> int:
+    """Delete the blobs of hashes no index row points to any more"""
+    removed = 0
+    for digest in digests:
+        if conn.execute("SELECT 1 FROM payload_index WHERE sha256 = ? LIMIT 1", (digest,)).fetchone():
+            continue
+        try:
+            os.remove(blob_path(digest))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _index(endpoint: str, key, digest: str, size: int):
+    key = "" if key is None else str(key)
+    conn = _connect_index()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO payload_index (endpoint, key, fetched_at, sha256, size) VALUES (?, ?, ?, ?, ?)",
+                (endpoint, key, time.time(), digest, size)
+            )
+            dropped = _prune_key(conn, endpoint, key)
+        _remove_unreferenced(conn, dropped)
+    finally:
+        conn.close()
+
+
+def _write_blob(path: str, raw: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f, gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+        gz.write(raw)
+    os.replace(tmp_path, path)
+
+
+def store_payload(endpoint: str, key, raw: bytes) -> str:
+    """
+    Archive one raw response body
+
+    Args:
+        endpoint: Endpoint name, e.g. "scorecard"
+        key: Endpoint key, e.g. the match ID ("" for the live list)
+        raw: Response body bytes
+
+    Returns:
+        str: SHA-256 of the payload
+    """
+    digest = hashlib.sha256(raw).hexdigest()
+    path = blob_path(digest)
+    if not os.path.exists(path):
+        _write_blob(path, raw)
+    _index(endpoint, key, digest, len(raw))
+    if not os.path.exists(path):
+        _write_blob(path, raw)  # pruned by another process between the check and the index row
+    return digest
+
+
+def archive_response(endpoint: str, key, raw: bytes):
+    """
+    Archive a response if archiving is enabled, never raising
+
+    api_client calls this on every 200 response; an archive failure must not
+    break the request that produced the payload.
+    """
+    if not ARCHIVE_ENABLED:
+        return
+    try:
+        store_payload(endpoint, key, raw)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+class ArchivingReader:
+    """
+    File-like wrapper that archives a streamed body as it is read
+
+    Bytes are hashed and gzipped to a temp file on the way through, so
+    streaming ingest keeps its flat memory profile. The blob and index row
+    are committed on close(), only if the body was read to the end.
+    """
+
+    def __init__(self, raw: IO[bytes], endpoint: str, key):
+        self._raw = raw
+        self._endpoint = endpoint
+        self._key = key
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self._eof = False
+        os.makedirs(PAYLOAD_DIR, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(suffix=".tmp", dir=PAYLOAD_DIR)
+        self._file = os.fdopen(fd, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._file, mode="wb", mtime=0)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        if data:
+            self._hash.update(data)
+            self._gz.write(data)
+            self._size += len(data)
+        if not data or size is None or size < 0:
+            self._eof = True
+        return data
+
+    def close(self):
+        if self._gz is None:
+            return
+        self._gz.close()
+        self._file.close()
+        self._gz = None
+        try:
+            if self._eof:
+                digest = self._hash.hexdigest()
+                path = blob_path(digest)
+                if not os.path.exists(path):
+                    # Linked, not moved: the temp file stays until the index row is in
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    try:
+                        os.link(self._tmp_path, path)
+                    except FileExistsError:
+                        pass
+                _index(self._endpoint, self._key, digest, self._size)
+                if not os.path.exists(path):
+                    os.replace(self._tmp_path, path)  # pruned before the index row referenced it
+        except (OSError, sqlite3.Error):
+            pass
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+
+def load_payload(digest: str):
+    """
+    Read and decode an archived payload
+
+    Args:
+        digest: SHA-256 hex digest
+
+    Returns:
+        Decoded JSON value
+    """
+    with gzip.open(blob_path(digest), "rb") as f:
+        return loads(f.read())
+
+
+def archive_stats() -> Dict:
+    """
+    Summarise the archive
+
+    Returns:
+        dict: responses, unique payloads, raw bytes, stored bytes, per-endpoint counts
+    """
+    if not os.path.exists(INDEX_PATH):
+        return {"responses": 0, "unique": 0, "raw_bytes": 0, "stored_bytes": 0, "endpoints": {}}
+    conn = _connect_index()
+    try:
+        responses, unique = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT sha256) FROM payload_index"
+        ).fetchone()
+        raw_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM payload_index").fetchone()[0]
+        digests = [r[0] for r in conn.execute("SELECT DISTINCT sha256 FROM payload_index")]
+        endpoints = dict(conn.execute("SELECT endpoint, COUNT(*) FROM payload_index GROUP BY endpoint"))
+    finally:
+        conn.close()
+    stored = sum(os.path.getsize(blob_path(d)) for d in digests if os.path.exists(blob_path(d)))
+    return {"responses": responses, "unique": unique, "raw_bytes": raw_bytes,
+            "stored_bytes": stored, "endpoints": endpoints}
+
+
+def prune_archive() -> Dict[str, int]:
+    """
+    Apply the retention policy to the whole archive and delete orphaned blobs
+
+    Index rows are pruned as payloads arrive; this catches up archives made
+    before retention existed, and removes blob files no index row refers to.
+
+    Returns:
+        dict: index rows and blob files removed
+    """
+    if not os.path.exists(INDEX_PATH):
+        return {"rows": 0, "blobs": 0}
+    conn = _connect_index()
+    try:
+        before = conn.execute("SELECT COUNT(*) FROM payload_index").fetchone()[0]
+        endpoints = (*LATEST_ONLY, LIVE)
+        keys = conn.execute(
+            f"SELECT DISTINCT endpoint, key FROM payload_index "
+            f"WHERE endpoint IN ({', '.join('?' * len(endpoints))})", endpoints
+        ).fetchall()
+        with conn:
+            for endpoint, key in keys:
+                _prune_key(conn, endpoint, key)
+        after = conn.execute("SELECT COUNT(*) FROM payload_index").fetchone()[0]
+
+        on_disk = set()
+        for root, _, files in os.walk(PAYLOAD_DIR):
+            on_disk.update(f[:-len(".json.gz")] for f in files if f.endswith(".json.gz"))
+        blobs = _remove_unreferenced(conn, on_disk)
+    finally:
+        conn.close()
+    return {"rows": before - after, "blobs": blobs}
+
+
+def _replay_plan() -> List[Tuple[str, str, str]]:
+    """(endpoint, key, sha256) to apply, oldest first"""
+    conn = _connect_index()
+    try:
+        latest_only = ", ".join("?" * len(LATEST_ONLY))
+        return conn.execute(f"""
+        SELECT endpoint, key, sha256 FROM payload_index
+        WHERE endpoint NOT IN ({latest_only})
+           OR id = (SELECT MAX(id) FROM payload_index p
+                    WHERE p.endpoint = payload_index.endpoint AND p.key = payload_index.key)
+        ORDER BY fetched_at, id
+        """, LATEST_ONLY).fetchall()
+    finally:
+        conn.close()
+
+
+def _parse_archived(item: Tuple[str, str, str]) -> Tuple[str, str, List[tuple], Optional[str]]:
+    """Worker: decompress and parse one blob into DB rows (plus a scorecard's matchHeader JSON)"""
+    endpoint, key, digest = item
+    data = load_payload(digest)
+    header = None
+    if endpoint == LIVE:
+        rows = [m.row() for m in parse_live_matches(data)]
+    elif endpoint == SERIES_MATCHES:
+        rows = [m.row() for m in parse_series_matches(data)]
+    elif endpoint == SCORECARD:
+        rows = [inn.row(int(key)) for inn in parse_scorecard(data)]
+        header = dumps(data["matchHeader"]) if data.get("matchHeader") else None
+    elif endpoint == PLAYER_INFO:
+        player = parse_player(data)
+        rows = [player.row()] if player is not None else []
+    elif endpoint == TEAM_PLAYERS:
+        # Country is filled in by the parent from the replayed teams
+        rows = [p.row() for p in parse_roster(data)]
+    elif endpoint == TEAM_LIST:
+        rows = [t.row() for t in parse_teams(data, key)]
+    else:
+        rows = []
+    return endpoint, key, rows, header
+
+
+def replay_archive(workers: Optional[int] = None, reset: bool = False) -> Dict[str, int]:
+    """
+    Rebuild matches, scorecards, players and teams from archived payloads
+
+    Args:
+        workers: Parser processes (default: CPU count)
+        reset: Empty the three tables first (also drops rows that never came
+               from the API, such as players created in CRUD)
+
+    Returns:
+        dict: Payloads replayed and rows written per table
+    """
+    from db.init_sqlite import create_raw_json_schema, create_teams_schema
+    from utils.db_sync import (
+        MATCH_HEADER_MERGE_SQL, MATCH_UPSERT_SQL, PLAYER_PAYLOAD_UPSERT_SQL, SCORECARD_INSERT_SQL,
+        TEAM_UPSERT_SQL
+    )
+
+    plan = _replay_plan()
+    counts = {"payloads": 0, "matches": 0, "scorecards": 0, "players": 0, "teams": 0}
+
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        create_raw_json_schema(conn)
+        create_teams_schema(conn)
+        # International team name -> country of its roster's players
+        team_countries = dict(conn.execute(
+            "SELECT team_id, name FROM teams WHERE category = 'international'"
+        ).fetchall())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if reset:
+                for table in ("scorecards", "matches", "players"):
+                    conn.execute(f"DELETE FROM {table}")
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # map() yields in plan order, so later payloads win as they did live
+                for endpoint, key, rows, header in pool.map(_parse_archived, plan, chunksize=16):
+                    counts["payloads"] += 1
+                    if endpoint in (LIVE, SERIES_MATCHES):
+                        conn.executemany(MATCH_UPSERT_SQL, rows)
+                        counts["matches"] += len(rows)
+                    elif endpoint == SCORECARD:
+                        conn.execute("DELETE FROM scorecards WHERE match_id = ?", (int(key),))
+                        conn.executemany(SCORECARD_INSERT_SQL, rows)
+                        if header is not None:
+                            conn.execute(MATCH_HEADER_MERGE_SQL, (header, int(key)))
+                        counts["scorecards"] += len(rows)
+                    elif endpoint == PLAYER_INFO:
+                        conn.executemany(PLAYER_PAYLOAD_UPSERT_SQL, rows)
+                        counts["players"] += len(rows)
+                    elif endpoint == TEAM_PLAYERS:
+                        country = team_countries.get(int(key))
+                        conn.executemany(PLAYER_PAYLOAD_UPSERT_SQL,
+                                         [(*r[:2], r[2] or country, *r[3:]) for r in rows])
+                        counts["players"] += len(rows)
+                    elif endpoint == TEAM_LIST:
+                        conn.executemany(TEAM_UPSERT_SQL, rows)
+                        if key == "international":
+                            team_countries.update((r[0], r[1]) for r in rows)
+                        counts["teams"] += len(rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return counts
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay the raw API payload archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Show archive size and deduplication")
+    sub.add_parser("prune", help="Apply the retention policy and delete unreferenced blobs")
+    p_replay = sub.add_parser("replay", help="Rebuild matches, scorecards and players without the API")
+    p_replay.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    p_replay.add_argument("--reset", action="store_true", help="Empty the tables before replaying")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        s = archive_stats()
+        print(f"{s['responses']} responses, {s['unique']} unique payloads")
+        print(f"{s['raw_bytes'] / 1024:.1f} KB raw -> {s['stored_bytes'] / 1024:.1f} KB stored")
+        for endpoint, count in sorted(s["endpoints"].items()):
+            print(f"  {endpoint:<14} {count}")
+    elif args.command == "prune":
+        removed = prune_archive()
+        print(f"Removed {removed['rows']} index rows and {removed['blobs']} blobs")
+    elif args.command == "replay":
+        counts = replay_archive(args.workers, args.reset)
+        print(f"Replayed {counts['payloads']} payloads: {counts['matches']} match rows, "
+              f"{counts['scorecards']} innings, {counts['players']} player rows, {counts['teams']} teams")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Multi-player comparison for Cricbuzz LiveStats
+
+Career stats of N players are read from the career tables in one query and
+aligned into a single float array of shape (players, formats, metrics), NaN
+where a player has no value. Derived metrics, per-metric rankings and
+batting / bowling percentile scores are then computed with whole-array NumPy
+operations, so comparing 20+ players costs about the same as comparing two.
+"""
+import json
+import sqlite3
+from collections import namedtuple
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from db.init_sqlite import create_career_stats_schema
+from utils.career_stats import BATTING, BOWLING
+
+DB_PATH = "db/cricbuzz.db"
+
+# Stored metrics: (kind, stat, label, higher_is_better)
+COMPARE_METRICS = [
+    (BATTING, "Matches", "Matches", True),
+    (BATTING, "Innings", "Bat Inns", True),
+    (BATTING, "Runs", "Runs", True),
+    (BATTING, "Average", "Bat Avg", True),
+    (BATTING, "SR", "Bat SR", True),
+    (BATTING, "100s", "100s", True),
+    (BATTING, "50s", "50s", True),
+    (BATTING, "Fours", "4s", True),
+    (BATTING, "Sixes", "6s", True),
+    (BOWLING, "Innings", "Bowl Inns", True),
+    (BOWLING, "Wickets", "Wickets", True),
+    (BOWLING, "Avg", "Bowl Avg", False),
+    (BOWLING, "Eco", "Economy", False),
+    (BOWLING, "SR", "Bowl SR", False),
+    (BOWLING, "5w", "5w", True),
+]
+
+# Derived metrics: (kind, label, higher_is_better), computed in derive_metrics()
+DERIVED_METRICS = [
+    (BATTING, "Runs/Inns", True),
+    (BATTING, "Conversion %", True),
+    (BATTING, "Boundary %", True),
+    (BOWLING, "Wkts/Inns", True),
+]
+
+# (kind, label, higher_is_better) for every column of metric_values()
+METRICS = [(kind, label, better) for kind, _, label, better in COMPARE_METRICS] + DERIVED_METRICS
+METRIC_LABELS = [label for _, label, _ in METRICS]
+
+_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, creating the career tables once per process"""
+    global _schema_ready
+    conn = sqlite3.connect(DB_PATH)
+    if not _schema_ready:
+        create_career_stats_schema(conn)
+        _schema_ready = True
+    return conn
+
+
+# values / ranks: (players, formats, metrics); scores: {kind: (players, formats)} in 0-100
+Comparison = namedtuple("Comparison", ["player_ids", "names", "formats", "labels",
+                                       "values", "ranks", "scores"])
+
+
+def load_stat_array(player_ids: Sequence[int]) -> Tuple[List[str], np.ndarray]:
+    """
+    Read the COMPARE_METRICS of several players into one array
+
+    Args:
+        player_ids: Player IDs, in output order
+
+    Returns:
+        tuple: (formats in API order, float array (players, formats, stored metrics))
+    """
+    player_ids = [int(p) for p in player_ids]
+    marks = ", ".join("?" * len(player_ids))
+    conn = _connect()
+    try:
+        cells = pd.read_sql_query(
+            f"""
+            SELECT 'batting' AS kind, player_id, format, stat, value, format_pos
+            FROM career_batting WHERE player_id IN ({marks})
+            UNION ALL
+            SELECT 'bowling', player_id, format, stat, value, format_pos
+            FROM career_bowling WHERE player_id IN ({marks})
+            """,
+            conn, params=(*player_ids, *player_ids)
+        )
+    finally:
+        conn.close()
+
+    formats = list(cells.groupby("format")["format_pos"].min().sort_values().index)
+    metric_index = pd.MultiIndex.from_tuples([(kind, stat) for kind, stat, _, _ in COMPARE_METRICS])
+    p = pd.Index(player_ids).get_indexer(cells["player_id"])
+    f = pd.Index(formats).get_indexer(cells["format"])
+    m = metric_index.get_indexer(pd.MultiIndex.from_arrays([cells["kind"], cells["stat"]]))
+
+    values = np.full((len(player_ids), len(formats), len(COMPARE_METRICS)), np.nan)
+    keep = (p >= 0) & (f >= 0) & (m >= 0)
+    values[p[keep], f[keep], m[keep]] = cells["value"].to_numpy(dtype=float, na_value=np.nan)[keep]
+    return formats, values
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """Elementwise numerator / denominator, NaN where the denominator is 0 or missing"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator * scale, np.nan)
+
+
+def derive_metrics(values: np.ndarray) -> np.ndarray:
+    """
+    Compute DERIVED_METRICS from the stored metrics
+
+    Args:
+        values: Array (players, formats, len(COMPARE_METRICS))
+
+    Returns:
+        np.ndarray: (players, formats, len(DERIVED_METRICS))
+    """
+    col = {(kind, stat): values[..., i] for i, (kind, stat, _, _) in enumerate(COMPARE_METRICS)}
+    runs, inns = col[(BATTING, "Runs")], col[(BATTING, "Innings")]
+    hundreds, fifties = col[(BATTING, "100s")], col[(BATTING, "50s")]
+    boundary_runs = 4 * col[(BATTING, "Fours")] + 6 * col[(BATTING, "Sixes")]
+    return np.stack([
+        _ratio(runs, inns),
+        _ratio(hundreds, hundreds + fifties, 100),
+        _ratio(boundary_runs, runs, 100),
+        _ratio(col[(BOWLING, "Wickets")], col[(BOWLING, "Innings")]),
+    ], axis=-1)
+
+
+def rank_players(values: np.ndarray, higher_is_better: Sequence[bool]) -> np.ndarray:
+    """
+    Rank players on every (format, metric) at once
+
+    Args:
+        values: Array (players, formats, metrics)
+        higher_is_better: Direction per metric
+
+    Equal values share the best of their ranks ("min" ranking: 1, 2, 2, 4),
+    so row order never decides between tied players.
+
+    Returns:
+        np.ndarray: 1-based ranks (1 = best), NaN where the value is missing
+    """
+    sign = np.where(np.asarray(higher_is_better), 1.0, -1.0)
+    missing = np.isnan(values)
+    key = np.where(missing, -np.inf, values * sign)
+    order = np.argsort(-key, axis=0, kind="stable")
+    ordered = np.take_along_axis(key, order, axis=0)
+    # Each sorted position takes the position where its run of equal values starts
+    starts = np.ones(values.shape, dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    positions = np.arange(1, values.shape[0] + 1)[:, None, None]
+    sorted_ranks = np.maximum.accumulate(np.where(starts, positions, 0), axis=0)
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, sorted_ranks.astype(float), axis=0)
+    return np.where(missing, np.nan, ranks)
+
+
+def percentile_scores(ranks: np.ndarray, kinds: Sequence[str]) -> dict:
+    """
+    Average per-metric percentiles (100 = best) into one score per kind
+
+    Args:
+        ranks: Output of rank_players
+        kinds: BATTING / BOWLING per metric
+
+    Returns:
+        dict: {kind: (players, formats) scores, NaN where a player has no metrics}
+    """
+    ranked = np.sum(~np.isnan(ranks), axis=0, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(ranked > 1, 100 * (ranked - ranks) / (ranked - 1), 100.0)
+    pct = np.where(np.isnan(ranks), np.nan, pct)
+    kinds = np.asarray(kinds)
+    scores = {}
+    for kind in (BATTING, BOWLING):
+        block = pct[..., kinds == kind]
+        counts = np.sum(~np.isnan(block), axis=-1)
+        with np.errstate(invalid="ignore"):
+            scores[kind] = np.where(counts > 0, np.nansum(block, axis=-1) / np.maximum(counts, 1), np.nan)
+    return scores
+
+
+def metric_values(player_ids: Sequence[int]) -> Tuple[List[str], np.ndarray]:
+    """
+    Stored plus derived metrics of several players
+
+    Args:
+        player_ids: Player IDs, in output order
+
+    Returns:
+        tuple: (formats, float array (players, formats, len(METRICS)))
+    """
+    formats, stored = load_stat_array(player_ids)
+    return formats, np.concatenate([stored, derive_metrics(stored)], axis=-1)
+
+
+def compare_players(player_ids: Sequence[int], names: Sequence[str]) -> Comparison:
+    """
+    Build the full comparison for several players from stored career stats
+
+    Args:
+        player_ids: Player IDs
+        names: Display name per player
+
+    Returns:
+        Comparison
+    """
+    formats, values = metric_values(player_ids)
+    ranks = rank_players(values, [better for _, _, better in METRICS])
+    scores = percentile_scores(ranks, [kind for kind, _, _ in METRICS])
+    return Comparison(list(player_ids), list(names), formats, METRIC_LABELS, values, ranks, scores)
+
+
+def comparison_frame(comparison: Comparison, format_name: str, ranks: bool = False) -> pd.DataFrame:
+    """
+    One format of a comparison as a players x metrics frame
+
+    Args:
+        comparison: Output of compare_players
+        format_name: e.g. 'Test'
+        ranks: Return ranks instead of values
+
+    Returns:
+        pd.DataFrame: Indexed by player name, with batting / bowling score columns
+    """
+    f = comparison.formats.index(format_name)
+    data = (comparison.ranks if ranks else comparison.values)[:, f, :]
+    frame = pd.DataFrame(data, index=comparison.names, columns=comparison.labels)
+    frame.insert(0, "Bowling score", comparison.scores[BOWLING][:, f].round(1))
+    frame.insert(0, "Batting score", comparison.scores[BATTING][:, f].round(1))
+    frame.index.name = "Player"
+    return frame
+
+
+def player_labels(player_ids: Sequence[int]) -> pd.DataFrame:
+    """
+    Describe some players for display: one indexed lookup per ID, never the whole table
+
+    Args:
+        player_ids: Player IDs (players with only career stats stored are included)
+
+    Returns:
+        pd.DataFrame: player_id, name, country, has_stats - in the given order
+    """
+    conn = _connect()
+    try:
+        return pd.read_sql_query(
+            """
+            SELECT ids.value AS player_id,
+                   COALESCE(p.name, 'Player ' || ids.value) AS name,
+                   p.country,
+                   EXISTS (SELECT 1 FROM career_fetches f WHERE f.player_id = ids.value) AS has_stats
+            FROM json_each(?) ids
+            LEFT JOIN players p ON p.player_id = ids.value
+            ORDER BY ids.key
+            """,
+            conn, params=(json.dumps([int(p) for p in player_ids]),)
+        )
+    finally:
+        conn.close()
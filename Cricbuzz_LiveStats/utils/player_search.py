@@ -0,0 +1,213 @@
+"""
+Local player name search for Cricbuzz LiveStats
+
+One PlayerNameIndex per process (held in `st.cache_resource` by the Player
+Stats page) indexes the names of every stored player two ways:
+
+- word prefixes: a sorted (word, player_id) list searched with bisect, so
+  'vir koh' finds 'Virat Kohli'
+- trigrams: posting sets per 3-character gram, for typos and partial names
+  ('kohly', 'bumra')
+
+Like PlayerStore, each search costs one indexed change_log lookup and only
+re-indexes the players changed since the last search. The page answers from
+this index first and only calls the API search endpoint on a miss or when the
+user asks to search online.
+"""
+import re
+import sqlite3
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, namedtuple
+from typing import Dict, Iterable, List, Set, Tuple
+
+from utils.change_log import changes_since, group_keys, pruned_through, table_version
+
+DB_PATH = "db/cricbuzz.db"
+
+NameMatch = namedtuple("NameMatch", ["player_id", "name", "country", "score"])
+
+# Score bands, best first; trigram matches score below PREFIX_SCORE
+EXACT_SCORE = 1.0
+NAME_PREFIX_SCORE = 0.9
+PREFIX_SCORE = 0.8
+# Minimum Dice coefficient of trigram sets for a fuzzy match
+MIN_TRIGRAM_SCORE = 0.35
+
+# More pending changes than this and a full rebuild is cheaper than patching
+MAX_INCREMENTAL_CHANGES = 5000
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case, strip accents and punctuation: 'Ravindra  Jadeja!' -> 'ravindra jadeja'"""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of each word, padded so word starts and ends count"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class PlayerNameIndex:
+    """Prefix + trigram index over stored player names, kept current from change_log"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = None
+        # id -> (name, country, normalized name, trigram count)
+        self._players: Dict[int, Tuple[str, str, str, int]] = {}
+        self._words: List[Tuple[str, int]] = []
+        self._grams: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def search(self, query: str, limit: int = 20) -> List[NameMatch]:
+        """
+        Find stored players by name
+
+        Args:
+            query: Name or part of a name
+            limit: Maximum results
+
+        Returns:
+            list: NameMatch best first (exact, name prefix, word prefixes, then fuzzy)
+        """
+        q = normalize_name(query)
+        if not q:
+            return []
+        seq = table_version("players")
+        with self._lock:
+            self._refresh(seq)
+            return self._search(q, limit)
+
+    def _search(self, q: str, limit: int) -> List[NameMatch]:
+        q_words = q.split()
+        scores: Dict[int, float] = {}
+
+        # Every query word must prefix some word of the name
+        candidates = None
+        for word in q_words:
+            ids = self._prefix_ids(word)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                break
+        for player_id in candidates or ():
+            normalized = self._players[player_id][2]
+            if normalized == q:
+                scores[player_id] = EXACT_SCORE
+            elif normalized.startswith(q):
+                scores[player_id] = NAME_PREFIX_SCORE
+            else:
+                scores[player_id] = PREFIX_SCORE
+
+        # Fuzzy: Dice coefficient of trigram sets, counted from the posting lists
+        q_grams = trigrams(q)
+        hits = Counter()
+        for gram in q_grams:
+            hits.update(self._grams.get(gram, ()))
+        for player_id, common in hits.items():
+            if player_id in scores:
+                continue
+            dice = 2 * common / (len(q_grams) + self._players[player_id][3])
+            if dice >= MIN_TRIGRAM_SCORE:
+                scores[player_id] = dice * PREFIX_SCORE
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], self._players[kv[0]][2]))[:limit]
+        return [NameMatch(pid, self._players[pid][0], self._players[pid][1], round(score, 3))
+                for pid, score in ranked]
+
+    # ---------------- maintenance ----------------
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        ids = set()
+        i = bisect_left(self._words, (prefix, -1))
+        while i < len(self._words) and self._words[i][0].startswith(prefix):
+            ids.add(self._words[i][1])
+            i += 1
+        return ids
+
+    def _add(self, player_id: int, name: str, country: str):
+        normalized = normalize_name(name)
+        if not normalized:
+            return
+        grams = trigrams(normalized)
+        self._players[player_id] = (name, country, normalized, len(grams))
+        for word in set(normalized.split()):
+            insort(self._words, (word, player_id))
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(player_id)
+
+    def _remove(self, player_id: int):
+        entry = self._players.pop(player_id, None)
+        if entry is None:
+            return
+        normalized = entry[2]
+        for word in set(normalized.split()):
+            i = bisect_left(self._words, (word, player_id))
+            if i < len(self._words) and self._words[i] == (word, player_id):
+                del self._words[i]
+        for gram in trigrams(normalized):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(player_id)
+                if not postings:
+                    del self._grams[gram]
+
+    def _load(self, player_ids: Iterable[int] = None) -> List[Tuple[int, str, str]]:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            if player_ids is None:
+                return conn.execute("SELECT player_id, name, country FROM players").fetchall()
+            player_ids = list(player_ids)
+            if not player_ids:
+                return []
+            return conn.execute(
+                f"SELECT player_id, name, country FROM players "
+                f"WHERE player_id IN ({', '.join('?' * len(player_ids))})", player_ids
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def _rebuild(self, seq: int):
+        self._players, self._grams = {}, {}
+        words = []
+        for player_id, name, country in self._load():
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            grams = trigrams(normalized)
+            self._players[player_id] = (name, country, normalized, len(grams))
+            words.extend((word, player_id) for word in set(normalized.split()))
+            for gram in grams:
+                self._grams.setdefault(gram, set()).add(player_id)
+        self._words = sorted(words)
+        self._seq = seq
+
+    def _refresh(self, seq: int):
+        """Bring the index up to date; called with the lock held"""
+        if self._seq == seq:
+            return
+        # A seq behind ours means the database was replaced (restore_backup)
+        if self._seq is None or seq < self._seq or pruned_through() > self._seq:
+            # seq is read before loading, so later changes are re-applied, never lost
+            self._rebuild(seq)
+            return
+
+        changes = changes_since(self._seq, ["players"], limit=MAX_INCREMENTAL_CHANGES)
+        if not changes or len(changes) >= MAX_INCREMENTAL_CHANGES:
+            # No changes behind a new seq: the log no longer matches the index
+            self._rebuild(seq)
+            return
+        keys = group_keys(changes).get("players", set())
+        for player_id in keys:
+            self._remove(player_id)
+        for player_id, name, country in self._load(keys):
+            self._add(player_id, name, country)
+        self._seq = changes[-1].seq
@@ -0,0 +1,358 @@
+"""
+Similar-player search for Cricbuzz LiveStats
+
+Every player is described by a fixed-length float32 career profile: batting
+and bowling rates per format, each centred and scaled against typical values
+for that format, then L2-normalised. The profiles live in one raw float32
+matrix on disk (db/features/players.f32, with the matching player IDs in
+players.ids) that readers memory-map, so every Streamlit worker process
+shares the same pages instead of holding its own copy. Top-k cosine
+similarity is one matrix-vector product over the map.
+
+The matrix and ID files belong to a generation named in players.json. A
+rebuild writes a new generation's pair and then switches players.json with
+one atomic replace, so a reader always maps an ID file and matrix that
+match; superseded pairs are deleted once nobody can pick them up.
+
+The matrix is kept current incrementally: sync_features() consumes the
+players / career_fetches change_log (durable cursor "player_features"), so
+rows are added or rewritten in place only for players that were saved,
+imported or had their career stats refreshed since the last sync.
+
+Usage:
+    python -m utils.player_similarity sync
+    python -m utils.player_similarity rebuild
+    python -m utils.player_similarity similar <player_id> [-k 10]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.change_log import ack, consume, consumer_seq, latest_seq, pruned_through
+from utils.player_compare import METRIC_LABELS, metric_values
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+DB_PATH = "db/cricbuzz.db"
+
+FEATURE_DIR = "db/features"
+META_PATH = os.path.join(FEATURE_DIR, "players.json")
+LOCK_PATH = os.path.join(FEATURE_DIR, "players.lock")
+
+CONSUMER = "player_features"
+FEATURE_TABLES = ("players", "career_fetches")
+
+FEATURE_FORMATS = ("Test", "ODI", "T20")
+
+# Profile features: metric label -> (centre, scale) per format. Values are
+# z-scored against these fixed references (not the current population), so a
+# row never changes when other players are added.
+FEATURE_REFERENCES = {
+    "Bat Avg": {"Test": (30, 15), "ODI": (30, 15), "T20": (22, 10)},
+    "Bat SR": {"Test": (50, 12), "ODI": (80, 15), "T20": (125, 20)},
+    "Runs/Inns": {"Test": (28, 14), "ODI": (27, 14), "T20": (20, 9)},
+    "Conversion %": {"Test": (25, 20), "ODI": (25, 20), "T20": (25, 20)},
+    "Boundary %": {"Test": (50, 12), "ODI": (50, 12), "T20": (65, 12)},
+    "Wkts/Inns": {"Test": (1.5, 1.0), "ODI": (1.2, 0.6), "T20": (1.0, 0.5)},
+    "Bowl Avg": {"Test": (32, 10), "ODI": (33, 10), "T20": (27, 8)},
+    "Economy": {"Test": (3.2, 0.6), "ODI": (5.3, 0.7), "T20": (7.8, 1.0)},
+    "Bowl SR": {"Test": (62, 18), "ODI": (37, 10), "T20": (20, 5)},
+}
+# Lower is better for these, so their z-scores are negated
+INVERTED_FEATURES = {"Bowl Avg", "Economy", "Bowl SR"}
+Z_CLIP = 3.0
+
+FEATURE_DIM = len(FEATURE_FORMATS) * len(FEATURE_REFERENCES)
+# Bump when the feature definition changes; a mismatch triggers a rebuild
+FEATURE_VERSION = 1
+
+# Players per metric_values() query during a rebuild
+REBUILD_CHUNK = 500
+
+_lock = threading.Lock()
+_reader = {"key": None, "ids": None, "matrix": None}
+
+
+def generation_paths(generation: int) -> Tuple[str, str]:
+    """
+    Get the matrix and ID file paths of one generation
+
+    Args:
+        generation: Generation number from players.json
+
+    Returns:
+        tuple: (matrix path, ids path)
+    """
+    return (os.path.join(FEATURE_DIR, f"players-{generation}.f32"),
+            os.path.join(FEATURE_DIR, f"players-{generation}.ids"))
+
+
+def _read_meta() -> Optional[dict]:
+    try:
+        with open(META_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _references() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Metric column and sign per feature, centre and scale per (format, feature)"""
+    columns = np.array([METRIC_LABELS.index(label) for label in FEATURE_REFERENCES])
+    signs = np.array([-1.0 if label in INVERTED_FEATURES else 1.0 for label in FEATURE_REFERENCES])
+    centres = np.array([[ref[f][0] for ref in FEATURE_REFERENCES.values()] for f in FEATURE_FORMATS])
+    scales = np.array([[ref[f][1] for ref in FEATURE_REFERENCES.values()] for f in FEATURE_FORMATS])
+    return columns, signs, centres, scales
+
+
+def feature_vectors(player_ids: Sequence[int]) -> np.ndarray:
+    """
+    Compute normalised career profiles
+
+    Args:
+        player_ids: Player IDs
+
+    Returns:
+        np.ndarray: float32 (players, FEATURE_DIM); all-zero for players without stats
+    """
+    if not player_ids:
+        return np.zeros((0, FEATURE_DIM), dtype=np.float32)
+    formats, values = metric_values(player_ids)
+    columns, signs, centres, scales = _references()
+
+    # (players, FEATURE_FORMATS, features); formats nobody has stay NaN
+    picked = np.full((len(player_ids), len(FEATURE_FORMATS), len(columns)), np.nan)
+    for i, format_name in enumerate(FEATURE_FORMATS):
+        if format_name in formats:
+            picked[:, i, :] = values[:, formats.index(format_name), columns]
+
+    z = np.clip(signs * (picked - centres) / scales, -Z_CLIP, Z_CLIP)
+    z = np.nan_to_num(z, nan=0.0).reshape(len(player_ids), FEATURE_DIM)
+    norms = np.linalg.norm(z, axis=1, keepdims=True)
+    return np.divide(z, norms, out=np.zeros_like(z), where=norms > 0).astype(np.float32)
+
+
+@contextmanager
+def _writer_lock():
+    """Serialise matrix writers across threads and (where fcntl exists) processes"""
+    os.makedirs(FEATURE_DIR, exist_ok=True)
+    with _lock, open(LOCK_PATH, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _meta_ok() -> bool:
+    meta = _read_meta()
+    if meta is None or "generation" not in meta:
+        return False  # missing, or written before generations existed
+    if not all(os.path.exists(p) for p in generation_paths(meta["generation"])):
+        return False
+    return meta.get("version") == FEATURE_VERSION and meta.get("dim") == FEATURE_DIM
+
+
+def _all_player_ids() -> List[int]:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return [r[0] for r in conn.execute(
+            "SELECT player_id FROM players UNION SELECT player_id FROM career_fetches ORDER BY 1"
+        )]
+    finally:
+        conn.close()
+
+
+def _rebuild():
+    """Recompute every row into a new generation and switch to it (writer lock held)"""
+    seq = latest_seq()
+    player_ids = _all_player_ids()
+    previous = (_read_meta() or {}).get("generation", 0)
+    generation = previous + 1
+    matrix_path, ids_path = generation_paths(generation)
+    with open(matrix_path, "wb") as f:
+        for start in range(0, len(player_ids), REBUILD_CHUNK):
+            f.write(feature_vectors(player_ids[start:start + REBUILD_CHUNK]).tobytes())
+    np.asarray(player_ids, dtype=np.int64).tofile(ids_path)
+
+    # The only switch readers see: both files of the new generation at once
+    tmp_meta = META_PATH + ".tmp"
+    with open(tmp_meta, "w") as f:
+        json.dump({"version": FEATURE_VERSION, "dim": FEATURE_DIM, "generation": generation,
+                   "features": [f"{fmt}:{label}" for fmt in FEATURE_FORMATS for label in FEATURE_REFERENCES]}, f)
+    os.replace(tmp_meta, META_PATH)
+    ack(CONSUMER, seq)
+    _remove_old_generations(generation)
+    return len(player_ids)
+
+
+def _remove_old_generations(current: int):
+    """Delete superseded matrix / ID files; open maps keep their pages until unmapped"""
+    keep = {os.path.basename(p) for p in generation_paths(current)}
+    for name in os.listdir(FEATURE_DIR):
+        if name.startswith("players") and name.endswith((".f32", ".ids")) and name not in keep:
+            try:
+                os.remove(os.path.join(FEATURE_DIR, name))
+            except OSError:
+                pass  # still mapped on Windows; removed after a later rebuild
+
+
+def _upsert(player_ids: Sequence[int]):
+    """Rewrite existing rows in place and append new ones (writer lock held)"""
+    player_ids = sorted(set(player_ids))
+    vectors = feature_vectors(player_ids)
+    matrix_path, ids_path = generation_paths(_read_meta()["generation"])
+    ids = np.fromfile(ids_path, dtype=np.int64)
+    position = {int(p): i for i, p in enumerate(ids)}
+
+    existing = [(position[p], i) for i, p in enumerate(player_ids) if p in position]
+    if existing:
+        rows, sources = zip(*existing)
+        matrix = np.memmap(matrix_path, dtype=np.float32, mode="r+", shape=(len(ids), FEATURE_DIM))
+        matrix[list(rows)] = vectors[list(sources)]
+        matrix.flush()
+        del matrix
+
+    new = [i for i, p in enumerate(player_ids) if p not in position]
+    if new:
+        # Matrix first: readers size themselves by the shorter of the two files
+        with open(matrix_path, "ab") as f:
+            f.write(vectors[new].tobytes())
+        with open(ids_path, "ab") as f:
+            f.write(np.asarray([player_ids[i] for i in new], dtype=np.int64).tobytes())
+
+
+def rebuild_features() -> int:
+    """
+    Rebuild the whole feature matrix from the career tables
+
+    Returns:
+        int: Number of player rows written
+    """
+    with _writer_lock():
+        return _rebuild()
+
+
+def sync_features() -> int:
+    """
+    Bring the feature matrix up to date with players / career stats changes
+
+    Cheap when nothing changed (one change_log lookup). Falls back to a full
+    rebuild when the files are missing, the feature definition changed or
+    the change_log was pruned past the cursor.
+
+    Returns:
+        int: Number of player rows written
+    """
+    with _writer_lock():
+        if not _meta_ok() or consumer_seq(CONSUMER) < pruned_through():
+            return _rebuild()
+        written = 0
+        while True:
+            changes = consume(CONSUMER, FEATURE_TABLES)
+            if not changes:
+                return written
+            keys = {c.key for c in changes if c.key is not None}
+            _upsert(keys)
+            ack(CONSUMER, changes[-1].seq)
+            written += len(keys)
+
+
+def _open_readers(attempts: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """Memory-map one generation's ids and matrix, remapping only when it changed or grew"""
+    for attempt in range(attempts):
+        generation = _read_meta()["generation"]
+        matrix_path, ids_path = generation_paths(generation)
+        try:
+            stat_m, stat_i = os.stat(matrix_path), os.stat(ids_path)
+            key = (generation, stat_m.st_size, stat_i.st_size)
+            if _reader["key"] != key:
+                rows = min(stat_m.st_size // (4 * FEATURE_DIM), stat_i.st_size // 8)
+                if rows == 0:
+                    ids, matrix = np.zeros(0, dtype=np.int64), np.zeros((0, FEATURE_DIM), dtype=np.float32)
+                else:
+                    ids = np.memmap(ids_path, dtype=np.int64, mode="r", shape=(rows,))
+                    matrix = np.memmap(matrix_path, dtype=np.float32, mode="r", shape=(rows, FEATURE_DIM))
+                _reader.update(key=key, ids=ids, matrix=matrix)
+            return _reader["ids"], _reader["matrix"]
+        except FileNotFoundError:
+            # A rebuild removed this generation after players.json was read
+            if attempt == attempts - 1:
+                raise
+
+
+def similar_players(player_id: int, k: int = 10, sync: bool = True) -> Optional[List[Tuple[int, float]]]:
+    """
+    Find the k players whose career profile is closest to a player's
+
+    Args:
+        player_id: Player ID
+        k: Number of results
+        sync: Apply pending changes to the matrix first
+
+    Returns:
+        list: (player_id, cosine similarity) best first, or None if the
+              player has no profile (no stored career stats)
+    """
+    if sync or not _meta_ok():
+        sync_features()
+    ids, matrix = _open_readers()
+    rows = np.flatnonzero(ids == player_id)
+    if not len(rows):
+        return None
+    query = np.array(matrix[rows[0]])
+    if not query.any():
+        return None
+
+    scores = matrix @ query
+    scores[rows[0]] = -np.inf
+    scores[scores == 0] = -np.inf  # players without stats have all-zero rows
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain and query the player similarity matrix")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="Apply pending player / career stats changes")
+    sub.add_parser("rebuild", help="Recompute every row")
+    p_similar = sub.add_parser("similar", help="List the most similar players")
+    p_similar.add_argument("player_id", type=int)
+    p_similar.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        print(f"Updated {sync_features()} rows")
+    elif args.command == "rebuild":
+        print(f"Wrote {rebuild_features()} rows to {FEATURE_DIR}")
+    else:
+        results = similar_players(args.player_id, args.k)
+        if results is None:
+            print("No career stats stored for this player")
+            return
+        conn = sqlite3.connect(DB_PATH)
+        names = dict(conn.execute(
+            f"SELECT player_id, name FROM players WHERE player_id IN ({', '.join('?' * len(results))})",
+            [p for p, _ in results]
+        )) if results else {}
+        conn.close()
+        for other, score in results:
+            print(f"{score:6.3f}  {other:>8}  {names.get(other, '')}")
+
+
+if __name__ == "__main__":
+    main()
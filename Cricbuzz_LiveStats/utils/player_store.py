@@ -0,0 +1,92 @@
+"""
+Shared in-memory players table for Cricbuzz LiveStats
+
+One PlayerStore per process (held in `st.cache_resource` by the pages) serves
+the players frame to every tab and session. Each read costs a single indexed
+change_log lookup; after a write (CRUD, import, sync - anything the change_log
+triggers capture) only the changed player rows are re-queried.
+"""
+import threading
+
+import pandas as pd
+
+from utils.change_log import changes_since, group_keys, pruned_through, table_version
+from utils.crud_players import fetch_players, fetch_players_by_ids, merge_player_rows
+
+# More pending changes than this and a full reload is cheaper than patching
+MAX_INCREMENTAL_CHANGES = 5000
+
+
+class PlayerStore:
+    """Versioned players frame kept current from change_log"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+
+    @property
+    def version(self) -> int:
+        """change_log seq the current frame reflects"""
+        return self._seq
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Get the current players frame
+
+        The returned frame is shared between sessions and must not be mutated.
+
+        Returns:
+            pd.DataFrame: All players, ordered by name
+        """
+        seq = table_version("players")
+        if self._frame is None or seq != self._seq:
+            with self._lock:
+                self._refresh(seq)
+        return self._frame
+
+    def search(self, search: str = "") -> pd.DataFrame:
+        """
+        Filter the cached frame like fetch_players(search), without a query
+
+        Args:
+            search: Case-insensitive substring of name, country or role
+
+        Returns:
+            pd.DataFrame: Matching players
+        """
+        df = self.frame()
+        term = search.strip()
+        if not term:
+            return df
+        mask = (
+            df["name"].str.contains(term, case=False, regex=False, na=False)
+            | df["country"].str.contains(term, case=False, regex=False, na=False)
+            | df["role"].str.contains(term, case=False, regex=False, na=False)
+        )
+        return df[mask]
+
+    def _refresh(self, seq: int):
+        """Bring the frame up to date; called with the lock held"""
+        if self._frame is not None and seq == self._seq:
+            return  # another session refreshed while we waited
+
+        # A seq behind ours means the database was replaced (restore_backup)
+        if self._frame is None or seq < self._seq or pruned_through() > self._seq:
+            self._reload(seq)
+            return
+
+        changes = changes_since(self._seq, ["players"], limit=MAX_INCREMENTAL_CHANGES)
+        if not changes or len(changes) >= MAX_INCREMENTAL_CHANGES:
+            # No changes behind a new seq: the log no longer matches our frame
+            self._reload(seq)
+            return
+
+        keys = group_keys(changes).get("players", set())
+        self._frame = merge_player_rows(self._frame, fetch_players_by_ids(keys), keys)
+        self._seq = changes[-1].seq
+
+    def _reload(self, seq: int):
+        # seq is read before loading, so later changes are re-applied, never lost
+        self._frame = fetch_players("")
+        self._seq = seq
@@ -0,0 +1,291 @@
+"""
+Multi-team roster import for Cricbuzz LiveStats
+
+Rosters of many teams are fetched concurrently on a small thread pool; a
+shared RateLimiter spaces the requests so the pool never bursts past the
+API quota. Players listed by several teams (a national player in an IPL
+squad) are de-duplicated by player ID before anything is written, and the
+unique players are upserted in batches in one transaction. Every team gets
+its own result - status, players, request time or error - so one failing
+team never aborts the import.
+
+Teams come from the `teams` table, filled by discovery from the API's team
+lists (/teams/v1/{category}).
+
+Usage:
+    python -m utils.roster_import teams [--category international league]
+    python -m utils.roster_import import 2 3 4 [--workers 4] [--rate 5]
+    python -m utils.roster_import import --all [--category international] [--max-age 86400]
+"""
+import argparse
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from db.init_sqlite import create_teams_schema
+from utils.api_client import TEAM_CATEGORIES, RateLimiter, fetch_team_players, fetch_teams
+from utils.db_sync import SYNC_BATCH_SIZE, TEAM_UPSERT_SQL, bulk_upsert_players
+from utils.models import Player, Team, parse_roster, parse_teams
+from utils.write_queue import run_write
+
+DB_PATH = "db/cricbuzz.db"
+
+# Concurrent roster requests and the request rate they share (per second)
+ROSTER_WORKERS = 4
+ROSTER_RATE = 5.0
+
+# status: "ok", "failed" or "skipped" (roster younger than max_age)
+TeamResult = namedtuple("TeamResult", ["team_id", "name", "status", "players", "seconds", "error"])
+RosterImport = namedtuple("RosterImport", ["teams", "unique_players", "duplicates", "written", "seconds"])
+
+# Player fields a later roster may fill in when the first one lacked them
+_MERGE_FIELDS = ("country", "role", "batting_style", "bowling_style")
+
+_schema_ready = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, creating the teams table once per process"""
+    global _schema_ready
+    conn = sqlite3.connect(DB_PATH)
+    if not _schema_ready:
+        create_teams_schema(conn)
+        _schema_ready = True
+    return conn
+
+
+def _execute_many(conn: sqlite3.Connection, sql: str, rows: list):
+    """Write operation: one statement over many rows"""
+    conn.executemany(sql, rows)
+
+
+def save_teams(teams: Iterable[Team]) -> int:
+    """
+    Upsert discovered teams
+
+    Returns:
+        int: Number of teams written
+    """
+    rows = [t.row() for t in teams]
+    if not _schema_ready:
+        _connect().close()
+    run_write(_execute_many, TEAM_UPSERT_SQL, rows)
+    return len(rows)
+
+
+def stored_teams(categories: Optional[Sequence[str]] = None) -> List[dict]:
+    """
+    Read known teams
+
+    Args:
+        categories: Only these categories (default: all)
+
+    Returns:
+        list: Dicts with team_id, name, short_name, category, roster_fetched_at,
+              roster_size - ordered by category then name
+    """
+    sql = "SELECT * FROM teams"
+    params = ()
+    if categories:
+        sql += f" WHERE category IN ({', '.join('?' * len(categories))})"
+        params = tuple(categories)
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in conn.execute(sql + " ORDER BY category, name", params)]
+    finally:
+        conn.close()
+
+
+def discover_teams(headers: dict, categories: Sequence[str] = ("international",),
+                   limiter: Optional[RateLimiter] = None) -> Dict[str, object]:
+    """
+    Fetch the team lists of some categories and store them
+
+    Args:
+        headers: API request headers
+        categories: Any of TEAM_CATEGORIES
+        limiter: Shared rate limiter, if any
+
+    Returns:
+        dict: {category: list of Team, or error text}
+    """
+    found = {}
+    for category in categories:
+        if limiter is not None:
+            limiter.wait()
+        status, data = fetch_teams(category, headers)
+        if status != 200:
+            found[category] = f"{status}: {str(data)[:200]}"
+            continue
+        teams = parse_teams(data, category)
+        save_teams(teams)
+        found[category] = teams
+    return found
+
+
+def _fetch_roster(team: dict, headers: dict, limiter: RateLimiter):
+    """Worker: fetch and parse one roster -> (status, players or error text, request seconds)"""
+    limiter.wait()
+    started = time.perf_counter()
+    try:
+        status, data = fetch_team_players(team["team_id"], headers)
+        seconds = time.perf_counter() - started
+        if status != 200:
+            return status, str(data)[:200], seconds
+        # Players of a national side belong to that country; league rosters say nothing
+        country = team["name"] if team.get("category") == "international" else None
+        # A malformed payload fails this team only, like a failed request
+        return status, parse_roster(data, default_country=country), seconds
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", time.perf_counter() - started
+
+
+def merge_rosters(rosters: Iterable[List[Player]]):
+    """
+    De-duplicate players across rosters by player ID
+
+    The first roster listing a player wins; later ones only fill fields it
+    left empty (a league roster has no country, a national one does).
+
+    Args:
+        rosters: Parsed rosters in priority order
+
+    Returns:
+        tuple: (unique players in first-seen order, duplicate listings dropped)
+    """
+    unique: Dict[int, Player] = {}
+    duplicates = 0
+    for players in rosters:
+        for player in players:
+            seen = unique.get(player.player_id)
+            if seen is None:
+                unique[player.player_id] = player
+                continue
+            duplicates += 1
+            for name in _MERGE_FIELDS:
+                if getattr(seen, name) is None:
+                    setattr(seen, name, getattr(player, name))
+    return list(unique.values()), duplicates
+
+
+def import_rosters(team_ids: Optional[Sequence[int]], headers: dict,
+                   categories: Sequence[str] = ("international",),
+                   workers: int = ROSTER_WORKERS, rate: float = ROSTER_RATE,
+                   batch_size: int = SYNC_BATCH_SIZE, max_age: Optional[int] = None) -> RosterImport:
+    """
+    Import the rosters of several teams
+
+    Args:
+        team_ids: Teams to import, or None to discover every team of `categories`
+        headers: API request headers
+        categories: Team list categories used for discovery
+        workers: Concurrent roster requests
+        rate: Max API requests per second across all workers (0 = unlimited)
+        batch_size: Rows per executemany when writing players
+        max_age: Skip teams whose roster was imported less than this many seconds ago
+
+    Returns:
+        RosterImport: per-team TeamResults (in team order) and write totals
+    """
+    started = time.perf_counter()
+    limiter = RateLimiter(rate)
+    if team_ids is None:
+        discover_teams(headers, categories, limiter)
+        teams = stored_teams(categories)
+    else:
+        known = {t["team_id"]: t for t in stored_teams()}
+        teams = [known.get(int(t), {"team_id": int(t), "name": None, "category": None,
+                                    "roster_fetched_at": None})
+                 for t in dict.fromkeys(team_ids)]
+
+    results: Dict[int, TeamResult] = {}
+    rosters: Dict[int, List[Player]] = {}
+    todo = []
+    for team in teams:
+        fetched = team.get("roster_fetched_at")
+        if max_age is not None and fetched and time.time() - fetched < max_age:
+            results[team["team_id"]] = TeamResult(team["team_id"], team["name"], "skipped", 0, 0.0, None)
+        else:
+            todo.append(team)
+
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="roster-fetch") as pool:
+        futures = {pool.submit(_fetch_roster, team, headers, limiter): team for team in todo}
+        for future in as_completed(futures):
+            team = futures[future]
+            status, result, seconds = future.result()
+            if status == 200:
+                rosters[team["team_id"]] = result
+                results[team["team_id"]] = TeamResult(team["team_id"], team["name"], "ok",
+                                                      len(result), round(seconds, 3), None)
+            else:
+                error = result if status is None else f"{status}: {result}"
+                results[team["team_id"]] = TeamResult(team["team_id"], team["name"], "failed",
+                                                      0, round(seconds, 3), error)
+
+    order = [t["team_id"] for t in teams]
+    players, duplicates = merge_rosters(rosters[t] for t in order if t in rosters)
+    written = bulk_upsert_players(players, batch_size) if players else 0
+
+    if rosters:
+        now = int(time.time())
+        if not _schema_ready:
+            _connect().close()
+        run_write(
+            _execute_many,
+            "INSERT INTO teams (team_id, roster_fetched_at, roster_size) VALUES (?, ?, ?) "
+            "ON CONFLICT(team_id) DO UPDATE SET roster_fetched_at = excluded.roster_fetched_at, "
+            "roster_size = excluded.roster_size",
+            [(team_id, now, len(roster)) for team_id, roster in rosters.items()]
+        )
+
+    return RosterImport([results[t] for t in order], len(players), duplicates, written,
+                        round(time.perf_counter() - started, 3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discover teams and import their rosters")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_teams = sub.add_parser("teams", help="Fetch and store the team lists")
+    p_teams.add_argument("--category", nargs="+", choices=TEAM_CATEGORIES, default=["international"])
+    p_import = sub.add_parser("import", help="Import rosters of some or all teams")
+    p_import.add_argument("team_ids", nargs="*", type=int)
+    p_import.add_argument("--all", action="store_true", help="Discover and import every team of --category")
+    p_import.add_argument("--category", nargs="+", choices=TEAM_CATEGORIES, default=["international"])
+    p_import.add_argument("--workers", type=int, default=ROSTER_WORKERS)
+    p_import.add_argument("--rate", type=float, default=ROSTER_RATE, help="Max requests per second")
+    p_import.add_argument("--max-age", type=int, default=None,
+                          help="Skip teams imported less than this many seconds ago")
+    args = parser.parse_args()
+
+    from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
+    headers = {
+        "X-RapidAPI-Key": RAPID_API_KEY,
+        "X-RapidAPI-Host": RAPID_API_HOST
+    }
+
+    if args.command == "teams":
+        for category, teams in discover_teams(headers, args.category).items():
+            if isinstance(teams, str):
+                print(f"{category}: failed ({teams})")
+                continue
+            print(f"{category}: {len(teams)} teams")
+            for team in teams:
+                print(f"  {team.team_id:>6}  {team.name}")
+        return
+
+    if not args.team_ids and not args.all:
+        parser.error("give team IDs or --all")
+    report = import_rosters(None if args.all else args.team_ids, headers, args.category,
+                            args.workers, args.rate, max_age=args.max_age)
+    for r in report.teams:
+        detail = f"{r.players} players" if r.status == "ok" else (r.error or "")
+        print(f"{r.team_id:>6}  {(r.name or '')[:24]:<24} {r.status:<8} {r.seconds:>6.2f}s  {detail}")
+    print(f"{report.written} unique players written ({report.duplicates} duplicate listings) "
+          f"in {report.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
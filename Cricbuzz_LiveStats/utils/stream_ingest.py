@@ -0,0 +1,104 @@
+"""
+Streaming ingest for Cricbuzz LiveStats
+
+Reads the live list and scorecards straight off the HTTP response, decodes
+them incrementally (models.iter_live_matches / iter_scorecard, backed by
+ijson when installed) and feeds the parsed rows into batched DB writes.
+The raw payload is never materialised as one document, only the rows built
+from it. The rows are built on the calling thread before the write is
+queued, so a slow response never holds the single writer or the write lock.
+
+Usage:
+    python -m utils.stream_ingest live
+    python -m utils.stream_ingest scorecard <match_id> [<match_id> ...]
+"""
+import argparse
+from typing import Dict, Iterable, Optional
+
+from utils.api_client import LIVE_SCORES_URL, scorecard_urls, stream_response
+from utils.db_sync import SYNC_BATCH_SIZE, bulk_sync_matches, save_scorecard
+from utils.models import iter_live_matches, iter_scorecard
+from utils.payload_archive import LIVE, SCORECARD
+
+
+def ingest_live_scores(headers: dict, batch_size: int = SYNC_BATCH_SIZE) -> int:
+    """
+    Stream the live match list into the matches table
+
+    Args:
+        headers: API request headers
+        batch_size: Matches per executemany
+
+    Returns:
+        int: Number of matches saved
+    """
+    with stream_response(LIVE_SCORES_URL, headers, archive=(LIVE, "")) as (status, body):
+        if body is None:
+            raise RuntimeError(f"Failed to fetch live match data: {status}")
+        return bulk_sync_matches(iter_live_matches(body), batch_size)
+
+
+def ingest_scorecard(match_id: int, headers: dict, batch_size: int = SYNC_BATCH_SIZE) -> Optional[int]:
+    """
+    Stream one match's scorecard into the scorecards table
+
+    Tries each scorecard endpoint in turn, like api_client.fetch_scorecard.
+
+    Args:
+        match_id: Match ID from Cricbuzz API
+        headers: API request headers
+        batch_size: Innings per executemany
+
+    Returns:
+        int: Number of innings saved, or None if every endpoint failed
+    """
+    for url in scorecard_urls(match_id):
+        with stream_response(url, headers, archive=(SCORECARD, match_id)) as (status, body):
+            if body is None:
+                continue
+            # Reads the whole stream here; the writer only gets finished rows
+            saved = save_scorecard(match_id, iter_scorecard(body), batch_size)
+        return saved.result()
+    return None
+
+
+def ingest_scorecards(match_ids: Iterable[int], headers: dict,
+                      batch_size: int = SYNC_BATCH_SIZE) -> Dict[int, Optional[int]]:
+    """
+    Stream several scorecards, one match at a time
+
+    Args:
+        match_ids: Match IDs from Cricbuzz API
+        headers: API request headers
+        batch_size: Innings per executemany
+
+    Returns:
+        dict: Innings saved per match (None where every endpoint failed)
+    """
+    return {match_id: ingest_scorecard(match_id, headers, batch_size) for match_id in match_ids}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream Cricbuzz API responses into the database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("live", help="Ingest the live match list")
+    p_card = sub.add_parser("scorecard", help="Ingest scorecards")
+    p_card.add_argument("match_ids", nargs="+", type=int)
+    parser.add_argument("--batch-size", type=int, default=SYNC_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
+    headers = {
+        "X-RapidAPI-Key": RAPID_API_KEY,
+        "X-RapidAPI-Host": RAPID_API_HOST
+    }
+
+    if args.command == "live":
+        print(f"Saved {ingest_live_scores(headers, args.batch_size)} matches")
+    else:
+        for match_id, count in ingest_scorecards(args.match_ids, headers, args.batch_size).items():
+            print(f"{match_id}: {'failed' if count is None else f'{count} innings'}")
+
+
+if __name__ == "__main__":
+    main()
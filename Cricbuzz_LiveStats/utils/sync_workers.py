@@ -0,0 +1,320 @@
+"""
+Multi-process sync for large scorecard and roster syncs
+
+Decoding JSON and building rows is CPU-bound, so a thread pool stays on one
+core however many threads fetch. Here a pool of worker processes fetches and
+parses the payloads, each returning compact row batches: plain tuples in the
+exact parameter order of the INSERT/UPSERT statements, which pickle small and
+cheaply. The parent process is the only writer. It queues each returned batch
+on its write queue (one writer thread, batched transactions), so the workers
+never open the database.
+
+Jobs are sent to workers in chunks to keep inter-process traffic low, and
+only a few chunks per worker are in flight, so a large sync never piles up
+parsed rows faster than the writer commits them.
+
+Workers make their requests without the shared RateLimiter of the thread-pool
+importers; use this mode for plans with a high request quota or against a
+local API stand-in (see utils.bench_sync).
+
+Usage:
+    python -m utils.sync_workers scorecards 91234 91235 [--workers 4]
+    python -m utils.sync_workers scorecards --missing
+    python -m utils.sync_workers rosters --all [--category international league]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import List, Sequence
+
+from db.init_sqlite import create_raw_json_schema, create_stats_schema, create_teams_schema
+from utils.api_client import API_BASE_URL, SCORECARD_PATHS, TEAM_CATEGORIES
+from utils.db_sync import MATCH_HEADER_MERGE_SQL, PLAYER_PAYLOAD_UPSERT_SQL, SCORECARD_INSERT_SQL
+from utils.models import dumps, loads, parse_roster, parse_scorecard
+from utils.payload_archive import SCORECARD, TEAM_PLAYERS, archive_response
+from utils.roster_import import stored_teams
+from utils.write_queue import DB_PATH as WRITER_DB_PATH, WriteQueue, get_write_queue
+
+DB_PATH = "db/cricbuzz.db"
+
+SCORECARD_JOB = "scorecard"
+ROSTER_JOB = "roster"
+
+# Worker processes (default: one per core) and jobs sent to a worker at a time
+SYNC_WORKERS = os.cpu_count() or 2
+SYNC_CHUNK_JOBS = 8
+# Chunks in flight per worker
+CHUNKS_IN_FLIGHT = 2
+
+# A job is (kind, key, country); country is only used for rosters of national teams
+SyncJob = namedtuple("SyncJob", ["kind", "key", "country"])
+# rows: parameter tuples ready for executemany; header: matchHeader JSON text (scorecards)
+SyncResult = namedtuple("SyncResult", ["kind", "key", "status", "rows", "header", "error"])
+SyncReport = namedtuple("SyncReport", ["jobs", "ok", "failed", "rows", "seconds", "errors"])
+
+# Per-process worker state, set by _init_worker
+_session = None
+_base_url = API_BASE_URL
+_archive = True
+
+
+def _prepare_db(db_path: str):
+    """Bring a database's schema up to date before queuing writes (the writer never changes it)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        create_raw_json_schema(conn)
+        create_stats_schema(conn)
+        create_teams_schema(conn)
+    finally:
+        conn.close()
+
+
+# ---------------- worker processes ----------------
+
+def _init_worker(base_url: str, headers: dict, archive: bool):
+    """Pool initializer: one keep-alive HTTP session per worker process"""
+    global _session, _base_url, _archive
+    import requests
+
+    _session = requests.Session()
+    _session.headers.update(headers)
+    _base_url = base_url
+    _archive = archive
+
+
+def _get(path: str):
+    """GET one endpoint -> (status, raw bytes or error text)"""
+    r = _session.get(f"{_base_url}{path}", timeout=20)
+    if r.status_code != 200:
+        return r.status_code, r.text[:200]
+    return r.status_code, r.content
+
+
+def _run_job(job: SyncJob) -> SyncResult:
+    """Fetch and parse one job into row tuples"""
+    try:
+        if job.kind == SCORECARD_JOB:
+            status, body = None, None
+            for path in SCORECARD_PATHS:
+                status, body = _get(path.format(job.key))
+                if status == 200 or status == 429:
+                    break
+            if status != 200:
+                return SyncResult(job.kind, job.key, status, None, None, f"{status}: {body}")
+            if _archive:
+                archive_response(SCORECARD, job.key, body)
+            data = loads(body)
+            rows = [inn.row(job.key) for inn in parse_scorecard(data)]
+            header = data.get("matchHeader")
+            return SyncResult(job.kind, job.key, status, rows, dumps(header) if header else None, None)
+
+        if job.kind == ROSTER_JOB:
+            status, body = _get(f"/teams/v1/{job.key}/players")
+            if status != 200:
+                return SyncResult(job.kind, job.key, status, None, None, f"{status}: {body}")
+            if _archive:
+                archive_response(TEAM_PLAYERS, job.key, body)
+            rows = [p.row() for p in parse_roster(loads(body), default_country=job.country)]
+            return SyncResult(job.kind, job.key, status, rows, None, None)
+
+        raise ValueError(f"unknown sync job kind: {job.kind}")
+    except Exception as e:
+        return SyncResult(job.kind, job.key, None, None, None, f"{type(e).__name__}: {e}")
+
+
+def _run_chunk(jobs: List[SyncJob]) -> List[SyncResult]:
+    """Worker entry point: run a chunk of jobs"""
+    return [_run_job(job) for job in jobs]
+
+
+# ---------------- writer (parent process) ----------------
+
+def _apply_results(conn: sqlite3.Connection, results: List[SyncResult]) -> int:
+    """Write operation: store the rows of one chunk -> rows written"""
+    cur = conn.cursor()
+    written = 0
+    rosters = []
+    for r in results:
+        if r.rows is None:
+            continue
+        if r.kind == SCORECARD_JOB:
+            cur.execute("DELETE FROM scorecards WHERE match_id = ?", (r.key,))
+            cur.executemany(SCORECARD_INSERT_SQL, r.rows)
+            if r.header:
+                cur.execute(MATCH_HEADER_MERGE_SQL, (r.header, r.key))
+        else:
+            cur.executemany(PLAYER_PAYLOAD_UPSERT_SQL, r.rows)
+            rosters.append((r.key, len(r.rows)))
+        written += len(r.rows)
+
+    if rosters:
+        now = int(time.time())
+        cur.executemany(
+            "INSERT INTO teams (team_id, roster_fetched_at, roster_size) VALUES (?, ?, ?) "
+            "ON CONFLICT(team_id) DO UPDATE SET roster_fetched_at = excluded.roster_fetched_at, "
+            "roster_size = excluded.roster_size",
+            [(team_id, now, size) for team_id, size in rosters]
+        )
+    cur.execute("UPDATE db_stats SET value = ? WHERE metric = 'last_sync_at'", (int(time.time()),))
+    return written
+
+
+def run_sync(jobs: Sequence[SyncJob], headers: dict, workers: int = SYNC_WORKERS,
+             chunk_jobs: int = SYNC_CHUNK_JOBS, base_url: str = API_BASE_URL,
+             db_path: str = DB_PATH, archive: bool = True) -> SyncReport:
+    """
+    Fetch, parse and store many scorecards / rosters on a process pool
+
+    Args:
+        jobs: SyncJobs to run
+        headers: API request headers
+        workers: Worker processes; 0 runs every job in this process (for comparison)
+        chunk_jobs: Jobs sent to a worker at a time
+        base_url: API root, e.g. a local stand-in's http://127.0.0.1:8765
+        db_path: Database to write to; the app database uses the process write queue
+        archive: Archive raw payloads (see payload_archive)
+
+    Returns:
+        SyncReport: job counts, rows written, wall time and (kind, key, error) per failure
+    """
+    started = time.perf_counter()
+    _prepare_db(db_path)
+    own_writer = os.path.abspath(db_path) != os.path.abspath(WRITER_DB_PATH)
+    writer = WriteQueue(db_path) if own_writer else get_write_queue()
+
+    chunks = [list(jobs[i:i + chunk_jobs]) for i in range(0, len(jobs), max(1, chunk_jobs))]
+    results: List[SyncResult] = []
+    writes = deque()  # (chunk results, write future), oldest first
+    write_errors = []
+    written = 0
+
+    def _collect(chunk_results: List[SyncResult], write: Future):
+        nonlocal written
+        try:
+            written += write.result()
+        except Exception as e:
+            # The chunk's rows were rolled back: its fetched jobs count as failed
+            write_errors.extend((r.kind, r.key, f"write failed: {type(e).__name__}: {e}")
+                                for r in chunk_results if r.rows is not None)
+
+    def _store(chunk_results: List[SyncResult]):
+        results.extend(chunk_results)
+        if any(r.rows is not None for r in chunk_results):
+            writes.append((chunk_results, writer.submit(_apply_results, chunk_results)))
+            # Parsed rows waiting for the writer are bounded like chunks in flight
+            while len(writes) > max(1, workers) * CHUNKS_IN_FLIGHT:
+                _collect(*writes.popleft())
+
+    try:
+        if workers <= 0:
+            _init_worker(base_url, headers, archive)
+            for chunk in chunks:
+                _store(_run_chunk(chunk))
+        else:
+            # spawn: the parent runs a writer thread, which fork would copy mid-state
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(base_url, headers, archive)) as pool:
+                pending = set()
+                for chunk in chunks:
+                    pending.add(pool.submit(_run_chunk, chunk))
+                    if len(pending) >= workers * CHUNKS_IN_FLIGHT:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            _store(future.result())
+                for future in wait(pending).done:
+                    _store(future.result())
+        while writes:
+            _collect(*writes.popleft())
+    finally:
+        if own_writer:
+            writer.close()
+
+    errors = [(r.kind, r.key, r.error) for r in results if r.rows is None] + write_errors
+    return SyncReport(len(results), len(results) - len(errors), len(errors), written,
+                      round(time.perf_counter() - started, 3), errors)
+
+
+# ---------------- job lists ----------------
+
+def scorecard_jobs(match_ids: Sequence[int]) -> List[SyncJob]:
+    """Jobs for some matches' scorecards"""
+    return [SyncJob(SCORECARD_JOB, int(m), None) for m in dict.fromkeys(match_ids)]
+
+
+def missing_scorecard_jobs(db_path: str = DB_PATH) -> List[SyncJob]:
+    """Jobs for every stored match that has no scorecard rows yet"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ids = [r[0] for r in conn.execute(
+            "SELECT match_id FROM matches m "
+            "WHERE NOT EXISTS (SELECT 1 FROM scorecards s WHERE s.match_id = m.match_id) "
+            "ORDER BY match_id"
+        )]
+    finally:
+        conn.close()
+    return scorecard_jobs(ids)
+
+
+def roster_jobs(teams: Sequence[dict]) -> List[SyncJob]:
+    """
+    Jobs for some teams' rosters
+
+    Args:
+        teams: Dicts with team_id, name and category (see roster_import.stored_teams)
+    """
+    # Players of a national side belong to that country; league rosters say nothing
+    return [SyncJob(ROSTER_JOB, int(t["team_id"]),
+                    t.get("name") if t.get("category") == "international" else None)
+            for t in teams]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync many scorecards or rosters on a process pool")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_cards = sub.add_parser("scorecards", help="Sync match scorecards")
+    p_cards.add_argument("match_ids", nargs="*", type=int)
+    p_cards.add_argument("--missing", action="store_true", help="Every stored match without a scorecard")
+    p_rosters = sub.add_parser("rosters", help="Sync team rosters")
+    p_rosters.add_argument("team_ids", nargs="*", type=int)
+    p_rosters.add_argument("--all", action="store_true", help="Every stored team of --category")
+    p_rosters.add_argument("--category", nargs="+", choices=TEAM_CATEGORIES, default=["international"])
+    for p in (p_cards, p_rosters):
+        p.add_argument("--workers", type=int, default=SYNC_WORKERS, help="Worker processes (0 = in-process)")
+        p.add_argument("--chunk", type=int, default=SYNC_CHUNK_JOBS, help="Jobs per worker task")
+        p.add_argument("--base-url", default=API_BASE_URL, help="API root (e.g. a local stand-in)")
+    args = parser.parse_args()
+
+    if args.command == "scorecards":
+        if not args.match_ids and not args.missing:
+            parser.error("give match IDs or --missing")
+        jobs = missing_scorecard_jobs() if args.missing else scorecard_jobs(args.match_ids)
+    else:
+        if not args.team_ids and not args.all:
+            parser.error("give team IDs or --all")
+        known = {t["team_id"]: t for t in stored_teams(args.category if args.all else None)}
+        if args.all:
+            teams = list(known.values())
+        else:
+            teams = [known.get(t, {"team_id": t}) for t in dict.fromkeys(args.team_ids)]
+        jobs = roster_jobs(teams)
+
+    from config.api_keys import RAPID_API_KEY, RAPID_API_HOST
+    headers = {
+        "X-RapidAPI-Key": RAPID_API_KEY,
+        "X-RapidAPI-Host": RAPID_API_HOST
+    }
+    report = run_sync(jobs, headers, args.workers, args.chunk, args.base_url)
+    for kind, key, error in report.errors[:20]:
+        print(f"  {kind} {key}: {error}")
+    rate = report.jobs / report.seconds if report.seconds else 0.0
+    print(f"{report.ok}/{report.jobs} {args.command} synced, {report.rows} rows written "
+          f"in {report.seconds:.2f}s ({rate:.1f} jobs/s, {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Single-writer queue for Cricbuzz LiveStats database writes
+
+Page renders, the live feed, bulk syncs, imports and CRUD forms all write to
+the same SQLite file. Instead of each opening a connection and competing for
+the write lock, they queue write operations here: one writer thread per
+process takes everything queued, applies it in a single transaction (each
+operation in its own savepoint, so one failing operation does not undo the
+others) and resolves each caller's Future once the transaction is committed.
+
+Callers that only record data (saving a match seen during a render) drop
+the Future and never wait; callers that need the outcome call .result().
+The writer switches the database to WAL, so readers keep reading while a
+batch commits.
+
+An operation is a function taking the writer's connection as its first
+argument. It must not commit, roll back or change the schema - the writer
+owns the transaction - so schema setup stays with the callers' usual
+once-per-process _connect().
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+
+DB_PATH = "db/cricbuzz.db"
+
+# Most operations per transaction; more queued than this spills into the next batch
+WRITE_BATCH_OPS = 64
+# Seconds the writer waits for a lock held by another process (CLI jobs, backups)
+WRITER_BUSY_TIMEOUT = 30
+
+_STOP = object()
+
+
+class WriteQueue:
+    """One writer thread applying queued write operations in batched transactions"""
+
+    def __init__(self, db_path: str = DB_PATH, max_batch: int = WRITE_BATCH_OPS):
+        """
+        Args:
+            db_path: SQLite database file
+            max_batch: Most operations per transaction
+        """
+        self._db_path = db_path
+        self._max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.ops = 0
+        self.batches = 0
+        self.failed = 0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Queue a write operation
+
+        Args:
+            fn: Called as fn(conn, *args, **kwargs) inside the writer's transaction
+            *args, **kwargs: Its arguments
+
+        Returns:
+            Future: fn's return value (or exception) once its batch is committed
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("write operations cannot queue further writes; use the conn they are given")
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("write queue is closed")
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything queued so far is committed
+
+        Returns:
+            bool: False if the timeout passed first
+        """
+        marker = self.submit(lambda conn: None)
+        try:
+            marker.result(timeout)
+            return True
+        except FutureTimeoutError:
+            return False
+
+    def close(self, timeout: Optional[float] = 10):
+        """Commit what is queued and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Writer counters: ops applied, batches committed, ops failed, ops waiting"""
+        return {"ops": self.ops, "batches": self.batches, "failed": self.failed,
+                "pending": self._queue.qsize()}
+
+    # ---------------- writer thread ----------------
+
+    def _run(self):
+        try:
+            conn = self._open()
+        except sqlite3.Error as e:
+            # Fail what is queued now; the next submit starts a new writer
+            self._drain(e)
+            return
+        try:
+            stopping = False
+            while not stopping:
+                batch = []
+                item = self._queue.get()
+                while item is not _STOP:
+                    future = item[0]
+                    if future.set_running_or_notify_cancel():
+                        batch.append(item)
+                    if len(batch) >= self._max_batch:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                stopping = item is _STOP
+                if not batch:
+                    continue
+                try:
+                    self._apply(conn, batch)
+                except BaseException as e:
+                    # Never leave a caller waiting on a future nobody will resolve
+                    self._fail(batch, e)
+                if conn.in_transaction:
+                    # Even the rollback failed: carry on with a fresh connection
+                    conn.close()
+                    try:
+                        conn = self._open()
+                    except sqlite3.Error as e:
+                        self._drain(e)
+                        return
+        finally:
+            conn.close()
+
+    def _open(self) -> sqlite3.Connection:
+        """The writer's connection: autocommit mode (it issues BEGIN itself), WAL"""
+        conn = sqlite3.connect(self._db_path, isolation_level=None, timeout=WRITER_BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _drain(self, error: BaseException):
+        """Fail everything queued; used when the writer cannot connect"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(error)
+                self.failed += 1
+
+    def _fail(self, batch: list, error: BaseException):
+        """Fail every still unresolved future of a batch"""
+        for future, *_ in batch:
+            if not future.done():
+                future.set_exception(error)
+                self.failed += 1
+
+    def _apply(self, conn: sqlite3.Connection, batch: list):
+        """Run one batch in a transaction; resolve the futures after COMMIT"""
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, fn, args, kwargs in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    outcomes.append((future, True, fn(conn, *args, **kwargs)))
+                    conn.execute("RELEASE op")
+                except BaseException as e:
+                    # If this cleanup fails, the whole batch fails below
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    outcomes.append((future, False, e))
+            conn.execute("COMMIT")
+        except BaseException as e:
+            # BEGIN, a savepoint or COMMIT failed: nothing of the batch is committed
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass  # _run replaces a connection left in a transaction
+            self._fail(batch, e)
+            return
+
+        self.batches += 1
+        for future, ok, value in outcomes:
+            self.ops += 1
+            if ok:
+                future.set_result(value)
+            else:
+                self.failed += 1
+                future.set_exception(value)
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> WriteQueue:
+    """The process-wide write queue, created (with its thread) on first use"""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteQueue()
+            atexit.register(_write_queue.close)
+        return _write_queue
+
+
+def submit_write(fn: Callable, *args, **kwargs) -> Future:
+    """
+    Queue fn(conn, *args, **kwargs) on the process writer
+
+    Returns:
+        Future: Resolves once the operation is committed
+    """
+    return get_write_queue().submit(fn, *args, **kwargs)
+
+
+def run_write(fn: Callable, *args, **kwargs):
+    """
+    Queue a write operation and wait for it
+
+    Returns:
+        fn's return value, after commit (its exception is re-raised)
+    """
+    return submit_write(fn, *args, **kwargs).result()
+
+
+def wait_for_writes(timeout: Optional[float] = None) -> bool:
+    """Wait until every write queued so far in this process is committed"""
+    return get_write_queue().flush(timeout)